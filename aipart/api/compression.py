@@ -0,0 +1,325 @@
+"""
+HTTP 压缩（纯 ASGI 中间件，不缓冲整个请求/响应）：
+- 请求：Content-Encoding 为 gzip / deflate / zstd 时边接收边解压，交给路由的是明文；
+  解压后的大小同样受 MAX_UPLOAD_MB 限制（超出即停止解压并返回 413，防止压缩炸弹），数据损坏返回 400，
+  不支持的编码返回 415；
+- 响应：客户端 Accept-Encoding 支持时，对超过 HTTP_COMPRESS_MIN_BYTES 的 JSON/文本响应做 zstd 或 gzip 压缩；
+  流式响应逐块压缩并 flush；
+- 累计字节数（压缩前/后）与压缩/解压耗费的 CPU 时间计入 /metrics 的 http_compression。
+
+zstd 需要可选依赖 zstandard，未安装时只支持 gzip/deflate。
+"""
+import time
+import zlib
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from ..services import metrics
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # 可选依赖
+    zstandard = None
+
+_OUT_CHUNK = 1 << 16  # 单次解压输出上限，保证内存占用与限制值无关
+_ZSTD_IN_SLICE = 256  # zstd 不支持限制输出长度，按小片喂入（单片最多展开约 8MB）
+_COMPRESSIBLE = ("application/json", "text/", "application/javascript", "application/xml", "+json", "+xml")
+
+
+class DecodeError(Exception):
+    pass
+
+
+class RequestBodyError(Exception):
+    """请求体解压失败或超限：从 receive 抛给路由（而不是伪装成断开），中间件随后回复 status。"""
+
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class _Inflater:
+    """gzip / deflate（zlib 封装）流式解压，按块产出。"""
+
+    def __init__(self, encoding: str) -> None:
+        # 47 = 32 + 15：自动识别 gzip/zlib 头
+        self._d = zlib.decompressobj(47)
+
+    def feed(self, data: bytes, final: bool) -> Iterator[bytes]:
+        d = self._d
+        try:
+            while data:
+                out = d.decompress(data, _OUT_CHUNK)
+                data = d.unconsumed_tail
+                if out:
+                    yield out
+                if d.eof:
+                    break
+            if final:
+                if not d.eof:
+                    raise DecodeError("压缩数据不完整")
+                tail = d.flush()
+                if tail:
+                    yield tail
+        except zlib.error as e:
+            raise DecodeError(str(e))
+
+
+class _ZstdInflater:
+    def __init__(self, encoding: str) -> None:
+        self._d = zstandard.ZstdDecompressor().decompressobj()
+        self._seen = False
+
+    def feed(self, data: bytes, final: bool) -> Iterator[bytes]:
+        try:
+            for i in range(0, len(data), _ZSTD_IN_SLICE):
+                self._seen = True
+                out = self._d.decompress(data[i:i + _ZSTD_IN_SLICE])
+                if out:
+                    yield out
+        except zstandard.ZstdError as e:
+            raise DecodeError(str(e))
+        if final and (not self._seen or not getattr(self._d, "eof", True)):
+            raise DecodeError("压缩数据不完整")
+
+
+def _decoders() -> dict:
+    out = {"gzip": _Inflater, "x-gzip": _Inflater, "deflate": _Inflater}
+    if zstandard is not None:
+        out["zstd"] = _ZstdInflater
+    return out
+
+
+def _gzip_compressor(level: int) -> Any:
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _zstd_compressor(level: int) -> Any:
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+def choose_encoding(accept: str) -> Optional[str]:
+    """按 Accept-Encoding 选择响应编码：优先 zstd（已安装时），其次 gzip；q=0 视为不接受。"""
+    accepted = set()
+    for part in (accept or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip())
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _DecodingReceive:
+    """包装 receive：透明解压请求体并限制解压后大小。出错时抛出 RequestBodyError，由中间件回复错误。"""
+
+    def __init__(self, receive: Callable, decoder: Any, limit: int, state: "_State") -> None:
+        self.receive = receive
+        self.decoder = decoder
+        self.limit = limit
+        self.state = state
+        self.pending: Optional[Iterator[bytes]] = None
+        self.more = True
+        self.done = False
+
+    def _fail(self, status: int, detail: str) -> RequestBodyError:
+        self.state.error = (status, detail)
+        self.done = True
+        return RequestBodyError(status, detail)
+
+    async def __call__(self) -> dict:
+        st = self.state
+        while True:
+            if self.done:
+                if st.error:
+                    raise RequestBodyError(*st.error)
+                return await self.receive()
+            if self.pending is None:
+                msg = await self.receive()
+                if msg["type"] != "http.request":
+                    return msg
+                body = msg.get("body", b"")
+                self.more = msg.get("more_body", False)
+                st.wire_in += len(body)
+                self.pending = self.decoder.feed(body, final=not self.more)
+            t0 = time.thread_time()
+            try:
+                chunk = next(self.pending, None)
+            except DecodeError as e:
+                raise self._fail(400, f"请求体解压失败: {e}")
+            finally:
+                st.cpu += time.thread_time() - t0
+            if chunk is None:
+                self.pending = None
+                if not self.more:
+                    self.done = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                continue
+            st.body_in += len(chunk)
+            if st.body_in > self.limit:
+                mb = max(1, self.limit // (1024 * 1024))
+                raise self._fail(413, f"请求体过大（解压后），限制为 {mb}MB")
+            return {"type": "http.request", "body": chunk, "more_body": True}
+
+
+class _State:
+    __slots__ = ("error", "started", "wire_in", "body_in", "body_out", "wire_out", "cpu", "compressed")
+
+    def __init__(self) -> None:
+        self.error: Optional[Tuple[int, str]] = None
+        self.started = False
+        self.wire_in = self.body_in = self.body_out = self.wire_out = 0
+        self.cpu = 0.0
+        self.compressed = False
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Any, max_body_size: int, min_size: int = 1024, gzip_level: int = 6,
+                 zstd_level: int = 3, compress_responses: bool = True) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.compress_responses = compress_responses
+        self.decoders = _decoders()
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        state = _State()
+        encoding = headers.get("content-encoding", "").strip().lower()
+        decoding = bool(encoding) and encoding != "identity"
+        if decoding:
+            factory = self.decoders.get(encoding)
+            if factory is None:
+                supported = ", ".join(sorted(self.decoders))
+                await JSONResponse({"detail": f"不支持的 Content-Encoding: {encoding}（可选 {supported}）"},
+                                   status_code=415)(scope, receive, send)
+                return
+            # 下游看到的是明文：去掉编码与（压缩后的）长度头
+            scope = dict(scope)
+            scope["headers"] = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+            receive = _DecodingReceive(receive, factory(encoding), self.max_body_size, state)
+
+        response_enc = choose_encoding(headers.get("accept-encoding", "")) if self.compress_responses else None
+        wrapped_send = self._wrap_send(send, response_enc, state)
+        try:
+            await self.app(scope, receive, wrapped_send)
+        except Exception:
+            if state.error is None:
+                raise
+        if state.error is not None and not state.started:
+            status, detail = state.error
+            await JSONResponse({"detail": detail}, status_code=status)(scope, receive, send)
+        self._record(state, decoding)
+
+    def _wrap_send(self, send: Callable, encoding: Optional[str], state: _State) -> Callable:
+        held: List[dict] = []
+        comp: List[Any] = []  # [compressor]，决定压缩后才有
+
+        def compress(data: bytes, final: bool) -> bytes:
+            t0 = time.thread_time()
+            c = comp[0]
+            out = c.compress(data)
+            if final:
+                out += c.flush()
+            elif zstandard is not None and encoding == "zstd":
+                out += c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            else:
+                out += c.flush(zlib.Z_SYNC_FLUSH)
+            state.cpu += time.thread_time() - t0
+            return out
+
+        async def wrapped(message: dict) -> None:
+            if state.error is not None:
+                return  # 已决定回复错误，丢弃下游的输出
+            mtype = message["type"]
+            if mtype == "http.response.start":
+                held.append(message)
+                return
+            if mtype != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if held:
+                start = held.pop()
+                h = MutableHeaders(raw=start["headers"])
+                ctype = h.get("content-type", "").lower()
+                if (
+                    encoding is None
+                    or "content-encoding" in h
+                    or not any(t in ctype for t in _COMPRESSIBLE)
+                    or (not more and len(body) < self.min_size)
+                ):
+                    state.started = True
+                    await send(start)
+                    await send(message)
+                    return
+                comp.append(_zstd_compressor(self.zstd_level) if encoding == "zstd"
+                            else _gzip_compressor(self.gzip_level))
+                state.compressed = True
+                h["content-encoding"] = encoding
+                h.add_vary_header("Accept-Encoding")
+                out = compress(body, final=not more)
+                if more:
+                    del h["content-length"]
+                else:
+                    h["content-length"] = str(len(out))
+                state.body_out += len(body)
+                state.wire_out += len(out)
+                state.started = True
+                await send(start)
+                await send({"type": "http.response.body", "body": out, "more_body": more})
+                return
+            if comp:
+                out = compress(body, final=not more)
+                state.body_out += len(body)
+                state.wire_out += len(out)
+                await send({"type": "http.response.body", "body": out, "more_body": more})
+                return
+            await send(message)
+
+        return wrapped
+
+    @staticmethod
+    def _record(state: _State, decoded: bool) -> None:
+        if decoded:
+            metrics.inc("http_requests_decompressed")
+            metrics.inc("http_request_wire_bytes", state.wire_in)
+            metrics.inc("http_request_body_bytes", state.body_in)
+        if state.compressed:
+            metrics.inc("http_responses_compressed")
+            metrics.inc("http_response_body_bytes", state.body_out)
+            metrics.inc("http_response_wire_bytes", state.wire_out)
+        if state.cpu:
+            metrics.inc("http_compression_cpu_s", state.cpu)
+
+
+def compression_stats() -> dict:
+    req_body, req_wire = metrics.get("http_request_body_bytes"), metrics.get("http_request_wire_bytes")
+    resp_body, resp_wire = metrics.get("http_response_body_bytes"), metrics.get("http_response_wire_bytes")
+    return {
+        "requests_decompressed": int(metrics.get("http_requests_decompressed")),
+        "request_bytes_saved": int(req_body - req_wire),
+        "responses_compressed": int(metrics.get("http_responses_compressed")),
+        "response_bytes_saved": int(resp_body - resp_wire),
+        "cpu_s": round(metrics.get("http_compression_cpu_s"), 3),
+        "zstd": zstandard is not None,
+    }
+
@@ -0,0 +1,76 @@
+"""
+请求日志（纯 ASGI 中间件）：每个 HTTP 请求写一条 aipart.request 结构化记录。
+
+- 请求 ID 取客户端的 X-Request-ID（不超过 128 字符），否则生成，并在响应头中回传；
+- 字段：request_id、method、route（路由模板，如 /v1/jobs/{job_id}；未匹配时为原始路径）、status、
+  duration_ms、in_bytes（实际收到的请求体字节数，解压前）、out_bytes，以及服务代码通过
+  services.logs.annotate() / stage() 追加的 audio_s、stages（各阶段毫秒）等；
+- 是否写出由 RequestSampler 决定；写出只是放入队列（见 services/logs.py），不阻塞请求。
+"""
+import logging
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers
+
+from ..services import logs
+
+_log = logging.getLogger("aipart.request")
+
+
+class RequestLogMiddleware:
+    def __init__(self, app: Any, sampler: Optional[logs.RequestSampler] = None, enabled: bool = True) -> None:
+        self.app = app
+        self.sampler = sampler or logs.RequestSampler.from_env()
+        self.enabled = enabled
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        request_id = (Headers(scope=scope).get("x-request-id") or "")[:128] or uuid.uuid4().hex
+        token = logs.begin(request_id)
+        rl = logs.current()
+        info = {"status": 500, "in_bytes": 0, "out_bytes": 0}
+
+        async def counting_receive() -> dict:
+            message = await receive()
+            if message["type"] == "http.request":
+                info["in_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def tagging_send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                info["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1", "replace"))
+                ]
+            elif message["type"] == "http.response.body":
+                info["out_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, tagging_send)
+        finally:
+            logs.end(token)
+            self._emit(scope, rl, info)
+
+    def _emit(self, scope: dict, rl: logs.RequestLog, info: dict) -> None:
+        duration_ms = round((time.perf_counter() - rl.started) * 1000, 2)
+        route = getattr(scope.get("route"), "path", None) or scope.get("path")
+        if not self.sampler.keep(route, info["status"], duration_ms):
+            return
+        fields = {
+            "request_id": rl.request_id,
+            "method": scope.get("method"),
+            "route": route,
+            "status": info["status"],
+            "duration_ms": duration_ms,
+            "in_bytes": info["in_bytes"],
+            "out_bytes": info["out_bytes"],
+            **rl.fields,
+        }
+        if rl.stages:
+            fields["stages"] = rl.stages
+        _log.log(logging.WARNING if info["status"] >= 500 else logging.INFO, "request", extra={"fields": fields})
@@ -0,0 +1,60 @@
+"""
+快速 JSON 路径：
+- 请求：直接解析原始字节（优先 orjson，否则标准库 json），再用缓存的 TypeAdapter 校验 dict；
+  大段中文正文下，这比 model_validate_json（jiter 解析长非 ASCII 字符串较慢）快约 2~3 倍；
+- 响应：跳过 FastAPI 默认的 jsonable_encoder + json.dumps 与响应模型二次校验，
+  优先用 orjson 序列化，否则用 pydantic-core（Rust）直接输出字节；
+- 支持按字段投影（fields / exclude），例如省略回显的大段 text。
+"""
+import json
+from functools import lru_cache
+from typing import Any, Optional, Set, Type, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson  # type: ignore
+except Exception:  # 可选依赖
+    orjson = None
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Type[Any]) -> TypeAdapter:
+    """按类型缓存 TypeAdapter，避免每次请求重建校验/序列化器。"""
+    return TypeAdapter(tp)
+
+
+def loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def parse_body(model: Type[M], body: bytes) -> M:
+    """解析并校验请求体；JSON 语法错误抛 ValueError，字段不合法抛 pydantic.ValidationError。"""
+    return type_adapter(model).validate_python(loads(body))
+
+
+def parse_fields(value: Optional[str]) -> Optional[Set[str]]:
+    """解析逗号分隔的字段列表，如 "summary,language"；空值返回 None。"""
+    if not value:
+        return None
+    names = {v.strip() for v in value.split(",") if v.strip()}
+    return names or None
+
+
+def model_response(
+    model: BaseModel,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    status_code: int = 200,
+) -> Response:
+    include_set, exclude_set = parse_fields(fields), parse_fields(exclude)
+    if orjson is not None:
+        body = orjson.dumps(model.model_dump(include=include_set, exclude=exclude_set))
+    else:
+        body = type_adapter(type(model)).dump_json(model, include=include_set, exclude=exclude_set)
+    return Response(content=body, status_code=status_code, media_type="application/json")
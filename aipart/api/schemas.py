@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal
+from typing import Annotated, List, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -6,11 +6,29 @@ class SummarizeRequest(BaseModel):
     text: str = Field(..., description="需要被总结的文本")
     max_sentences: int = Field(3, ge=1, le=20, description="摘要句子数上限")
     strategy: Literal["lead", "frequency"] = Field("frequency", description="摘要策略：首句优先或频率打分")
+    lengths: Optional[List[Annotated[int, Field(ge=1, le=20)]]] = Field(
+        None, max_length=10, description="同时返回多个长度的摘要（如 [1, 3, 8]），与主摘要共用一次打分"
+    )
+    ranked: bool = Field(False, description="返回全部句子的名次与得分，客户端可自行截取任意长度")
+
+
+class SummaryVariant(BaseModel):
+    max_sentences: int
+    summary: str
+    sentences: List[str]
+
+
+class RankedSentence(BaseModel):
+    index: int = Field(..., description="句子在原文中的序号")
+    sentence: str
+    score: Optional[float] = Field(None, description="频率得分（lead 策略为空）")
 
 
 class SummarizeResponse(BaseModel):
     summary: str
     sentences: List[str]
+    summaries: Optional[List[SummaryVariant]] = Field(None, description="按 lengths 顺序的各长度摘要")
+    ranked: Optional[List[RankedSentence]] = Field(None, description="按名次排列的全部句子；前 k 项即长度为 k 的摘要")
 
 
 class OptimizeRequest(BaseModel):
@@ -29,6 +47,11 @@ class STTResponse(BaseModel):
     text: str
     language: Optional[str] = None
     engine: Optional[str] = None
+    tier: Optional[str] = Field(None, description="本次使用的自适应解码档位：full/reduced/greedy/greedy-small")
+    audio_seconds: Optional[float] = Field(None, description="原始音频时长（秒）")
+    trimmed_seconds: Optional[float] = Field(None, description="预处理裁掉的首尾静音时长（秒）")
+    partial: bool = Field(False, description="因 deadline_s / max_audio_s 提前结束，只转写了部分音频")
+    covered_range: Optional[List[float]] = Field(None, description="partial 时已转写的原始音频区间 [起, 止]（秒）")
 
 
 class ErrorResponse(BaseModel):
@@ -52,3 +75,57 @@ class AiResponse(BaseModel):
     optimized: Optional[str] = None
     language: Optional[str] = None
     engine: Optional[str] = None
+    tier: Optional[str] = None
+    audio_seconds: Optional[float] = None
+    trimmed_seconds: Optional[float] = None
+    partial: bool = False
+    covered_range: Optional[List[float]] = None
+
+
+# 异步任务：/v1/jobs
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: float
+    updated_at: float
+    result: Optional[AiResponse] = None
+    error: Optional[str] = None
+
+
+# 增量摘要会话：/v1/sessions
+class SessionCreateRequest(BaseModel):
+    max_sentences: int = Field(3, ge=1, le=20, description="摘要句子数上限")
+    strategy: Literal["lead", "frequency"] = Field("frequency", description="摘要策略")
+
+
+class SessionAppendRequest(BaseModel):
+    text: str = Field(..., description="新增的转写文本片段")
+    final: bool = Field(False, description="为 true 时把未以句末标点结束的尾部也作为一句提交")
+    max_sentences: Optional[int] = Field(None, ge=1, le=20, description="本次返回的摘要句数，缺省用会话设置")
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    summary: str
+    sentences: List[str]
+    sentence_count: int = Field(..., description="已提交的句子数")
+    chars: int = Field(..., description="已提交的文本字符数")
+    pending_chars: int = Field(..., description="暂存的未完结尾部字符数")
+
+
+# 可续传分块上传：/v1/uploads
+class UploadCreateRequest(BaseModel):
+    length: int = Field(..., ge=1, description="文件总字节数")
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: str
+    offset: int = Field(..., description="已接收的字节数，下一个分块从这里开始")
+    length: int
+    complete: bool
+    expires_at: float = Field(..., description="若无新分块，上传在此时刻（Unix 秒）后过期")
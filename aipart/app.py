@@ -1,19 +1,43 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import ClientDisconnect
 from .api.schemas import (
-    SummarizeRequest, SummarizeResponse,
+    SummarizeRequest, SummarizeResponse, SummaryVariant, RankedSentence,
     OptimizeRequest, OptimizeResponse,
     STTResponse, ErrorResponse,
-    AiTextRequest, AiResponse
+    AiTextRequest, AiResponse,
+    JobSubmitResponse, JobStatusResponse,
+    SessionCreateRequest, SessionAppendRequest, SessionResponse,
+    UploadCreateRequest, UploadStatusResponse,
 )
-from .services.summarizer import summarize as summarize_svc
+from .api.compression import CompressionMiddleware, compression_stats
+from .api.request_log import RequestLogMiddleware
+from .api.responses import model_response, parse_body
+from .services.summarizer import rank_sentences
 from .services.optimizer import optimize as optimize_svc
+from .services.pipeline import parse_audio_form, run_audio_pipeline, run_text_pipeline
+from .services.jobs import check_callback_url, get_job_manager
+from .services.autotune import get_autotune_runner, mode as autotune_mode, saved_result
+from .services.hot_reload import apply_startup_config, get_reload_manager, install_sighup_handler
+from .services.scheduler import estimate_cost, get_scheduler
+from .services.sessions import SessionLimitError, get_session_store
+from .services.singleflight import get_singleflight, request_key
+from .services.streaming import END_MESSAGES, StreamDecoder, get_stream_manager, latency_summary
 from .services.stt import get_stt_engine
+from .services.adaptive import get_policy
 from .services.text_utils import detect_language, apply_corrections
+from .services.uploads import UploadError, get_upload_store
+from .services import logs, metrics
+import asyncio
+import hmac
 import tempfile
+import threading
+import time
 import os
 
 
@@ -33,13 +57,40 @@ class BodySizeLimitMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+def _env_int(env: str, default: int) -> int:
+    try:
+        return int((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
 app = FastAPI(title="AI Summarizer Service", version="0.1.0")
 
+# 结构化 JSON 日志经队列由后台线程写出（见 services/logs.py）
+logs.setup_logging()
+
 # Body size limit (default 25MB)
 try:
     _max_mb = int((os.environ.get("MAX_UPLOAD_MB") or "25").strip())
 except Exception:
     _max_mb = 25
+
+# 请求/响应压缩（在体积限制之内执行：Content-Length 限制压缩后大小，中间件再限制解压后大小）
+app.add_middleware(
+    CompressionMiddleware,
+    max_body_size=_max_mb * 1024 * 1024,
+    min_size=_env_int("HTTP_COMPRESS_MIN_BYTES", 1024),
+    gzip_level=_env_int("HTTP_GZIP_LEVEL", 6),
+    zstd_level=_env_int("HTTP_ZSTD_LEVEL", 3),
+    compress_responses=_env_int("HTTP_COMPRESS", 1) != 0,
+)
 app.add_middleware(BodySizeLimitMiddleware, max_body_size=_max_mb * 1024 * 1024)
 
 app.add_middleware(
@@ -49,10 +100,104 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 最外层：每个请求一条日志（含被体积限制/解压拒绝的请求）；LOG_REQUESTS=0 关闭
+app.add_middleware(RequestLogMiddleware, enabled=_env_int("LOG_REQUESTS", 1) != 0)
+
+
+metrics.register_collector("stt_models", lambda: get_stt_engine().model_stats())
+metrics.register_collector("stt_adaptive", lambda: get_policy().stats())
+metrics.register_collector("sessions", lambda: get_session_store().stats())
+metrics.register_collector("stt_stream", lambda: get_stream_manager().stats())
+metrics.register_collector("stt_scheduler", lambda: get_scheduler().stats())
+metrics.register_collector("http_compression", compression_stats)
+metrics.register_collector("coalescing", lambda: get_singleflight().stats())
+metrics.register_collector("uploads", lambda: get_upload_store().stats())
+metrics.register_collector("logging", logs.stats)
+metrics.register_collector(
+    "stt_reload", lambda: {**get_reload_manager().status(), "inflight": get_stt_engine().inflight}
+)
+
+
+def _client_key(request: Request) -> str:
+    # 公平调度的客户端标识：优先 API Key，否则按来源 IP
+    key = request.headers.get("x-api-key")
+    if key:
+        return "key:" + key.strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+async def _run_cancellable(fn, *args, **kwargs):
+    """在线程池中执行 fn(*args, cancel=event, **kwargs)。被取消时置位 event，
+    等工作线程在下一个检查点（转写片段之间/流程阶段之间）退出后再继续抛出 CancelledError。"""
+    cancel = threading.Event()
+    fut = asyncio.ensure_future(run_in_threadpool(fn, *args, cancel=cancel, **kwargs))
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        cancel.set()
+        metrics.inc("work_cancelled")
+        await asyncio.gather(fut, return_exceptions=True)
+        raise
+
+
+async def _run_scheduled(request: Request, path: str, model_name: str, fn, *args, **kwargs):
+    """按音频时长 × 模型开销排队获取转写槽位，在线程池中执行 fn，避免阻塞事件循环。"""
+    audio_s, cost = estimate_cost(path, model_name)
+    sched = get_scheduler()
+    with logs.stage("queue"):
+        ticket = await sched.acquire(_client_key(request), cost, audio_s)
+    try:
+        return await _run_cancellable(fn, *args, **kwargs)
+    finally:
+        sched.release(ticket)
+
+
+async def _until_disconnect(request: Request, coro):
+    """等待 coro；客户端先断开时取消它（进而取消排队/转写，见 _run_cancellable）并返回 499。
+    调用前须已读完请求体：之后 receive 只会收到 http.disconnect。
+    （不用 Request.is_disconnected：经过 BaseHTTPMiddleware 时其非阻塞读取会丢失断开消息。）"""
+    async def disconnected() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done() and watcher.exception() is not None:
+            # 读取连接状态出错：无法判断是否断开，照常等待结果
+            await asyncio.wait({task})
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if task.done():
+        return task.result()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    metrics.inc("requests_cancelled")
+    raise HTTPException(status_code=499, detail="客户端已断开连接")
+
+
+async def _run_upload(request: Request, content: bytes, suffix: str, model_name: str, fn, **kwargs):
+    """将上传内容写入临时文件后排队执行 fn(path, **kwargs)，结束（含取消）后删除临时文件。"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(content)
+        tmp_path = tmp.name
+    try:
+        return await _run_scheduled(request, tmp_path, model_name, fn, tmp_path, **kwargs)
+    finally:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
 
 
 @app.on_event("startup")
 def on_startup():
+    # 配置文件与已保存的自动调优结果在预热前生效
+    apply_startup_config()
     # 预热 STT，减少首个请求冷启动
     try:
         engine = get_stt_engine()
@@ -61,6 +206,17 @@ def on_startup():
         app.state.stt_ready = bool(ready)
     except Exception:
         app.state.stt_ready = False
+    # kill -HUP <pid>：按当前环境变量与 STT_CONFIG_FILE 热加载模型与配置
+    install_sighup_handler()
+    # 异步任务的重启恢复、租约续期与清理线程，以及分块上传的过期清理线程，随服务启动，不等第一个请求
+    get_job_manager()
+    get_upload_store()
+    # STT_AUTOTUNE=startup 且本机尚无调优结果：后台调优，完成后热加载应用
+    engine = get_stt_engine()
+    if engine.name == "faster-whisper" and autotune_mode() == "startup":
+        model_key = engine.resolve_model()
+        if saved_result(model_key.name, model_key.device) is None:
+            get_autotune_runner().trigger()
 
 
 @app.get("/healthz")
@@ -68,137 +224,539 @@ def healthz():
     return {"status": "ok"}
 
 
+def _capacity() -> dict:
+    engine = get_stt_engine()
+    cap = get_scheduler().capacity()
+    # READY_MAX_SATURATION：(运行 + 排队) / 槽位数 达到该值即视为饱和，<=0 关闭
+    limit = _env_float("READY_MAX_SATURATION", 2.0)
+    streams = get_stream_manager().stats()
+    return {
+        **cap,
+        "saturated": limit > 0 and cap["saturation"] >= limit,
+        "max_saturation": limit,
+        "streams": {"active": streams["active"], "max": streams["max_connections"]},
+        "engine": engine.name,
+        "models": [
+            f"{m['model']}/{m['device']}/{m['compute_type']}" for m in engine.model_stats()["models"] if m["loaded"]
+        ],
+        "reload": get_reload_manager().status()["state"],
+    }
+
+
 @app.get("/ready")
 def readyz():
+    """饱和（见 READY_MAX_SATURATION）时返回 503，负载均衡据此摘除实例；其余字段与之前一致。"""
     engine = get_stt_engine()
-    return {"ready": bool(getattr(app.state, "stt_ready", False)), "engine": engine.name, "available": engine.available}
+    cap = _capacity()
+    body = {
+        "ready": bool(getattr(app.state, "stt_ready", False)) and not cap["saturated"],
+        "engine": engine.name,
+        "available": engine.available,
+        "saturated": cap["saturated"],
+        "free_slots": cap["free_slots"],
+        "queued": cap["queued"],
+    }
+    return JSONResponse(status_code=503 if cap["saturated"] else 200, content=body)
+
+
+@app.get("/capacity")
+def capacity():
+    """轻量容量视图：空闲槽位、排队深度、EWMA 延迟与已加载模型，供最少负载路由与扩缩容使用。"""
+    return _capacity()
+
+
+@app.get("/metrics")
+def metrics_view():
+    return metrics.snapshot()
+
+
+def _require_admin(request: Request) -> None:
+    token = os.environ.get("ADMIN_TOKEN") or ""
+    if not token:
+        raise HTTPException(status_code=403, detail="未配置 ADMIN_TOKEN，管理接口已禁用")
+    auth = request.headers.get("authorization") or ""
+    given = auth[7:].strip() if auth.lower().startswith("bearer ") else (request.headers.get("x-admin-token") or "")
+    if not hmac.compare_digest(given.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="管理令牌无效")
+
+
+@app.post("/admin/reload", status_code=202, responses={401: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def admin_reload(request: Request, force: bool = False, wait: bool = False):
+    """后台热加载 STT 模型与配置；force=true 即使模型未变也重新加载权重，wait=true 等待替换与排空完成。
+
+    只作用于处理本请求的进程：预派生多进程时请向父进程发送 SIGHUP，由其转发给所有 worker。
+    """
+    _require_admin(request)
+    manager = get_reload_manager()
+    if not manager.trigger(force=force):
+        raise HTTPException(status_code=409, detail="已有热加载正在进行")
+    if wait:
+        await run_in_threadpool(manager.wait)
+    return {**manager.status(), "pid": os.getpid()}
+
+
+@app.get("/admin/reload", responses={401: {"model": ErrorResponse}})
+def admin_reload_status(request: Request):
+    _require_admin(request)
+    return {**get_reload_manager().status(), "inflight": get_stt_engine().inflight, "pid": os.getpid()}
+
+
+@app.post("/admin/autotune", status_code=202, responses={401: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def admin_autotune(request: Request, wait: bool = False):
+    """用校准音频实测各配置并保存本机最优结果，完成后热加载应用；wait=true 等待调优结束。"""
+    _require_admin(request)
+    engine = get_stt_engine()
+    if engine.name != "faster-whisper":
+        raise HTTPException(status_code=501, detail="自动调优仅支持 faster-whisper")
+    runner = get_autotune_runner()
+    if not runner.trigger():
+        raise HTTPException(status_code=409, detail="自动调优正在进行")
+    if wait:
+        await run_in_threadpool(runner.wait)
+    return runner.status()
+
+
+@app.get("/admin/autotune", responses={401: {"model": ErrorResponse}})
+def admin_autotune_status(request: Request):
+    _require_admin(request)
+    engine = get_stt_engine()
+    key = engine.resolve_model() if engine.available else None
+    return {**get_autotune_runner().status(), "saved": saved_result(key.name, key.device) if key else None}
 
 
 @app.post("/v1/summarize", response_model=SummarizeResponse, responses={400: {"model": ErrorResponse}})
-def summarize(req: SummarizeRequest):
+def summarize(req: SummarizeRequest, fields: str | None = None, exclude: str | None = None):
     if not req.text or not req.text.strip():
         raise HTTPException(status_code=400, detail="text 不能为空")
-    sentences = summarize_svc(req.text, req.max_sentences, req.strategy)
-    return SummarizeResponse(summary=" ".join(sentences), sentences=sentences)
+    # 切分与打分只做一次，各长度的摘要都取同一排名的前缀
+    with logs.stage("summarize"):
+        ranking = rank_sentences(req.text, req.strategy)
+    sentences = ranking.top(req.max_sentences)
+    summaries = None
+    if req.lengths:
+        summaries = []
+        for k in req.lengths:
+            top = ranking.top(k)
+            summaries.append(SummaryVariant(max_sentences=k, summary=" ".join(top), sentences=top))
+    ranked = None
+    if req.ranked:
+        ranked = [RankedSentence(index=i, sentence=s, score=score) for i, s, score in ranking.ranked()]
+    return model_response(SummarizeResponse(
+        summary=" ".join(sentences), sentences=sentences, summaries=summaries, ranked=ranked,
+    ), fields, exclude)
 
 
 @app.post("/v1/optimize", response_model=OptimizeResponse, responses={400: {"model": ErrorResponse}})
 def optimize(req: OptimizeRequest):
     if not req.text or not req.text.strip():
         raise HTTPException(status_code=400, detail="text 不能为空")
-    result = optimize_svc(req.text, req.style, req.language)
+    with logs.stage("optimize"):
+        result = optimize_svc(req.text, req.style, req.language)
     return OptimizeResponse(result=result)
 
 
 @app.post("/v1/stt", response_model=STTResponse, responses={400: {"model": ErrorResponse}, 501: {"model": ErrorResponse}})
-async def stt(file: UploadFile = File(...), language: str | None = None, initial_prompt: str | None = None):
+async def stt(
+    request: Request,
+    file: UploadFile = File(...),
+    language: str | None = None,
+    initial_prompt: str | None = None,
+    model: str | None = None,
+    compute_type: str | None = None,
+    max_audio_s: float | None = Query(None, gt=0, description="只转写前 N 秒音频"),
+    deadline_s: float | None = Query(None, gt=0, description="从收到请求起的时间预算（秒），用尽时返回已转写部分"),
+    fields: str | None = None,
+    exclude: str | None = None,
+):
+    started = time.monotonic()
     if not file:
         raise HTTPException(status_code=400, detail="请上传音频文件")
     engine = get_stt_engine()
     if not engine.available:
         raise HTTPException(status_code=501, detail="STT 引擎不可用，请安装 faster-whisper 或 openai-whisper")
-    # Save to temp file and transcribe
+    try:
+        key = engine.resolve_model(model, compute_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     suffix = os.path.splitext(file.filename or "audio")[1] or ".wav"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    content = await file.read()
+    # 相同内容与参数的请求在途时合并为一次转写
+    flight_key = request_key("stt", content, {
+        "suffix": suffix, "language": language, "initial_prompt": initial_prompt, "model": tuple(key),
+        "max_audio_s": max_audio_s, "deadline_s": deadline_s,
+    })
+    try:
+        tr = await _until_disconnect(request, get_singleflight().do(flight_key, lambda: _run_upload(
+            request, content, suffix, key.name, engine.transcribe_detailed,
+            language=language, initial_prompt=initial_prompt, model=model, compute_type=compute_type,
+            max_audio_s=max_audio_s, deadline=started + deadline_s if deadline_s else None,
+        )))
+        # 术语纠错（可选，受环境变量控制）
+        text = apply_corrections(tr.text, tr.language or "en")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"音频解析/转写失败: {e}")
+    return model_response(STTResponse(
+        text=text, language=tr.language, engine=engine.name, tier=tr.tier,
+        audio_seconds=tr.audio_seconds, trimmed_seconds=tr.trimmed_seconds,
+        partial=tr.partial, covered_range=list(tr.covered_range) if tr.covered_range else None,
+    ), fields, exclude)
+
+
+@app.websocket("/v1/stt/stream")
+async def stt_stream(
+    ws: WebSocket,
+    sample_rate: int = 16000,
+    language: str | None = None,
+    model: str | None = None,
+    compute_type: str | None = None,
+):
+    """实时转写：二进制消息为 16-bit 小端单声道 PCM（采样率由 sample_rate 指定），
+    文本消息 "end" 表示结束；服务端推送 JSON：partial / final / done / error。"""
+    await ws.accept()
+    engine = get_stt_engine()
+    if not engine.available:
+        await ws.send_json({"type": "error", "detail": "STT 引擎不可用，请安装 faster-whisper 或 openai-whisper"})
+        await ws.close(code=1011)
+        return
     try:
+        engine.resolve_model(model, compute_type)
+    except ValueError as e:
+        await ws.send_json({"type": "error", "detail": str(e)})
+        await ws.close(code=1008)
+        return
+    if not 8000 <= sample_rate <= 48000:
+        await ws.send_json({"type": "error", "detail": "sample_rate 需在 8000~48000 之间"})
+        await ws.close(code=1008)
+        return
+    manager = get_stream_manager()
+    if not manager.try_acquire():
+        await ws.send_json({"type": "error", "detail": "流式连接数已达上限，请稍后重试"})
+        await ws.close(code=1013)
+        return
+
+    decoder = StreamDecoder(
+        lambda audio, prompt: engine.transcribe_window(audio, language, prompt, model, compute_type),
+        manager.config, sample_rate,
+    )
+    wake = asyncio.Event()
+    state = {"ended": False, "closed": False}
+
+    async def receiver():
         try:
-            text, lang = engine.transcribe(tmp_path, language=language, initial_prompt=initial_prompt)
-            # 术语纠错（可选，受环境变量控制）
-            text = apply_corrections(text, lang or "en")
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"音频解析/转写失败: {e}")
-        return STTResponse(text=text, language=lang, engine=engine.name)
+            while True:
+                msg = await ws.receive()
+                if msg["type"] == "websocket.disconnect":
+                    state["closed"] = True
+                    return
+                if msg.get("bytes"):
+                    decoder.feed(msg["bytes"])
+                    wake.set()
+                elif (msg.get("text") or "").strip().lower() in END_MESSAGES:
+                    state["ended"] = True
+                    return
+        finally:
+            wake.set()
+
+    latencies = []
+    recv_task = asyncio.create_task(receiver())
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            if state["closed"]:
+                break
+            final = state["ended"]
+            while decoder.ready() or (final and decoder.has_audio()):
+                msgs, arrival = await run_in_threadpool(decoder.step, final)
+                for m in msgs:
+                    m["latency_ms"] = round((time.perf_counter() - arrival) * 1000, 1)
+                    latencies.append(m["latency_ms"])
+                    manager.record_latency(m["latency_ms"])
+                    await ws.send_json(m)
+                if not final:
+                    break
+            if final:
+                metrics.inc("stt_stream_audio_seconds", decoder.received_s)
+                await ws.send_json({
+                    "type": "done",
+                    "text": "".join(decoder.committed).strip(),
+                    "language": decoder.language,
+                    "audio_seconds": round(decoder.received_s, 3),
+                    "dropped_seconds": round(decoder.dropped_s, 3),
+                    "latency_ms": latency_summary(latencies),
+                })
+                await ws.close()
+                break
+    except Exception as e:
+        if not state["closed"]:
+            try:
+                await ws.send_json({"type": "error", "detail": f"流式转写失败: {e}"})
+                await ws.close(code=1011)
+            except Exception:
+                pass
     finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
+        recv_task.cancel()
+        manager.release()
 
 
 @app.post("/v1/ai", response_model=AiResponse, responses={400: {"model": ErrorResponse}, 501: {"model": ErrorResponse}})
-async def ai_unified(request: Request):
+async def ai_unified(request: Request, fields: str | None = None, exclude: str | None = None):
+    """fields / exclude：逗号分隔的响应字段投影，如 exclude=text 省略回显原文。"""
     content_type = request.headers.get("content-type", "").lower()
 
-    def do_pipeline(text: str, summarize: bool, optimize: bool, max_sentences: int, strategy: str, style: str, language: str | None, lang_detected: str | None = None):
-        summary = None
-        optimized = None
-        lang = language or lang_detected
-        if summarize:
-            sentences = summarize_svc(text, max_sentences, strategy)
-            summary = " ".join(sentences)
-        if optimize:
-            base = summary or text
-            optimized = optimize_svc(base, style, language)
-        return summary, optimized, lang
-
     # JSON: 文本流程
     if "application/json" in content_type:
-        data = await request.json()
+        # 直接解析原始字节并用缓存的 TypeAdapter 校验（见 api/responses.py）
+        body = await request.body()
         try:
-            req = AiTextRequest(**data)
-        except Exception as e:
+            req = parse_body(AiTextRequest, body)
+        except (ValueError, ValidationError) as e:
             raise HTTPException(status_code=400, detail=f"请求格式错误: {e}")
         if not req.text or not req.text.strip():
             raise HTTPException(status_code=400, detail="text 不能为空")
         lang = detect_language(req.text)
-        summary, optimized, lang_out = do_pipeline(
-            req.text, req.summarize, req.optimize, req.max_sentences, req.strategy, req.style, req.language, lang
+        args = (req.text, req.summarize, req.optimize, req.max_sentences, req.strategy, req.style, req.language, lang)
+        flight_key = request_key("text", req.text.encode("utf-8"), {"args": args[1:]})
+        summary, optimized, lang_out = await _until_disconnect(request, get_singleflight().do(
+            flight_key, lambda: _run_cancellable(run_text_pipeline, *args)
+        ))
+        return model_response(
+            AiResponse(text=req.text, summary=summary, optimized=optimized, language=lang_out), fields, exclude
         )
-        return AiResponse(text=req.text, summary=summary, optimized=optimized, language=lang_out)
 
     # multipart: 音频流程
     if "multipart/form-data" in content_type:
+        started = time.monotonic()
         form = await request.form()
         file = form.get("file")
         if not file:
             raise HTTPException(status_code=400, detail="请上传音频文件")
-        def get_bool(name: str, default: bool) -> bool:
-            v = form.get(name, None)
-            if v is None:
-                return default
-            return str(v).strip().lower() in ("1", "true", "yes", "on")
-        def get_int(name: str, default: int) -> int:
-            v = form.get(name, None)
-            try:
-                return int(v)
-            except Exception:
-                return default
-        summarize_flag = get_bool("summarize", True)
-        optimize_flag = get_bool("optimize", False)
-        max_sentences = get_int("max_sentences", 3)
-        strategy = (form.get("strategy") or "frequency").strip()
-        style = (form.get("style") or "concise").strip()
-        language = (form.get("language") or None)
-        initial_prompt = (form.get("initial_prompt") or None)
+        params = parse_audio_form(form)
 
         engine = get_stt_engine()
         if not engine.available:
             raise HTTPException(status_code=501, detail="STT 引擎不可用，请安装 faster-whisper 或 openai-whisper")
-        # 保存临时文件并转写
+        try:
+            key = engine.resolve_model(params["model"], params["compute_type"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # 保存临时文件并转写；相同内容与参数的在途请求合并
         filename = getattr(file, "filename", "audio.wav")
         suffix = os.path.splitext(filename)[1] or ".wav"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        content = await file.read()
+        flight_key = request_key("ai", content, {**params, "suffix": suffix, "model": tuple(key)})
         try:
-            try:
-                text, lang = engine.transcribe(tmp_path, language=language, initial_prompt=initial_prompt)
-                text = apply_corrections(text, lang or "en")
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"音频解析/转写失败: {e}")
-            summary, optimized, lang_out = do_pipeline(
-                text, summarize_flag, optimize_flag, max_sentences, strategy, style, language, lang
-            )
-            return AiResponse(text=text, summary=summary, optimized=optimized, language=lang_out, engine=engine.name)
-        finally:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
+            result = await _until_disconnect(request, get_singleflight().do(
+                flight_key,
+                lambda: _run_upload(request, content, suffix, key.name, run_audio_pipeline, **params, started=started),
+            ))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"音频解析/转写失败: {e}")
+        return model_response(AiResponse(**result), fields, exclude)
 
     # 不支持的 content type
     raise HTTPException(status_code=400, detail="不支持的 Content-Type，请用 application/json 或 multipart/form-data")
+
+
+@app.post("/v1/jobs", status_code=202, response_model=JobSubmitResponse, responses={400: {"model": ErrorResponse}, 501: {"model": ErrorResponse}})
+async def submit_job(request: Request):
+    """提交长音频异步处理：字段同 /v1/ai 音频流程，另可带 callback_url 接收完成通知。"""
+    form = await request.form()
+    file = form.get("file")
+    if not file or not hasattr(file, "read"):
+        raise HTTPException(status_code=400, detail="请上传音频文件")
+    params = parse_audio_form(form)
+    callback_url = (form.get("callback_url") or None)
+    if callback_url:
+        try:
+            await run_in_threadpool(check_callback_url, str(callback_url))  # 含 DNS 解析，不阻塞事件循环
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    engine = get_stt_engine()
+    if not engine.available:
+        raise HTTPException(status_code=501, detail="STT 引擎不可用，请安装 faster-whisper 或 openai-whisper")
+    try:
+        engine.resolve_model(params["model"], params["compute_type"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    manager = get_job_manager()
+    suffix = os.path.splitext(getattr(file, "filename", None) or "audio.wav")[1] or ".wav"
+    path = manager.new_audio_path(suffix)
+    # 分块落盘，避免整段音频驻留内存
+    with open(path, "wb") as out:
+        while True:
+            chunk = await file.read(1 << 20)
+            if not chunk:
+                break
+            out.write(chunk)
+    job_id = manager.submit(path, params, callback_url)
+    return JobSubmitResponse(job_id=job_id, status="queued")
+
+
+@app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse, responses={404: {"model": ErrorResponse}})
+def job_status(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return JobStatusResponse(
+        job_id=job["id"], status=job["status"], created_at=job["created_at"], updated_at=job["updated_at"],
+        result=job["result"], error=job["error"],
+    )
+
+
+@app.post("/v1/uploads", status_code=201, response_model=UploadStatusResponse,
+          responses={413: {"model": ErrorResponse}, 429: {"model": ErrorResponse}})
+def create_upload(req: UploadCreateRequest):
+    """创建可续传上传：之后用 PATCH /v1/uploads/{id}?offset=N 分块发送，完整后 finalize 转写。"""
+    try:
+        return UploadStatusResponse(**get_upload_store().create(req.length))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+
+
+@app.patch("/v1/uploads/{upload_id}", response_model=UploadStatusResponse,
+           responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0, description="本分块在文件中的起始字节")):
+    """请求体为原始字节，边接收边写入文件的 offset 处；offset 不得超过已接收的字节数。"""
+    store = get_upload_store()
+    # 加锁、stat 与写盘都是阻塞文件 I/O，放到线程池执行，不占用事件循环
+    if not await run_in_threadpool(store.claim, upload_id):
+        raise HTTPException(status_code=409, detail="该上传正在写入或转写中")
+    try:
+        writer = await run_in_threadpool(store.open_chunk, upload_id, offset)
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(writer.write, chunk)
+        except ClientDisconnect:
+            # 已到达的字节保留，客户端重连后 GET 查询 offset 续传
+            metrics.inc("uploads_interrupted")
+        except Exception:
+            # 请求体损坏（解压失败/超限）或写入被拒：整个分块作废，offset 不前进
+            writer.rollback()
+            raise
+        finally:
+            # 关闭文件与释放锁只是关闭描述符，不阻塞；在 finally 中同步执行，请求被取消时也一定释放
+            writer.close()
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    finally:
+        store.unclaim(upload_id)
+    status = await run_in_threadpool(store.get, upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传不存在或已过期")
+    return UploadStatusResponse(**status)
+
+
+@app.get("/v1/uploads/{upload_id}", response_model=UploadStatusResponse, responses={404: {"model": ErrorResponse}})
+def upload_status(upload_id: str):
+    status = get_upload_store().get(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传不存在或已过期")
+    return UploadStatusResponse(**status)
+
+
+@app.post("/v1/uploads/{upload_id}/finalize", response_model=STTResponse,
+          responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 409: {"model": ErrorResponse},
+                     501: {"model": ErrorResponse}})
+async def finalize_upload(
+    request: Request,
+    upload_id: str,
+    language: str | None = None,
+    initial_prompt: str | None = None,
+    model: str | None = None,
+    compute_type: str | None = None,
+    max_audio_s: float | None = Query(None, gt=0, description="只转写前 N 秒音频"),
+    deadline_s: float | None = Query(None, gt=0, description="从收到请求起的时间预算（秒），用尽时返回已转写部分"),
+    fields: str | None = None,
+    exclude: str | None = None,
+):
+    """转写已接收完整的上传，参数与响应同 /v1/stt；成功后删除上传，失败或断开时保留以便重试。"""
+    started = time.monotonic()
+    store = get_upload_store()
+    status = await run_in_threadpool(store.get, upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="上传不存在或已过期")
+    if not status["complete"]:
+        raise HTTPException(status_code=409, detail=f"上传未完成：已接收 {status['offset']}/{status['length']} 字节")
+    engine = get_stt_engine()
+    if not engine.available:
+        raise HTTPException(status_code=501, detail="STT 引擎不可用，请安装 faster-whisper 或 openai-whisper")
+    try:
+        key = engine.resolve_model(model, compute_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not await run_in_threadpool(store.claim, upload_id):
+        raise HTTPException(status_code=409, detail="该上传正在写入或转写中")
+    path = store.data_path(upload_id)
+    try:
+        tr = await _until_disconnect(request, _run_scheduled(
+            request, path, key.name, engine.transcribe_detailed, path,
+            language=language, initial_prompt=initial_prompt, model=model, compute_type=compute_type,
+            max_audio_s=max_audio_s, deadline=started + deadline_s if deadline_s else None,
+        ))
+        text = apply_corrections(tr.text, tr.language or "en")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"音频解析/转写失败: {e}")
+    finally:
+        store.unclaim(upload_id)
+    await run_in_threadpool(store.delete, upload_id)
+    metrics.inc("uploads_finalized")
+    return model_response(STTResponse(
+        text=text, language=tr.language, engine=engine.name, tier=tr.tier,
+        audio_seconds=tr.audio_seconds, trimmed_seconds=tr.trimmed_seconds,
+        partial=tr.partial, covered_range=list(tr.covered_range) if tr.covered_range else None,
+    ), fields, exclude)
+
+
+@app.delete("/v1/uploads/{upload_id}", status_code=204, responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+def delete_upload(upload_id: str):
+    store = get_upload_store()
+    if not store.claim(upload_id):
+        raise HTTPException(status_code=409, detail="该上传正在写入或转写中")
+    try:
+        if not store.delete(upload_id):
+            raise HTTPException(status_code=404, detail="上传不存在或已过期")
+    finally:
+        store.unclaim(upload_id)
+    return Response(status_code=204)
+
+
+@app.post("/v1/sessions", status_code=201, response_model=SessionResponse)
+def create_session(req: SessionCreateRequest | None = None):
+    """创建增量摘要会话；之后用 /v1/sessions/{id}/append 追加转写片段。"""
+    req = req or SessionCreateRequest()
+    session = get_session_store().create(req.max_sentences, req.strategy)
+    return SessionResponse(**session.view())
+
+
+@app.post("/v1/sessions/{session_id}/append", response_model=SessionResponse,
+          responses={404: {"model": ErrorResponse}, 413: {"model": ErrorResponse}})
+def append_session(session_id: str, req: SessionAppendRequest, fields: str | None = None, exclude: str | None = None):
+    try:
+        session = get_session_store().append(session_id, req.text, final=req.final)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在或已过期")
+    return model_response(SessionResponse(**session.view(req.max_sentences)), fields, exclude)
+
+
+@app.get("/v1/sessions/{session_id}", response_model=SessionResponse, responses={404: {"model": ErrorResponse}})
+def get_session(session_id: str, max_sentences: int | None = None, fields: str | None = None, exclude: str | None = None):
+    session = get_session_store().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在或已过期")
+    return model_response(SessionResponse(**session.view(max_sentences)), fields, exclude)
+
+
+@app.delete("/v1/sessions/{session_id}", status_code=204, responses={404: {"model": ErrorResponse}})
+def delete_session(session_id: str):
+    if not get_session_store().delete(session_id):
+        raise HTTPException(status_code=404, detail="会话不存在或已过期")
+    return Response(status_code=204)
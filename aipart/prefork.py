@@ -0,0 +1,304 @@
+"""
+预派生（pre-fork）多进程服务模式。
+
+父进程先加载只读共享资源（术语纠错表、停用词表，以及后端允许时的模型权重），
+再 fork 出 N 个 uvicorn 工作进程共享同一个监听 socket。子进程通过写时复制（COW）
+共享父进程已加载的内存页，避免每个 worker 各自加载一份。
+
+- 仅在支持 os.fork 的平台（Linux/macOS）可用；Windows 请使用单进程模式。
+- worker 处理满 N 个请求后优雅退出，父进程自动补充新 worker（仍从父进程 fork，继续共享）。
+- 父进程可按需输出每个 worker 的 RSS / 共享 / 私有内存报告（Linux 读取 /proc/<pid>/smaps_rollup）。
+- 向父进程发送 SIGHUP 会转发给所有 worker，各自热加载模型与配置；POST /admin/reload 只作用于处理该请求的 worker。
+"""
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+def _read_int(env: str, default: int) -> int:
+    try:
+        return int((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def _read_bool(env: str, default: bool) -> bool:
+    v = os.environ.get(env)
+    if v is None:
+        return default
+    return str(v).strip().lower() in ("1", "true", "yes", "on")
+
+
+def detect_worker_count() -> int:
+    """按可用 CPU 与每个 worker 的推理线程数估算 worker 数。
+
+    PREFORK_WORKERS 为正整数时直接使用；为 auto/空时自动探测：
+    可用核数 // 每 worker 线程数（FAST_WHISPER_CPU_THREADS，其次 OMP_NUM_THREADS，默认 1）。
+    """
+    raw = (os.environ.get("PREFORK_WORKERS") or "auto").strip().lower()
+    if raw not in ("", "auto", "0"):
+        try:
+            return max(1, int(raw))
+        except Exception:
+            pass
+    try:
+        cpus = len(os.sched_getaffinity(0))  # type: ignore[attr-defined]
+    except Exception:
+        cpus = os.cpu_count() or 1
+    threads = _read_int("FAST_WHISPER_CPU_THREADS", 0) or _read_int("OMP_NUM_THREADS", 0) or 1
+    return max(1, cpus // max(1, threads))
+
+
+def preload_shared_resources(preload_model: bool) -> None:
+    """在 fork 之前加载只读资源，使其被所有 worker 以 COW 方式共享。"""
+    from .services.stt import get_stt_engine
+    from .services.text_utils import load_corrections
+
+    # 停用词表、正则在导入时即已构建；纠错表为惰性加载，这里提前读取
+    load_corrections()
+    engine = get_stt_engine()
+    if preload_model and engine.available:
+        # faster-whisper（CTranslate2）加载模型时会创建线程池，fork 后线程不会被继承，
+        # 因此默认不在父进程加载；确认后端可安全 fork 时再开启 PREFORK_PRELOAD_MODEL
+        ok = engine.warm_up()
+        log.info("preloaded model in parent: engine=%s, ok=%s", engine.name, ok)
+    # 冻结当前所有对象，避免子进程的 GC 扫描改写引用计数页导致 COW 失效
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+
+def _smaps_rollup(pid: int) -> Optional[Dict[str, int]]:
+    path = f"/proc/{pid}/smaps_rollup"
+    try:
+        with open(path, "r", encoding="ascii") as f:
+            return _parse_smaps_rollup(f.read())
+    except Exception:
+        return None
+
+
+def _parse_smaps_rollup(text: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+            out[parts[0][:-1]] = int(parts[1])  # kB
+    return out
+
+
+def memory_report(pids: List[int]) -> List[Dict[str, float]]:
+    """返回每个进程的 RSS / PSS / 共享 / 私有内存（MB）。不支持的平台返回空列表。"""
+    rows: List[Dict[str, float]] = []
+    for pid in pids:
+        m = _smaps_rollup(pid)
+        if not m:
+            continue
+        shared = m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0)
+        private = m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)
+        rows.append({
+            "pid": pid,
+            "rss_mb": round(m.get("Rss", 0) / 1024, 1),
+            "pss_mb": round(m.get("Pss", 0) / 1024, 1),
+            "shared_mb": round(shared / 1024, 1),
+            "private_mb": round(private / 1024, 1),
+        })
+    return rows
+
+
+def _log_report(parent: int, workers: List[int]) -> None:
+    rows = memory_report([parent] + workers)
+    if not rows:
+        log.info("memory report unavailable on this platform")
+        return
+    for r in rows:
+        role = "master" if r["pid"] == parent else "worker"
+        log.info("memory", extra={"fields": {"role": role, **r}})
+    total_pss = sum(r["pss_mb"] for r in rows)
+    total_rss = sum(r["rss_mb"] for r in rows)
+    # pss 为按共享比例折算后的真实占用
+    log.info("memory total", extra={"fields": {"rss_mb": round(total_rss, 1), "pss_mb": round(total_pss, 1)}})
+
+
+def _flush_logs() -> None:
+    # 日志由后台线程异步写出；进程退出前停止监听线程，把队列中剩余的记录写完
+    from .services import logs
+    logs.shutdown_logging()
+
+
+class PreforkServer:
+    """父进程：绑定 socket、预加载资源、派生并看护 worker。"""
+
+    def __init__(
+        self,
+        app_path: str = "aipart.app:app",
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        workers: Optional[int] = None,
+        max_requests: int = 0,
+        preload_model: bool = False,
+        report_interval: float = 0.0,
+    ) -> None:
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = workers or detect_worker_count()
+        self.max_requests = max(0, max_requests)
+        self.preload_model = preload_model
+        self.report_interval = report_interval
+        self._children: Dict[int, int] = {}  # pid -> slot
+        self._stopping = False
+        self._report_pending = False
+        self._reload_pending = False
+        self._sock: Optional[socket.socket] = None
+        self._app = None
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _load_app(self):
+        import importlib
+        module_name, _, attr = self.app_path.partition(":")
+        module = importlib.import_module(module_name)
+        return getattr(module, attr or "app")
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                log.exception("worker crashed")
+                code = 1
+            finally:
+                _flush_logs()
+                os._exit(code)
+        self._children[pid] = slot
+
+    def _run_worker(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_DFL)
+        # 应用启动时会安装自己的 SIGHUP 处理（热加载）；在此之前收到的 SIGHUP 忽略，不能按默认行为退出
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        random.seed()
+        limit = None
+        if self.max_requests:
+            # 加入抖动，避免所有 worker 同时回收
+            limit = self.max_requests + random.randint(0, max(1, self.max_requests // 10))
+        self._serve(limit)
+
+    def _serve(self, limit: Optional[int]) -> None:
+        import uvicorn
+        config = uvicorn.Config(self._app, limit_max_requests=limit, log_level="info")
+        server = uvicorn.Server(config)
+        server.run(sockets=[self._sock])
+
+    def _on_term(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_usr1(self, signum, frame) -> None:
+        self._report_pending = True
+
+    def _on_hup(self, signum, frame) -> None:
+        self._reload_pending = True
+
+    def _signal_workers(self, sig: int) -> None:
+        for pid in list(self._children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        if not hasattr(os, "fork"):
+            raise RuntimeError("prefork mode requires os.fork (not available on this platform)")
+        self._sock = self._bind()
+        self._app = self._load_app()
+        preload_shared_resources(self.preload_model)
+        signal.signal(signal.SIGTERM, self._on_term)
+        signal.signal(signal.SIGINT, self._on_term)
+        signal.signal(signal.SIGUSR1, self._on_usr1)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        log.info(
+            "master pid=%s listening on %s:%s, workers=%s, max_requests=%s",
+            os.getpid(), self.host, self.port, self.workers, self.max_requests or "unlimited",
+        )
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        next_report = time.monotonic() + self.report_interval if self.report_interval > 0 else None
+        while not self._stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            if pid:
+                slot = self._children.pop(pid, None)
+                if slot is not None and not self._stopping:
+                    # 达到请求上限或异常退出：补充 worker
+                    code = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+                    log.warning("worker pid=%s exited (code=%s), respawning slot %s", pid, code, slot)
+                    self._spawn(slot)
+                continue
+            if self._reload_pending:
+                # 每个 worker 各有一份模型，热加载需逐个通知
+                self._reload_pending = False
+                log.info("forwarding SIGHUP to %d workers", len(self._children))
+                self._signal_workers(signal.SIGHUP)
+            now = time.monotonic()
+            if self._report_pending or (next_report is not None and now >= next_report):
+                self._report_pending = False
+                _log_report(os.getpid(), list(self._children))
+                if next_report is not None:
+                    next_report = now + self.report_interval
+            time.sleep(0.2)
+
+        log.info("shutting down workers")
+        self._signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + 30
+        while self._children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        self._signal_workers(signal.SIGKILL)
+        self._sock.close()
+        _flush_logs()
+        return 0
+
+
+def serve_from_env(host: str = "0.0.0.0", port: int = 8080) -> int:
+    """按环境变量启动预派生模式（见 README「多进程预派生模式」）。"""
+    try:
+        interval = float((os.environ.get("PREFORK_REPORT_INTERVAL") or "0").strip())
+    except Exception:
+        interval = 0.0
+    server = PreforkServer(
+        host=host,
+        port=port,
+        max_requests=_read_int("PREFORK_MAX_REQUESTS", 0),
+        preload_model=_read_bool("PREFORK_PRELOAD_MODEL", False),
+        report_interval=interval,
+    )
+    return server.run()
+
+
+if __name__ == "__main__":
+    sys.exit(serve_from_env())
@@ -0,0 +1,179 @@
+"""
+负载自适应解码策略：根据排队中的工作量与近期实时率（RTF，解码耗时 / 音频时长）
+在高负载时逐级降低解码开销，负载回落后再逐级恢复，以保护延迟目标。
+
+档位（由高到低）：
+- full：使用环境变量配置的解码参数
+- reduced：beam_size / best_of 降为 2
+- greedy：贪心解码（beam=1），关闭温度回退
+- greedy-small：贪心解码 + 切换到更小的模型（STT_ADAPTIVE_SMALL_MODEL，默认 tiny）
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from .scheduler import get_scheduler
+
+
+class Tier(NamedTuple):
+    name: str
+    opts: Dict[str, Any]
+    small_model: bool = False
+
+
+TIERS: List[Tier] = [
+    Tier("full", {}),
+    Tier("reduced", {"beam_size": 2, "best_of": 2}),
+    Tier("greedy", {"beam_size": 1, "best_of": 1, "temperature": 0.0}),
+    Tier("greedy-small", {"beam_size": 1, "best_of": 1, "temperature": 0.0}, small_model=True),
+]
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def scheduler_backlog() -> float:
+    """调度器中排队等待的工作量（按 base 模型折算的音频秒数），按执行槽位平均分摊。"""
+    cap = get_scheduler().capacity()
+    return cap["queued_cost"] / max(1, cap["slots"])
+
+
+class AdaptivePolicy:
+    """
+    估算新请求的延迟 ≈ 排队等待 + 自身解码：
+    EWMA(RTF) × 排队工作量（每个执行槽位分摊的音频秒数，由 backlog() 提供）
+    + EWMA(RTF) × EWMA(音频时长) × 当前在途请求数。
+    在途请求数受执行槽位限制，只看它无法反映排队深度，因此降档信号以实际排队的工作量为准。
+    超过目标即降一档，低于目标的 low_ratio 倍时升一档。两次调整之间至少间隔 cooldown_s，避免抖动。
+    """
+
+    def __init__(
+        self,
+        latency_target_s: float = 30.0,
+        enabled: bool = True,
+        cooldown_s: float = 5.0,
+        low_ratio: float = 0.5,
+        alpha: float = 0.2,
+        backlog: Optional[Callable[[], float]] = None,
+    ) -> None:
+        self.latency_target_s = latency_target_s
+        self.enabled = enabled
+        self.cooldown_s = cooldown_s
+        self.low_ratio = low_ratio
+        self.alpha = alpha
+        self.backlog = backlog  # () -> 排队中、每个槽位分摊的音频秒数
+        self._lock = threading.Lock()
+        self._level = 0
+        self._inflight = 0
+        self._last_change = 0.0
+        self._ewma_rtf: Optional[float] = None
+        self._ewma_audio_s: Optional[float] = None
+        self._ewma_latency_s: Optional[float] = None
+        self._served: Dict[str, int] = {t.name: 0 for t in TIERS}
+        self._changes = 0
+
+    @classmethod
+    def from_env(cls) -> "AdaptivePolicy":
+        v = (os.environ.get("STT_ADAPTIVE") or "1").strip().lower()
+        return cls(
+            latency_target_s=_env_float("STT_LATENCY_TARGET_S", 30.0),
+            enabled=v in ("1", "true", "yes", "on"),
+            cooldown_s=_env_float("STT_ADAPTIVE_COOLDOWN_S", 5.0),
+            backlog=scheduler_backlog,
+        )
+
+    def queued_work_s(self) -> float:
+        if self.backlog is None:
+            return 0.0
+        try:
+            return max(0.0, float(self.backlog()))
+        except Exception:
+            return 0.0
+
+    def projected_latency(self, inflight: Optional[int] = None, queued_s: Optional[float] = None) -> Optional[float]:
+        if self._ewma_rtf is None or self._ewma_audio_s is None:
+            return None
+        n = self._inflight if inflight is None else inflight
+        q = self.queued_work_s() if queued_s is None else queued_s
+        return self._ewma_rtf * (q + self._ewma_audio_s * max(1, n))
+
+    def _adjust(self, now: float, queued_s: float) -> None:
+        # 调用方持有锁；queued_s 在加锁前取得，避免持锁时再去拿调度器的锁
+        if now - self._last_change < self.cooldown_s:
+            return
+        projected = self.projected_latency(queued_s=queued_s)
+        if projected is None:
+            return
+        if projected > self.latency_target_s and self._level < len(TIERS) - 1:
+            self._level += 1
+        elif projected < self.latency_target_s * self.low_ratio and self._level > 0:
+            self._level -= 1
+        else:
+            return
+        self._last_change = now
+        self._changes += 1
+
+    def acquire(self) -> Tier:
+        """请求开始解码前调用，返回本次应使用的档位。"""
+        queued_s = self.queued_work_s() if self.enabled else 0.0
+        with self._lock:
+            self._inflight += 1
+            if not self.enabled:
+                return TIERS[0]
+            self._adjust(time.monotonic(), queued_s)
+            return TIERS[self._level]
+
+    def release(self, tier: Tier, wall_s: float, audio_s: Optional[float]) -> None:
+        """请求结束后调用，更新在途数与 EWMA 统计。"""
+        queued_s = self.queued_work_s() if self.enabled else 0.0
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            self._served[tier.name] = self._served.get(tier.name, 0) + 1
+            a = self.alpha
+            self._ewma_latency_s = wall_s if self._ewma_latency_s is None else (1 - a) * self._ewma_latency_s + a * wall_s
+            if audio_s and audio_s > 0:
+                rtf = wall_s / audio_s
+                self._ewma_rtf = rtf if self._ewma_rtf is None else (1 - a) * self._ewma_rtf + a * rtf
+                self._ewma_audio_s = audio_s if self._ewma_audio_s is None else (1 - a) * self._ewma_audio_s + a * audio_s
+            if self.enabled:
+                self._adjust(time.monotonic(), queued_s)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def ewma_latency_s(self) -> Optional[float]:
+        return self._ewma_latency_s
+
+    def stats(self) -> Dict[str, Any]:
+        queued_s = self.queued_work_s()
+        with self._lock:
+            projected = self.projected_latency(queued_s=queued_s)
+            return {
+                "enabled": self.enabled,
+                "tier": TIERS[self._level].name,
+                "latency_target_s": self.latency_target_s,
+                "inflight": self._inflight,
+                "queued_work_s": round(queued_s, 3),
+                "ewma_rtf": None if self._ewma_rtf is None else round(self._ewma_rtf, 4),
+                "ewma_latency_s": None if self._ewma_latency_s is None else round(self._ewma_latency_s, 3),
+                "projected_latency_s": None if projected is None else round(projected, 3),
+                "tier_changes": self._changes,
+                "served": dict(self._served),
+            }
+
+
+_policy_singleton: Optional[AdaptivePolicy] = None
+
+
+def get_policy() -> AdaptivePolicy:
+    global _policy_singleton
+    if _policy_singleton is None:
+        _policy_singleton = AdaptivePolicy.from_env()
+    return _policy_singleton
@@ -0,0 +1,244 @@
+"""
+音频预处理（NumPy 向量化）：在送入模型前完成
+- 解码 PCM WAV（8/16/24/32-bit，任意声道/采样率），按块读取以控制内存；
+- FLAC / Ogg Vorbis / Opus 等压缩格式：装有 soundfile 时同样按块解码，否则用 faster-whisper 自带的解码器；
+- 下混为单声道并重采样到 16 kHz（流式线性插值，降采样前做滑动平均抗混叠）；
+- 按帧能量门限（可选 Silero VAD）裁掉首尾静音；整段无有效语音时标记为 silent，调用方可直接返回空结果。
+
+无法解码的格式返回 None，调用方应回退为把原始文件交给模型自行解码。
+"""
+import os
+import wave
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+TARGET_SR = 16000
+_BLOCK_FRAMES = 1 << 18  # 每次读取的帧数（约 5~16 秒）
+
+
+@dataclass
+class PreparedAudio:
+    samples: np.ndarray  # float32, 16 kHz, mono，已裁剪
+    original_seconds: float  # 原始时长
+    offset_seconds: float  # 裁剪后首个样本在原始音频中的位置
+    trimmed_seconds: float  # 裁掉的首尾静音总时长
+    silent: bool  # 整段无有效语音
+
+    @property
+    def seconds(self) -> float:
+        return len(self.samples) / TARGET_SR
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def _env_bool(env: str, default: bool) -> bool:
+    v = os.environ.get(env)
+    if v is None:
+        return default
+    return str(v).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _pcm_to_float(raw: bytes, sampwidth: int, channels: int) -> np.ndarray:
+    """PCM 字节 → float32 单声道（[-1, 1]）。"""
+    if sampwidth == 1:
+        x = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sampwidth == 2:
+        x = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif sampwidth == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        v = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        v = np.where(v >= 1 << 23, v - (1 << 24), v)
+        x = v.astype(np.float32) / float(1 << 23)
+    elif sampwidth == 4:
+        x = np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"unsupported sample width: {sampwidth}")
+    if channels > 1:
+        x = x.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return x
+
+
+def _wav_blocks(path: str) -> Optional[Tuple[int, int, Iterator[np.ndarray]]]:
+    """返回 (采样率, 总帧数, 单声道块迭代器)；非 PCM WAV 返回 None。"""
+    try:
+        wf = wave.open(path, "rb")
+    except Exception:
+        return None
+    sr, nframes = wf.getframerate(), wf.getnframes()
+    sampwidth, channels = wf.getsampwidth(), wf.getnchannels()
+    if sr <= 0 or sampwidth not in (1, 2, 3, 4):
+        wf.close()
+        return None
+
+    def gen() -> Iterator[np.ndarray]:
+        try:
+            while True:
+                raw = wf.readframes(_BLOCK_FRAMES)
+                if not raw:
+                    break
+                yield _pcm_to_float(raw, sampwidth, channels)
+        finally:
+            wf.close()
+
+    return sr, nframes, gen()
+
+
+def _compressed_blocks(path: str) -> Optional[Tuple[int, int, Iterator[np.ndarray]]]:
+    """压缩格式：优先 soundfile（libsndfile）按块解码；否则用 faster-whisper 的 decode_audio 一次解码为 16 kHz。"""
+    try:
+        import soundfile as sf  # type: ignore
+    except Exception:  # 可选依赖
+        sf = None
+    if sf is not None:
+        try:
+            f = sf.SoundFile(path)
+        except Exception:
+            f = None
+        if f is not None:
+            sr, nframes, channels = f.samplerate, f.frames, f.channels
+
+            def gen() -> Iterator[np.ndarray]:
+                try:
+                    for blk in f.blocks(blocksize=_BLOCK_FRAMES, dtype="float32", always_2d=True):
+                        yield blk.mean(axis=1, dtype=np.float32) if channels > 1 else blk[:, 0]
+                finally:
+                    f.close()
+
+            return sr, nframes, gen()
+    try:
+        from faster_whisper import decode_audio  # type: ignore
+    except Exception:
+        return None
+    try:
+        x = decode_audio(path, sampling_rate=TARGET_SR)
+    except Exception:
+        return None
+    return TARGET_SR, len(x), iter([np.asarray(x, dtype=np.float32)])
+
+
+class StreamResampler:
+    """有状态的流式重采样器：线性插值，降采样前做滑动平均抗混叠。
+
+    跨块所需的状态（滤波历史、插值尾部样本、下一个输出样本的位置）保存在实例中，
+    因此任意切分输入得到的输出与一次性处理整段完全相同，块边界处没有样本数误差或不连续。
+    """
+
+    def __init__(self, sr: int, target: int = TARGET_SR) -> None:
+        self.sr = sr
+        self.target = target
+        self.step = sr / target  # 每个输出样本对应的输入样本数
+        width = int(round(self.step)) if self.step > 1.5 else 1
+        self._width = width
+        self._kernel = np.full(width, 1.0 / width, dtype=np.float32) if width > 1 else None
+        self._hist = np.zeros(width - 1, dtype=np.float32)  # 抗混叠滤波所需历史
+        self._carry = np.zeros(0, dtype=np.float32)  # 插值所需的尾部样本
+        self._base = 0  # carry[0] 在全局输入中的下标
+        self._next_out = 0  # 下一个输出样本的全局下标
+
+    def push(self, blk: np.ndarray) -> np.ndarray:
+        """输入一块样本，返回目前已能确定的输出样本（可能为空）。"""
+        blk = blk.astype(np.float32, copy=False)
+        if self.sr == self.target:
+            return blk
+        if self._kernel is not None:
+            joined = np.concatenate((self._hist, blk))
+            filtered = np.convolve(joined, self._kernel, mode="valid").astype(np.float32)
+            self._hist = joined[-(self._width - 1):]
+        else:
+            filtered = blk
+        buf = np.concatenate((self._carry, filtered))
+        last = self._base + len(buf) - 1  # 可用的最大全局下标
+        n = int(np.floor(last / self.step)) - self._next_out + 1
+        out = np.zeros(0, dtype=np.float32)
+        if n > 0:
+            pos = (self._next_out + np.arange(n, dtype=np.float64)) * self.step - self._base
+            out = np.interp(pos, np.arange(len(buf), dtype=np.float64), buf).astype(np.float32)
+            self._next_out += n
+        keep_from = min(len(buf), max(0, int(np.floor(self._next_out * self.step)) - self._base))
+        self._carry = buf[keep_from:]
+        self._base += keep_from
+        return out
+
+
+def resample_stream(blocks: Iterator[np.ndarray], sr: int, target: int = TARGET_SR) -> np.ndarray:
+    """流式重采样：逐块送入 StreamResampler，仅保留跨块所需的少量历史样本。"""
+    rs = StreamResampler(sr, target)
+    parts = [rs.push(blk) for blk in blocks]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def frame_db(x: np.ndarray, frame: int) -> np.ndarray:
+    """逐帧 RMS（dBFS）。"""
+    n = len(x) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    f = x[: n * frame].reshape(n, frame)
+    rms = np.sqrt(np.einsum("ij,ij->i", f, f) / frame)
+    return 20 * np.log10(rms + 1e-10)
+
+
+def _vad_bounds(x: np.ndarray) -> Optional[Tuple[int, int]]:
+    """使用 faster-whisper 自带的 Silero VAD 求语音起止；不可用时返回 None。"""
+    try:
+        from faster_whisper.vad import get_speech_timestamps  # type: ignore
+    except Exception:
+        return None
+    try:
+        ts = get_speech_timestamps(x)
+    except Exception:
+        return None
+    if not ts:
+        return (0, 0)
+    return int(ts[0]["start"]), int(ts[-1]["end"])
+
+
+def speech_bounds(x: np.ndarray, sr: int = TARGET_SR) -> Tuple[int, int]:
+    """返回语音区间 [start, end)（样本下标）；无语音时 start == end。"""
+    threshold = _env_float("AUDIO_PREP_SILENCE_DB", -45.0)
+    min_voiced = _env_float("AUDIO_PREP_MIN_VOICED_S", 0.1)
+    pad = int(_env_float("AUDIO_PREP_PAD_S", 0.25) * sr)
+    frame = int(0.03 * sr)
+    db = frame_db(x, frame)
+    voiced = np.flatnonzero(db > threshold)
+    if len(voiced) * frame / sr < min_voiced:
+        return 0, 0
+    start, end = int(voiced[0]) * frame, min(len(x), (int(voiced[-1]) + 1) * frame)
+    if _env_bool("AUDIO_PREP_VAD", False):
+        vb = _vad_bounds(x[start:end])
+        if vb is not None:
+            if vb[0] >= vb[1]:
+                return 0, 0
+            start, end = start + vb[0], start + vb[1]
+    return max(0, start - pad), min(len(x), end + pad)
+
+
+def load_audio(path: str) -> Optional[Tuple[np.ndarray, float]]:
+    """解码为 16 kHz 单声道 float32，返回 (样本, 原始时长秒)；不支持的格式返回 None。"""
+    opened = _wav_blocks(path) or _compressed_blocks(path)
+    if opened is None:
+        return None
+    sr, nframes, blocks = opened
+    samples = resample_stream(blocks, sr, TARGET_SR)
+    return samples, nframes / float(sr)
+
+
+def prepare_audio(path: str) -> Optional[PreparedAudio]:
+    """完整预处理流程；AUDIO_PREP=0 或格式不支持时返回 None。"""
+    if not _env_bool("AUDIO_PREP", True):
+        return None
+    loaded = load_audio(path)
+    if loaded is None:
+        return None
+    samples, original = loaded
+    start, end = speech_bounds(samples)
+    if start >= end:
+        return PreparedAudio(np.zeros(0, dtype=np.float32), original, 0.0, original, True)
+    kept = (end - start) / TARGET_SR
+    return PreparedAudio(samples[start:end], original, start / TARGET_SR, max(0.0, original - kept), False)
@@ -0,0 +1,376 @@
+"""
+faster-whisper 启动自动调优：用自带的校准音频实测不同的计算精度 / cpu_threads / num_workers / beam_size，
+按并发吞吐选出最优配置，按主机指纹持久化，下次启动自动应用。
+
+- 搜索按坐标下降进行（依次调精度 → 线程数 → worker 数 → beam），每个维度固定其余维度取当前最优，
+  约 10 次试验而非全组合；
+- 每次试验：加载模型、预热一次，测单路实时率 RTF（中位数）与 AUTOTUNE_CONCURRENCY 路并发下的吞吐
+  （每秒处理的音频秒数）；吞吐需比当前最优高出 AUTOTUNE_MIN_GAIN_PCT（默认 5%）才替换，避免被噪声左右；
+- 精度保护：以 float32 + 配置的 beam 的转写为基准，结果文本不一致的候选不会被选中；
+- 结果写入 AUTOTUNE_FILE（默认 ./var/autotune.json），键为主机指纹（CPU 型号/核数/内存/引擎版本）+ 模型/设备；
+- STT_AUTOTUNE：off 不使用；apply（默认）有已保存结果时应用；startup 无结果时在后台调优并热加载。
+  显式设置的环境变量/STT_CONFIG_FILE 优先于调优结果。
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .audio_prep import TARGET_SR, load_audio
+
+log = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CLIP = os.path.join(ROOT, "data", "nihao.wav")
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+# 调优结果对应的环境变量
+_KEYS = {
+    "compute_type": "FAST_WHISPER_COMPUTE",
+    "cpu_threads": "FAST_WHISPER_CPU_THREADS",
+    "num_workers": "FAST_WHISPER_NUM_WORKERS",
+    "beam_size": "FAST_WHISPER_BEAM_SIZE",
+}
+
+LoadFn = Callable[[str, str, str, int, int], Any]  # (model, device, compute_type, cpu_threads, num_workers) -> model
+TranscribeFn = Callable[[Any, np.ndarray, int], str]  # (model, samples, beam_size) -> text
+
+
+def _env_int(env: str, default: int) -> int:
+    try:
+        return int((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def mode() -> str:
+    return (os.environ.get("STT_AUTOTUNE") or "apply").strip().lower()
+
+
+def results_path() -> str:
+    return os.environ.get("AUTOTUNE_FILE") or os.path.join(ROOT, "var", "autotune.json")
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.lower().startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _mem_gb() -> Optional[float]:
+    try:
+        return round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2 ** 30, 1)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _engine_version() -> Optional[str]:
+    try:
+        import ctranslate2  # type: ignore
+        return ctranslate2.__version__
+    except Exception:
+        return None
+
+
+def host_fingerprint() -> Tuple[str, Dict[str, Any]]:
+    """返回 (指纹哈希, 指纹内容)。CPU、核数、内存或推理引擎版本变化都会使已保存的结果失效。"""
+    info = {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "mem_gb": _mem_gb(),
+        "ctranslate2": _engine_version(),
+    }
+    digest = hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:16]
+    return digest, info
+
+
+def _result_key(model: str, device: str) -> str:
+    return f"{model}/{device}"
+
+
+def load_results(path: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        with open(path or results_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_result(result: Dict[str, Any], path: Optional[str] = None) -> str:
+    path = path or results_path()
+    data = load_results(path)
+    host, info = host_fingerprint()
+    entry = data.setdefault(host, {"host": info, "results": {}})
+    entry["host"] = info
+    entry["results"][_result_key(result["model"], result["device"])] = result
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def saved_result(model: str, device: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    host, _ = host_fingerprint()
+    return ((load_results(path).get(host) or {}).get("results") or {}).get(_result_key(model, device))
+
+
+def _default_model(cfg: Mapping[str, str]) -> Tuple[str, str]:
+    return (
+        (cfg.get("FAST_WHISPER_MODEL") or "base").strip(),
+        (cfg.get("FAST_WHISPER_DEVICE") or "cpu").strip(),
+    )
+
+
+def tuned_overrides(cfg: Mapping[str, str]) -> Dict[str, str]:
+    """已保存的调优结果对应的环境变量（不覆盖 cfg 中已显式设置的键）；未启用或无结果时为空。"""
+    if mode() == "off":
+        return {}
+    model, device = _default_model(cfg)
+    result = saved_result(model, device)
+    if not result:
+        return {}
+    out = {}
+    for field, env in _KEYS.items():
+        if env not in cfg and field in result.get("config", {}):
+            out[env] = str(result["config"][field])
+    return out
+
+
+def _normalize(text: str) -> str:
+    return "".join(ch for ch in (text or "").lower() if ch.isalnum())
+
+
+def _fw_load(model: str, device: str, compute_type: str, cpu_threads: int, num_workers: int) -> Any:
+    from faster_whisper import WhisperModel  # type: ignore
+    return WhisperModel(model, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+def _fw_transcribe(model: Any, samples: np.ndarray, beam_size: int) -> str:
+    segments, _ = model.transcribe(samples, beam_size=beam_size, best_of=beam_size, vad_filter=False, temperature=0.0)
+    return "".join(seg.text for seg in segments)
+
+
+class AutoTuner:
+    def __init__(
+        self,
+        model: str = "base",
+        device: str = "cpu",
+        clip: str = DEFAULT_CLIP,
+        concurrency: int = 2,
+        repeats: int = 3,
+        beam_sizes: Tuple[int, ...] = (1, 2, 5),
+        baseline_beam: int = 5,
+        min_gain: float = 0.05,
+        load: LoadFn = _fw_load,
+        transcribe: TranscribeFn = _fw_transcribe,
+        log: Callable[[str], None] = log.info,
+    ) -> None:
+        self.model = model
+        self.device = device
+        self.clip = clip
+        self.concurrency = max(1, concurrency)
+        self.repeats = max(1, repeats)
+        self.beam_sizes = beam_sizes
+        self.baseline_beam = baseline_beam
+        self.min_gain = min_gain
+        self.load = load
+        self.transcribe = transcribe
+        self.log = log
+        self.trials: List[Dict[str, Any]] = []
+        self._cache: Dict[Tuple[str, int, int, int], Dict[str, Any]] = {}
+
+    @classmethod
+    def from_env(cls, cfg: Optional[Mapping[str, str]] = None, **kw: Any) -> "AutoTuner":
+        cfg = os.environ if cfg is None else cfg
+        model, device = _default_model(cfg)
+        beams = tuple(int(b) for b in (os.environ.get("AUTOTUNE_BEAM_SIZES") or "1,2,5").split(",") if b.strip())
+        return cls(
+            model=model,
+            device=device,
+            clip=os.environ.get("AUTOTUNE_CLIP") or DEFAULT_CLIP,
+            concurrency=_env_int("AUTOTUNE_CONCURRENCY", max(2, _env_int("STT_CONCURRENCY", 2))),
+            repeats=_env_int("AUTOTUNE_REPEATS", 3),
+            beam_sizes=beams or (5,),
+            baseline_beam=int(cfg.get("FAST_WHISPER_BEAM_SIZE") or 5),
+            min_gain=_env_int("AUTOTUNE_MIN_GAIN_PCT", 5) / 100.0,
+            **kw,
+        )
+
+    def thread_options(self) -> List[int]:
+        n = os.cpu_count() or 1
+        per_stream = max(1, n // self.concurrency)
+        return sorted({max(1, n // 4), per_stream, n})
+
+    def _measure(self, samples: np.ndarray, config: Dict[str, Any]) -> Dict[str, Any]:
+        key = (config["compute_type"], config["cpu_threads"], config["num_workers"])
+        beam = config["beam_size"]
+        cached = self._cache.get(key + (beam,))
+        if cached is not None:
+            return cached
+        audio_s = len(samples) / TARGET_SR
+        trial: Dict[str, Any] = {"config": dict(config)}
+        try:
+            t0 = time.perf_counter()
+            m = self.load(self.model, self.device, config["compute_type"], config["cpu_threads"], config["num_workers"])
+            trial["load_s"] = round(time.perf_counter() - t0, 3)
+            text = self.transcribe(m, samples, beam)  # 预热
+            times = []
+            for _ in range(self.repeats):
+                t0 = time.perf_counter()
+                self.transcribe(m, samples, beam)
+                times.append(time.perf_counter() - t0)
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                t0 = time.perf_counter()
+                list(pool.map(lambda _: self.transcribe(m, samples, beam), range(self.concurrency * self.repeats)))
+                wall = time.perf_counter() - t0
+            del m
+            trial.update(
+                text=text,
+                rtf=round(statistics.median(times) / audio_s, 4),
+                throughput=round(self.concurrency * self.repeats * audio_s / wall, 3),
+            )
+        except Exception as e:  # 不支持的精度等：记录并跳过
+            trial["error"] = str(e)
+        self.trials.append(trial)
+        self._cache[key + (beam,)] = trial
+        self.log(f"[autotune] {config} -> " + (
+            f"rtf={trial['rtf']} throughput={trial['throughput']}x" if "error" not in trial else f"error: {trial['error']}"
+        ))
+        return trial
+
+    def _better(self, a: Dict[str, Any], b: Optional[Dict[str, Any]], reference: Optional[str]) -> bool:
+        if "error" in a or (reference is not None and _normalize(a["text"]) != reference):
+            return False
+        if b is None:
+            return True
+        # 吞吐提升不足 min_gain 视为测量噪声，保留先前（更保守）的配置
+        return a["throughput"] > b["throughput"] * (1 + self.min_gain)
+
+    def run(self) -> Dict[str, Any]:
+        loaded = load_audio(self.clip)
+        if loaded is None:
+            raise RuntimeError(f"无法解码校准音频: {self.clip}")
+        samples = loaded[0]
+        started = time.time()
+        t0 = time.perf_counter()
+        current = {"compute_type": "float32", "cpu_threads": 0, "num_workers": 1, "beam_size": self.baseline_beam}
+        baseline = self._measure(samples, current)
+        reference = _normalize(baseline["text"]) if "error" not in baseline else None
+        best: Optional[Dict[str, Any]] = baseline if "error" not in baseline else None
+        dims = (
+            ("compute_type", COMPUTE_TYPES),
+            ("cpu_threads", self.thread_options()),
+            ("num_workers", tuple(sorted({1, self.concurrency}))),
+            ("beam_size", self.beam_sizes),
+        )
+        for field, options in dims:
+            for value in options:
+                cand = dict(best["config"] if best else current, **{field: value})
+                trial = self._measure(samples, cand)
+                if trial is not best and self._better(trial, best, reference):
+                    best = trial
+        if best is None:
+            raise RuntimeError("所有候选配置均失败")
+        host, info = host_fingerprint()
+        return {
+            "model": self.model,
+            "device": self.device,
+            "host": host,
+            "config": best["config"],
+            "rtf": best["rtf"],
+            "throughput": best["throughput"],
+            "baseline": {"rtf": baseline.get("rtf"), "throughput": baseline.get("throughput")},
+            "concurrency": self.concurrency,
+            "clip": os.path.basename(self.clip),
+            "tuned_at": started,
+            "elapsed_s": round(time.perf_counter() - t0, 2),
+            "trials": [{k: v for k, v in t.items() if k != "text"} for t in self.trials],
+        }
+
+
+class AutotuneRunner:
+    """后台执行调优（同一时间一个），完成后保存结果并触发热加载应用。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.running = False
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def trigger(self, apply: bool = True) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+            self._thread = threading.Thread(target=self._run, args=(apply,), name="stt-autotune", daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+
+    def _run(self, apply: bool) -> None:
+        from .hot_reload import get_reload_manager, load_config
+        try:
+            # 各候选配置的结果默认走服务日志（见 logs.py）
+            result = AutoTuner.from_env(load_config(include_tuned=False)).run()
+            path = save_result(result)
+            log.info("best %s (throughput %sx), saved to %s", result["config"], result["throughput"], path)
+            with self._lock:
+                self.last_result, self.last_error = result, None
+        except Exception as e:
+            log.warning("autotune failed: %s", e)
+            with self._lock:
+                self.last_error = str(e)
+            apply = False
+        finally:
+            with self._lock:
+                self.running = False
+        if apply and mode() != "off":
+            manager = get_reload_manager()
+            manager.wait()
+            manager.trigger()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            result = self.last_result
+            return {
+                "running": self.running,
+                "last_error": self.last_error,
+                "config": result["config"] if result else None,
+                "rtf": result["rtf"] if result else None,
+                "throughput": result["throughput"] if result else None,
+                "baseline": result["baseline"] if result else None,
+            }
+
+
+_runner_singleton: Optional[AutotuneRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_autotune_runner() -> AutotuneRunner:
+    global _runner_singleton
+    with _runner_lock:
+        if _runner_singleton is None:
+            _runner_singleton = AutotuneRunner()
+    return _runner_singleton
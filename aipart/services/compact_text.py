@@ -0,0 +1,78 @@
+"""
+长文本的紧凑表示：摘要所需的中间数据与输入大小成正比，而不是为每个句子/词各建一个字符串对象。
+
+- 句子以 (start, end) 偏移保存在 array('q') 中，只在输出时切片出被选中的句子；
+- 词以整数 ID 保存在 array('i') 中，词表为单次请求内的驻留字典（同一个词只存一份字符串）；
+- 词频与句子得分用 NumPy 的 bincount 向量化计算。
+
+结果与 text_utils.split_sentences / sentence_scores 一致，summarizer 在文本超过阈值时自动切换。
+"""
+from array import array
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .text_utils import EN_STOP, SENT_EXTRACT_REGEX, TOKEN_REGEX, ZH_STOP
+
+
+class CompactDoc:
+    """一篇文本的句子偏移 + 词 ID 序列（CSR 布局：第 i 句的词为 token_ids[token_ptr[i]:token_ptr[i + 1]]）。"""
+
+    __slots__ = ("text", "starts", "ends", "vocab", "token_ids", "token_ptr")
+
+    def __init__(self, text: str, lang: str) -> None:
+        self.text = text
+        self.starts, self.ends = sentence_spans(text)
+        self.vocab: Dict[str, int] = {}
+        self.token_ids = array("i")
+        self.token_ptr = array("q", [0])
+        stop = ZH_STOP if lang == "zh" else EN_STOP
+        vocab, ids, ptr = self.vocab, self.token_ids, self.token_ptr
+        findall = TOKEN_REGEX.findall
+        for s, e in zip(self.starts, self.ends):
+            # 逐句切片+小写只产生短暂的临时字符串，与 tokenize 的规则一致
+            ids.extend([vocab.setdefault(t, len(vocab)) for t in findall(text[s:e].lower()) if t not in stop])
+            ptr.append(len(ids))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def sentence(self, i: int) -> str:
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def scores(self) -> np.ndarray:
+        """每个句子的归一化词频和，与 text_utils.sentence_scores 相同（仅浮点求和顺序不同）。"""
+        n = len(self.starts)
+        if not self.token_ids or n == 0:
+            return np.zeros(n, dtype=np.float64)
+        ids = np.frombuffer(self.token_ids, dtype=np.int32)
+        ptr = np.frombuffer(self.token_ptr, dtype=np.int64)
+        counts = np.bincount(ids, minlength=len(self.vocab)).astype(np.float64)
+        weights = counts[ids]
+        weights /= counts.max()
+        # reduceat 对空区间返回下一个元素，需单独置零；末尾的空句也落在这里
+        nonempty = ptr[1:] > ptr[:-1]
+        out = np.zeros(n, dtype=np.float64)
+        out[nonempty] = np.add.reduceat(weights, ptr[:-1][nonempty])
+        return out
+
+    def top_sentences(self, k: int) -> List[str]:
+        """得分最高的 k 句（同分取靠前者），按原文顺序返回。"""
+        scores = self.scores()
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [self.sentence(int(i)) for i in np.sort(order)]
+
+
+def sentence_spans(text: str) -> Tuple[array, array]:
+    """句子在原文中的 [start, end) 偏移（已去除首尾空白），切分规则同 split_sentences。"""
+    starts, ends = array("q"), array("q")
+    for m in SENT_EXTRACT_REGEX.finditer(text or ""):
+        s, e = m.span()
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            starts.append(s)
+            ends.append(e)
+    return starts, ends
@@ -1,23 +1,74 @@
+import asyncio
+import base64
+import hashlib
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 import httpx
 
+from .http_cache import CacheEntry, HttpCache
 
-class GitHubAPI:
-    """
-    Minimal synchronous GitHub API client.
 
-    - Reads token from env var GITHUB_TOKEN by default
-    - Exposes `.available` to indicate whether token is present
-    - Provides a few common operations (list repos, create issue, dispatch workflow)
-    - Raises a clear error if methods are used without a token
-    """
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 git assigns to a blob with this content."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
 
-    def __init__(self, token: Optional[str] = None, base_url: str = "https://api.github.com") -> None:
+def git_blob_sha_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """git_blob_sha of a file, hashed in chunks."""
+    h = hashlib.sha1(b"blob %d\0" % os.path.getsize(path))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _page_url(url: str, page: int) -> str:
+    """Return `url` with its `page` query parameter replaced."""
+    parts = urlparse(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _last_page(response: httpx.Response) -> Optional[int]:
+    """Page number of rel="last" in the Link header, if the API exposes it."""
+    last = response.links.get("last", {}).get("url")
+    if not last:
+        return None
+    try:
+        return int(parse_qs(urlparse(last).query)["page"][0])
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+class _GitHubBase:
+    """Shared configuration and rate-limit policy for the sync and async clients."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: str = "https://api.github.com",
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        max_backoff_s: float = 900.0,
+        cache: Optional[HttpCache] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
+        self.cache = cache
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.available: bool = bool(self.token)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_backoff_s = max_backoff_s
         # Always include version + accept; add auth only if token available
         self._headers: Dict[str, str] = {
             "Accept": "application/vnd.github+json",
@@ -25,6 +76,7 @@ class GitHubAPI:
         }
         if self.token:
             self._headers["Authorization"] = f"Bearer {self.token}"
+        self._limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
 
     def _require_token(self) -> None:
         if not self.available:
@@ -32,20 +84,196 @@ class GitHubAPI:
                 "GITHUB_TOKEN is not set. Please set it in your environment before calling GitHub API."
             )
 
+    def _url(self, path: str) -> str:
+        return path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+
+    def _cache_lookup(self, method: str, url: str, params: Any) -> Tuple[Optional[str], Optional[CacheEntry]]:
+        """Cache key and stored entry (if any) for a GET; (None, None) when caching does not apply."""
+        if self.cache is None or method.upper() != "GET":
+            return None, None
+        full = str(httpx.URL(url, params=params)) if params else url
+        vary = hashlib.sha256((self.token or "").encode("utf-8")).hexdigest()
+        key = HttpCache.make_key(method, full, vary)
+        return key, self.cache.get(key)
+
+    def _cache_finish(self, key: Optional[str], entry: Optional[CacheEntry], r: httpx.Response) -> httpx.Response:
+        """Replay the cached body on 304; store fresh 200s that carry a validator."""
+        if key is None or self.cache is None:
+            return r
+        if r.status_code == 304 and entry is not None:
+            self.cache.record_hit(entry)
+            headers = dict(entry.headers)
+            # 304 carries the current rate-limit headers; keep them over the stored ones
+            headers.update({k: v for k, v in r.headers.items() if k.lower().startswith("x-ratelimit-")})
+            return httpx.Response(200, headers=headers, content=entry.body, request=r.request)
+        if r.status_code == 200:
+            self.cache.record_miss()
+            self.cache.put(key, str(r.url), r.headers, r.content)
+        return r
+
+    def _rate_limit_delay(self, r: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a rate-limited response, or None if it is not retryable.
+
+        - Retry-After (secondary limits, some 429s) wins when present;
+        - primary limit: X-RateLimit-Remaining == 0 -> wait until X-RateLimit-Reset;
+        - secondary limit without headers: exponential backoff starting at one minute.
+        """
+        if r.status_code not in (403, 429):
+            return None
+        retry_after = r.headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        if r.headers.get("x-ratelimit-remaining") == "0" and r.headers.get("x-ratelimit-reset"):
+            try:
+                return max(0.0, float(r.headers["x-ratelimit-reset"]) - time.time()) + 1.0
+            except ValueError:
+                pass
+        text = r.text.lower() if r.status_code == 403 else ""
+        if r.status_code == 429 or "secondary rate limit" in text or "abuse" in text:
+            return 60.0 * (2 ** attempt)
+        return None
+
+    def _should_retry(self, r: httpx.Response, attempt: int) -> Optional[float]:
+        if attempt >= self.max_retries:
+            return None
+        delay = self._rate_limit_delay(r, attempt)
+        if delay is None or delay > self.max_backoff_s:
+            return None
+        return delay
+
+    def _repo_payload(self, name: str, private: bool, description: str, auto_init: bool) -> Dict[str, Any]:
+        return {"name": name, "private": private, "description": description, "auto_init": auto_init}
+
+
+class GitHubAPI(_GitHubBase):
+    """
+    Minimal synchronous GitHub API client.
+
+    - Reads token from env var GITHUB_TOKEN by default
+    - Exposes `.available` to indicate whether token is present
+    - Provides a few common operations (list repos, create issue, dispatch workflow)
+    - Raises a clear error if methods are used without a token
+    - Reuses one pooled keep-alive connection for all calls; close() or use as a context manager
+    - Waits and retries on primary/secondary rate limits
+    - Optionally revalidates GETs against an on-disk ETag cache (`cache=HttpCache(...)`);
+      304 responses do not count against the rate limit
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: str = "https://api.github.com",
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        max_backoff_s: float = 900.0,
+        transport: Optional[httpx.BaseTransport] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        cache: Optional[HttpCache] = None,
+    ) -> None:
+        super().__init__(token, base_url, timeout, max_retries, max_backoff_s, cache)
+        self._sleep = sleep
+        self._client = httpx.Client(headers=self._headers, timeout=timeout, limits=self._limits, transport=transport)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def __enter__(self) -> "GitHubAPI":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        url = self._url(path)
+        key, entry = self._cache_lookup(method, url, kwargs.get("params"))
+        if entry is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.conditional_headers()}
+        attempt = 0
+        while True:
+            r = self._client.request(method, url, **kwargs)
+            delay = self._should_retry(r, attempt)
+            if delay is None:
+                r = self._cache_finish(key, entry, r)
+                r.raise_for_status()
+                return r
+            self._sleep(delay)
+            attempt += 1
+
+    def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        per_page: int = 100,
+        max_pages: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield each page of a list endpoint in order.
+
+        When the first response carries rel="last", the remaining pages are fetched
+        concurrently (up to `concurrency` in flight); otherwise rel="next" is followed.
+        """
+        self._require_token()
+        query = dict(params or {})
+        query["per_page"] = per_page
+        first = self._request("GET", path, params=query)
+        yield first.json()
+        last = _last_page(first)
+        if max_pages is not None:
+            last = min(last, max_pages) if last is not None else None
+            if max_pages <= 1:
+                return
+        if last is not None:
+            urls = [_page_url(str(first.url), p) for p in range(2, last + 1)]
+            if not urls:
+                return
+            # Keep at most `concurrency` requests in flight; stopping early abandons the rest.
+            window = max(1, concurrency)
+            pool = ThreadPoolExecutor(max_workers=window)
+            pending: Deque[Future] = deque()
+            todo = iter(urls)
+            try:
+                for u in islice(todo, window):
+                    pending.append(pool.submit(self._request, "GET", u))
+                while pending:
+                    r = pending.popleft().result()
+                    for u in islice(todo, 1):
+                        pending.append(pool.submit(self._request, "GET", u))
+                    yield r.json()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+            return
+        fetched = 1
+        nxt = first.links.get("next", {}).get("url")
+        while nxt and (max_pages is None or fetched < max_pages):
+            r = self._request("GET", nxt)
+            yield r.json()
+            fetched += 1
+            nxt = r.links.get("next", {}).get("url")
+
+    def paginate(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """Iterate over items across all pages."""
+        for page in self.iter_pages(path, params, **kwargs):
+            yield from page
+
     def list_repos(self, per_page: int = 5) -> List[Dict[str, Any]]:
         """List the authenticated user's repositories (first page)."""
         self._require_token()
-        url = f"{self.base_url}/user/repos"
-        r = httpx.get(url, headers=self._headers, params={"per_page": per_page, "sort": "updated"}, timeout=30.0)
-        r.raise_for_status()
+        r = self._request("GET", "/user/repos", params={"per_page": per_page, "sort": "updated"})
         return r.json()
 
+    def list_all_repos(self, per_page: int = 100, concurrency: int = 4, max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List all of the authenticated user's repositories, fetching pages concurrently."""
+        return list(self.paginate("/user/repos", {"sort": "updated"}, per_page=per_page, concurrency=concurrency, max_pages=max_pages))
+
     def get_user(self) -> Dict[str, Any]:
         """Get the authenticated user's profile (login, id, etc.)."""
         self._require_token()
-        url = f"{self.base_url}/user"
-        r = httpx.get(url, headers=self._headers, timeout=30.0)
-        r.raise_for_status()
+        r = self._request("GET", "/user")
         return r.json()
 
     def create_issue(
@@ -58,12 +286,10 @@ class GitHubAPI:
     ) -> Dict[str, Any]:
         """Create an issue in the given repo."""
         self._require_token()
-        url = f"{self.base_url}/repos/{owner}/{repo}/issues"
         payload: Dict[str, Any] = {"title": title, "body": body}
         if labels:
             payload["labels"] = labels
-        r = httpx.post(url, headers=self._headers, json=payload, timeout=30.0)
-        r.raise_for_status()
+        r = self._request("POST", f"/repos/{owner}/{repo}/issues", json=payload)
         return r.json()
 
     def dispatch_workflow(
@@ -76,12 +302,10 @@ class GitHubAPI:
     ) -> bool:
         """Trigger a workflow_dispatch for a given workflow file name under .github/workflows/"""
         self._require_token()
-        url = f"{self.base_url}/repos/{owner}/{repo}/actions/workflows/{workflow_file}/dispatches"
         payload: Dict[str, Any] = {"ref": ref}
         if inputs:
             payload["inputs"] = inputs
-        r = httpx.post(url, headers=self._headers, json=payload, timeout=30.0)
-        r.raise_for_status()
+        self._request("POST", f"/repos/{owner}/{repo}/actions/workflows/{workflow_file}/dispatches", json=payload)
         return True
 
     def create_repo(
@@ -94,21 +318,262 @@ class GitHubAPI:
     ) -> Dict[str, Any]:
         """Create a repository for the authenticated user, or under an organization if org provided."""
         self._require_token()
-        if org:
-            url = f"{self.base_url}/orgs/{org}/repos"
-        else:
-            url = f"{self.base_url}/user/repos"
-        payload: Dict[str, Any] = {
-            "name": name,
-            "private": private,
-            "description": description,
-            "auto_init": auto_init,
+        path = f"/orgs/{org}/repos" if org else "/user/repos"
+        r = self._request("POST", path, json=self._repo_payload(name, private, description, auto_init))
+        return r.json()
+
+    def publish_files(
+        self,
+        owner: str,
+        repo: str,
+        files: Dict[str, str],
+        branch: str = "main",
+        message: str = "Initial commit",
+        concurrency: int = 8,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        prune: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Publish local files as one commit on `branch` via the Git Data API (no local git needed).
+
+        `files` maps repository paths to local file paths. Blob SHA-1s are computed locally;
+        blobs already present in the branch's current tree (and duplicate contents) are not
+        uploaded again, the rest are uploaded concurrently. Then a tree, a commit whose parent
+        is the current head (if any) and the ref are created in a handful of calls.
+        The repository must already have at least one commit (e.g. create it with auto_init).
+
+        By default the tree is built on top of the branch's current tree, so files that are
+        not in `files` are kept. With `prune=True` the branch content is replaced by exactly
+        `files`, deleting everything else.
+
+        `progress` receives a stats dict after each uploaded blob. Returns the final stats
+        including commit/tree SHAs, blob counts and bytes uploaded.
+        """
+        self._require_token()
+        started = time.perf_counter()
+        base = f"/repos/{owner}/{repo}/git"
+        entries: List[Dict[str, str]] = []
+        local: Dict[str, str] = {}  # sha -> local path (first occurrence)
+        for repo_path, local_path in sorted(files.items()):
+            sha = git_blob_sha_file(local_path)
+            mode = "100755" if os.name != "nt" and os.stat(local_path).st_mode & 0o111 else "100644"
+            entries.append({"path": repo_path.replace(os.sep, "/"), "mode": mode, "type": "blob", "sha": sha})
+            local.setdefault(sha, local_path)
+
+        parent: Optional[str] = None
+        base_tree: Optional[str] = None
+        existing: Set[str] = set()
+        try:
+            head = self._request("GET", f"{base}/ref/heads/{branch}").json()
+            parent = head["object"]["sha"]
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 409:
+                raise RuntimeError(f"{owner}/{repo} is empty; create it with auto_init or push an initial commit first")
+            if e.response.status_code != 404:
+                raise
+        if parent:
+            base_tree = self._request("GET", f"{base}/commits/{parent}").json()["tree"]["sha"]
+            tree = self._request("GET", f"{base}/trees/{base_tree}", params={"recursive": "1"}).json()
+            existing = {t["sha"] for t in tree.get("tree", []) if t.get("type") == "blob"}
+
+        missing = [sha for sha in local if sha not in existing]
+        stats: Dict[str, Any] = {
+            "files": len(entries),
+            "blobs_total": len(local),
+            "blobs_skipped": len(local) - len(missing),
+            "blobs_uploaded": 0,
+            "bytes_uploaded": 0,
         }
-        r = httpx.post(url, headers=self._headers, json=payload, timeout=30.0)
-        r.raise_for_status()
+        lock = threading.Lock()
+
+        def upload(sha: str) -> None:
+            with open(local[sha], "rb") as f:
+                data = f.read()
+            payload = {"content": base64.b64encode(data).decode("ascii"), "encoding": "base64"}
+            got = self._request("POST", f"{base}/blobs", json=payload).json().get("sha")
+            if got != sha:
+                raise RuntimeError(f"blob SHA mismatch for {local[sha]}: expected {sha}, got {got}")
+            with lock:
+                stats["blobs_uploaded"] += 1
+                stats["bytes_uploaded"] += len(data)
+                snapshot = dict(stats)
+            if progress:
+                progress(snapshot)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                for _ in pool.map(upload, missing):
+                    pass
+
+        tree_payload: Dict[str, Any] = {"tree": entries}
+        if base_tree and not prune:
+            tree_payload["base_tree"] = base_tree
+        tree_sha = self._request("POST", f"{base}/trees", json=tree_payload).json()["sha"]
+        commit_payload: Dict[str, Any] = {"message": message, "tree": tree_sha, "parents": [parent] if parent else []}
+        commit_sha = self._request("POST", f"{base}/commits", json=commit_payload).json()["sha"]
+        if parent:
+            self._request("PATCH", f"{base}/refs/heads/{branch}", json={"sha": commit_sha})
+        else:
+            self._request("POST", f"{base}/refs", json={"ref": f"refs/heads/{branch}", "sha": commit_sha})
+        stats.update({"commit": commit_sha, "tree": tree_sha, "elapsed_s": round(time.perf_counter() - started, 3)})
+        return stats
+
+
+class AsyncGitHubAPI(_GitHubBase):
+    """asyncio variant of GitHubAPI backed by a pooled httpx.AsyncClient; close with `await aclose()`."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: str = "https://api.github.com",
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        max_backoff_s: float = 900.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        sleep: Callable[[float], Any] = asyncio.sleep,
+        cache: Optional[HttpCache] = None,
+    ) -> None:
+        super().__init__(token, base_url, timeout, max_retries, max_backoff_s, cache)
+        self._sleep = sleep
+        self._client = httpx.AsyncClient(headers=self._headers, timeout=timeout, limits=self._limits, transport=transport)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncGitHubAPI":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        url = self._url(path)
+        key, entry = self._cache_lookup(method, url, kwargs.get("params"))
+        if entry is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.conditional_headers()}
+        attempt = 0
+        while True:
+            r = await self._client.request(method, url, **kwargs)
+            delay = self._should_retry(r, attempt)
+            if delay is None:
+                r = self._cache_finish(key, entry, r)
+                r.raise_for_status()
+                return r
+            await self._sleep(delay)
+            attempt += 1
+
+    async def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        per_page: int = 100,
+        max_pages: Optional[int] = None,
+        concurrency: int = 4,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Async counterpart of GitHubAPI.iter_pages (pages are yielded in order)."""
+        self._require_token()
+        query = dict(params or {})
+        query["per_page"] = per_page
+        first = await self._request("GET", path, params=query)
+        yield first.json()
+        last = _last_page(first)
+        if max_pages is not None:
+            last = min(last, max_pages) if last is not None else None
+            if max_pages <= 1:
+                return
+        if last is not None:
+            sem = asyncio.Semaphore(max(1, concurrency))
+
+            async def fetch(url: str) -> httpx.Response:
+                async with sem:
+                    return await self._request("GET", url)
+
+            tasks = [asyncio.ensure_future(fetch(_page_url(str(first.url), p))) for p in range(2, last + 1)]
+            try:
+                for t in tasks:
+                    yield (await t).json()
+            finally:
+                for t in tasks:
+                    t.cancel()
+            return
+        fetched = 1
+        nxt = first.links.get("next", {}).get("url")
+        while nxt and (max_pages is None or fetched < max_pages):
+            r = await self._request("GET", nxt)
+            yield r.json()
+            fetched += 1
+            nxt = r.links.get("next", {}).get("url")
+
+    async def paginate(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        async for page in self.iter_pages(path, params, **kwargs):
+            for item in page:
+                yield item
+
+    async def list_repos(self, per_page: int = 5) -> List[Dict[str, Any]]:
+        """List the authenticated user's repositories (first page)."""
+        self._require_token()
+        r = await self._request("GET", "/user/repos", params={"per_page": per_page, "sort": "updated"})
+        return r.json()
+
+    async def list_all_repos(self, per_page: int = 100, concurrency: int = 4, max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [item async for item in self.paginate(
+            "/user/repos", {"sort": "updated"}, per_page=per_page, concurrency=concurrency, max_pages=max_pages
+        )]
+
+    async def get_user(self) -> Dict[str, Any]:
+        self._require_token()
+        r = await self._request("GET", "/user")
+        return r.json()
+
+    async def create_issue(
+        self,
+        owner: str,
+        repo: str,
+        title: str,
+        body: str = "",
+        labels: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        self._require_token()
+        payload: Dict[str, Any] = {"title": title, "body": body}
+        if labels:
+            payload["labels"] = labels
+        r = await self._request("POST", f"/repos/{owner}/{repo}/issues", json=payload)
+        return r.json()
+
+    async def dispatch_workflow(
+        self,
+        owner: str,
+        repo: str,
+        workflow_file: str,
+        ref: str = "main",
+        inputs: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        self._require_token()
+        payload: Dict[str, Any] = {"ref": ref}
+        if inputs:
+            payload["inputs"] = inputs
+        await self._request("POST", f"/repos/{owner}/{repo}/actions/workflows/{workflow_file}/dispatches", json=payload)
+        return True
+
+    async def create_repo(
+        self,
+        name: str,
+        private: bool = True,
+        description: str = "",
+        auto_init: bool = False,
+        org: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        self._require_token()
+        path = f"/orgs/{org}/repos" if org else "/user/repos"
+        r = await self._request("POST", path, json=self._repo_payload(name, private, description, auto_init))
         return r.json()
 
 
 def get_github_client(token: Optional[str] = None) -> GitHubAPI:
-    """Factory to get a GitHubAPI client using env token by default."""
-    return GitHubAPI(token=token)
+    """Factory to get a GitHubAPI client using env token by default (cached when GITHUB_CACHE_DIR is set)."""
+    return GitHubAPI(token=token, cache=HttpCache.from_env())
+
+
+def get_async_github_client(token: Optional[str] = None) -> AsyncGitHubAPI:
+    """Factory to get an AsyncGitHubAPI client using env token by default (cached when GITHUB_CACHE_DIR is set)."""
+    return AsyncGitHubAPI(token=token, cache=HttpCache.from_env())
@@ -0,0 +1,182 @@
+"""
+零停机热加载：在后台按新配置构建并预热 STT 引擎，就绪后原子替换全局实例，旧实例处理完在途请求后再释放。
+
+- 配置 = 当前环境变量 + STT_CONFIG_FILE（JSON 对象，键为环境变量名，如
+  {"FAST_WHISPER_MODEL": "small", "FAST_WHISPER_BEAM_SIZE": 3, "TEXT_CORRECT_MAP_ZH": {"错": "对"}}），文件优先；
+- 触发方式：POST /admin/reload（需 ADMIN_TOKEN）或向进程发送 SIGHUP；同一时间只进行一次热加载；
+- 新引擎预热失败时保留旧实例并记录错误；模型与精度未变时直接复用已加载的权重（force 时重新加载）；
+- 替换后旧实例不再接收新调用（转交给新实例），等待在途调用结束（最多 STT_RELOAD_DRAIN_S 秒）后释放模型；
+- 术语纠错表随同一份配置一起替换；已保存的自动调优结果（见 autotune.py）补充未显式设置的键。
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from . import metrics
+from .autotune import tuned_overrides
+from .stt import STTEngine, get_stt_engine, swap_stt_engine
+from .text_utils import load_corrections
+
+log = logging.getLogger(__name__)
+
+IDLE, BUILDING, DRAINING = "idle", "building", "draining"
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def load_config(path: Optional[str] = None, include_tuned: bool = True) -> Dict[str, str]:
+    """合并环境变量、JSON 配置文件与已保存的自动调优结果（仅补充未显式设置的键），返回字符串键值；
+    配置文件缺失或格式错误时抛出异常。"""
+    cfg = dict(os.environ)
+    path = path if path is not None else (os.environ.get("STT_CONFIG_FILE") or "")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: 需为 JSON 对象")
+        for k, v in data.items():
+            if v is None:
+                cfg.pop(str(k), None)
+            elif isinstance(v, str):
+                cfg[str(k)] = v
+            elif isinstance(v, bool):
+                cfg[str(k)] = "1" if v else "0"
+            elif isinstance(v, (dict, list)):
+                cfg[str(k)] = json.dumps(v, ensure_ascii=False)
+            else:
+                cfg[str(k)] = str(v)
+    if include_tuned:
+        cfg.update(tuned_overrides(cfg))
+    return cfg
+
+
+def apply_startup_config() -> None:
+    """启动时（预热之前）按与热加载相同的规则应用 STT_CONFIG_FILE 与调优结果。"""
+    try:
+        cfg = load_config()
+    except Exception as e:
+        log.warning("ignoring STT_CONFIG_FILE: %s", e)
+        return
+    if cfg != dict(os.environ):
+        swap_stt_engine(STTEngine(cfg))
+        load_corrections(cfg)
+
+
+class ReloadManager:
+    def __init__(self, factory: Callable[[Dict[str, str]], Any] = STTEngine, drain_timeout_s: float = 300.0) -> None:
+        self.factory = factory
+        self.drain_timeout_s = drain_timeout_s
+        self._lock = threading.Lock()
+        self.state = IDLE
+        self.generation = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_at: Optional[float] = None
+        self.last_build_s: Optional[float] = None
+        self.last_drain_s: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def trigger(self, force: bool = False) -> bool:
+        """在后台线程中热加载；已有热加载在进行时返回 False。"""
+        with self._lock:
+            if self.state != IDLE:
+                return False
+            self.state = BUILDING
+            self._thread = threading.Thread(target=self._run, args=(force,), name="stt-reload", daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """同步热加载（供测试/脚本使用），返回状态。"""
+        with self._lock:
+            if self.state != IDLE:
+                raise RuntimeError("已有热加载正在进行")
+            self.state = BUILDING
+        self._run(force)
+        return self.status()
+
+    def _set(self, **kw: Any) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                setattr(self, k, v)
+
+    def _run(self, force: bool) -> None:
+        t0 = time.perf_counter()
+        try:
+            cfg = load_config()
+            new = self.factory(cfg)
+            old = get_stt_engine()
+            if not force:
+                new.adopt_models(old)
+            if new.available and not new.warm_up():
+                raise RuntimeError("新引擎预热失败")
+        except Exception as e:
+            log.warning("reload failed, keeping current engine: %s", e)
+            metrics.inc("stt_reload_failed")
+            self._set(state=IDLE, last_error=str(e))
+            return
+        build_s = time.perf_counter() - t0
+        with self._lock:
+            old = swap_stt_engine(new)
+            load_corrections(cfg)
+            self.generation += 1
+            self.state = DRAINING
+            self.last_error = None
+            self.last_reload_at = time.time()
+            self.last_build_s = round(build_s, 3)
+        metrics.inc("stt_reloads")
+        log.info("reloaded engine (generation %s, build %.2fs)", self.generation, build_s)
+        t1 = time.perf_counter()
+        drained = True
+        if old is not None and old is not new:
+            drained = old.retire(self.drain_timeout_s)
+            if not drained:
+                log.warning("old engine still busy after %ss, leaving its models to GC", self.drain_timeout_s)
+        self._set(state=IDLE, last_drain_s=round(time.perf_counter() - t1, 3))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "generation": self.generation,
+                "last_error": self.last_error,
+                "last_reload_at": self.last_reload_at,
+                "last_build_s": self.last_build_s,
+                "last_drain_s": self.last_drain_s,
+            }
+
+
+_reload_singleton: Optional[ReloadManager] = None
+_reload_lock = threading.Lock()
+
+
+def get_reload_manager() -> ReloadManager:
+    global _reload_singleton
+    with _reload_lock:
+        if _reload_singleton is None:
+            _reload_singleton = ReloadManager(drain_timeout_s=_env_float("STT_RELOAD_DRAIN_S", 300.0))
+    return _reload_singleton
+
+
+def install_sighup_handler() -> bool:
+    """SIGHUP 触发后台热加载；仅主线程且平台支持时生效。"""
+    import signal
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    try:
+        signal.signal(signal.SIGHUP, lambda signum, frame: get_reload_manager().trigger())
+    except ValueError:  # 非主线程（如测试客户端）
+        return False
+    return True
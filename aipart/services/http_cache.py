@@ -0,0 +1,190 @@
+"""
+On-disk cache for conditional GET requests (ETag / Last-Modified).
+
+Each entry is stored as two files under the cache directory:
+- <key>.json: url, validators and the response headers to replay
+- <key>.body: the raw response body
+
+The cache is bounded by total size and entry count; the least recently used
+entries are evicted first. Instances are thread-safe.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Headers that describe the transfer rather than the stored (decoded) body
+_SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class CacheEntry:
+    __slots__ = ("key", "url", "etag", "last_modified", "headers", "body")
+
+    def __init__(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str],
+                 headers: Dict[str, str], body: bytes) -> None:
+        self.key = key
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.body = body
+
+    def conditional_headers(self) -> Dict[str, str]:
+        h: Dict[str, str] = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+
+class HttpCache:
+    def __init__(self, root: str, max_bytes: int = 50 * 1024 * 1024, max_entries: int = 2000) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU order
+        self._bytes = 0
+        self.hits = 0  # served from cache after a 304
+        self.misses = 0  # full response downloaded
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._scan()
+
+    @classmethod
+    def from_env(cls) -> Optional["HttpCache"]:
+        """GITHUB_CACHE_DIR enables the cache; GITHUB_CACHE_MAX_MB bounds it (default 50)."""
+        root = os.environ.get("GITHUB_CACHE_DIR")
+        if not root:
+            return None
+        try:
+            max_mb = float(os.environ.get("GITHUB_CACHE_MAX_MB") or 50)
+        except Exception:
+            max_mb = 50.0
+        return cls(root, max_bytes=int(max_mb * 1024 * 1024))
+
+    @staticmethod
+    def make_key(method: str, url: str, vary: str = "") -> str:
+        """`vary` should carry anything that changes the response for the same URL (e.g. the token)."""
+        return hashlib.sha256(f"{method.upper()} {url}\n{vary}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        return os.path.join(self.root, key + ".json"), os.path.join(self.root, key + ".body")
+
+    def _scan(self) -> None:
+        found = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            meta, body = self._paths(key)
+            try:
+                size = os.path.getsize(meta) + os.path.getsize(body)
+                found.append((os.path.getmtime(meta), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(found):
+            self._index[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        return CacheEntry(key, meta["url"], meta.get("etag"), meta.get("last_modified"), meta.get("headers") or {}, body)
+
+    def put(self, key: str, url: str, headers: Any, body: bytes) -> bool:
+        """Store a 200 response if it carries a validator; returns whether it was stored."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return False
+        kept = {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS}
+        meta = json.dumps({"url": url, "etag": etag, "last_modified": last_modified, "headers": kept,
+                           "stored_at": time.time()}, ensure_ascii=False).encode("utf-8")
+        size = len(meta) + len(body)
+        if size > self.max_bytes:
+            return False
+        meta_path, body_path = self._paths(key)
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        try:
+            # 先写 body，再原子替换 meta：meta 存在即代表条目完整
+            with open(body_path, "wb") as f:
+                f.write(body)
+            with open(tmp, "wb") as f:
+                f.write(meta)
+            os.replace(tmp, meta_path)
+        except OSError:
+            return False
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self.stores += 1
+            self._evict()
+        return True
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._bytes -= self._index.pop(key, 0)
+        for p in self._paths(key):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        # 调用方持有 self._lock
+        while self._index and (self._bytes > self.max_bytes or len(self._index) > self.max_entries):
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            for p in self._paths(key):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    def record_hit(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry.body)
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def clear(self) -> None:
+        for key in list(self._index):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "bytes_saved": self.bytes_saved,
+            }
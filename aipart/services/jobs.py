@@ -0,0 +1,412 @@
+"""
+异步转写任务：上传后立即返回 job_id，由后台线程池处理，客户端轮询或通过回调获取结果。
+
+- 任务元数据与结果持久化在本地 SQLite（JOBS_DIR/jobs.db），服务重启后未完成的任务会重新入队；
+- 多个进程（预派生 worker）共用同一个库：执行前用条件 UPDATE 原子认领（queued → running 并记录 owner），
+  同一任务只会被一个进程执行；执行中的任务定期续租（JOBS_LEASE_S），owner 进程已退出或租约过期的任务重新入队；
+- 音频保存在 JOBS_DIR/audio，任务结束即删除；
+- 定时清理超过 JOBS_TTL_S 的已结束任务及遗留音频；
+- callback_url 须为 http(s)：设置 JOBS_CALLBACK_ALLOWED_HOSTS 时只允许其中的主机，
+  否则解析域名后拒绝回环、内网、链路本地等非公网地址（提交时与发送前各校验一次，防止 SSRF）。
+"""
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    params TEXT NOT NULL,
+    audio_path TEXT,
+    callback_url TEXT,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL
+)
+"""
+
+
+def _env_int(env: str, default: int) -> int:
+    try:
+        return int((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class JobStore:
+    """线程安全的 SQLite 任务表。"""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        cols = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+        for col, decl in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if col not in cols:  # 旧版本创建的库
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {decl}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs(status, updated_at)")
+
+    def create(self, job_id: str, params: Dict[str, Any], audio_path: str, callback_url: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, params, audio_path, callback_url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, now, now, json.dumps(params, ensure_ascii=False), audio_path, callback_url),
+            )
+
+    def update(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(result, ensure_ascii=False) if result is not None else None, error, job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim(self, job_id: str, owner: str, lease_until: float) -> bool:
+        """原子地把排队中的任务标记为执行中；已被其他进程认领或已结束时返回 False。"""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, owner, lease_until, time.time(), job_id, QUEUED),
+            )
+        return cur.rowcount == 1
+
+    def renew(self, owner: str, lease_until: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?", (lease_until, owner, RUNNING)
+            )
+
+    def requeue_stale(self, now: float, owner_dead: Callable[[Optional[str]], bool]) -> int:
+        """执行中但 owner 已退出或租约过期的任务重新排队，返回数量。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, lease_until FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            n = 0
+            for r in rows:
+                if (r["lease_until"] or 0) < now or owner_dead(r["owner"]):
+                    cur = self._conn.execute(
+                        "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL WHERE id = ? AND status = ? AND owner IS ?",
+                        (QUEUED, r["id"], RUNNING, r["owner"]),
+                    )
+                    n += cur.rowcount
+        return n
+
+    def queued(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [r["id"] for r in rows]
+
+    def purge_finished(self, before: float) -> List[str]:
+        """删除 updated_at 早于 before 的已结束任务，返回其 audio_path 以便清理。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, audio_path FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, before)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(r["id"],) for r in rows])
+        return [r["audio_path"] for r in rows if r["audio_path"]]
+
+    def audio_paths(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT audio_path FROM jobs WHERE audio_path IS NOT NULL").fetchall()
+        return [r["audio_path"] for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _default_runner(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    from .pipeline import run_audio_pipeline
+    from .scheduler import estimate_cost, get_scheduler
+    from .stt import get_stt_engine
+    # 与同步接口共用转写槽位；异步任务统一作为一个客户端参与公平调度
+    model_name = get_stt_engine().resolve_model(params.get("model"), params.get("compute_type")).name
+    audio_s, cost = estimate_cost(path, model_name)
+    sched = get_scheduler()
+    ticket = sched.acquire_blocking("jobs", cost, audio_s)
+    try:
+        return run_audio_pipeline(path, **params)
+    finally:
+        sched.release(ticket)
+
+
+def _allowed_hosts() -> List[str]:
+    raw = os.environ.get("JOBS_CALLBACK_ALLOWED_HOSTS") or ""
+    return [h.strip().lower() for h in raw.split(",") if h.strip()]
+
+
+def _host_allowed(host: str, allowed: List[str]) -> bool:
+    # "example.com" 精确匹配；"*.example.com" 匹配其任意子域名
+    for pattern in allowed:
+        if pattern.startswith("*.") and host.endswith(pattern[1:]):
+            return True
+        if host == pattern:
+            return True
+    return False
+
+
+def check_callback_url(url: str) -> None:
+    """校验回调地址，不允许时抛出 ValueError。"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url 需为 http(s) 地址")
+    host = parts.hostname.lower()
+    allowed = _allowed_hosts()
+    if allowed:
+        if not _host_allowed(host, allowed):
+            raise ValueError("callback_url 的主机不在 JOBS_CALLBACK_ALLOWED_HOSTS 中")
+        return
+    try:
+        infos = socket.getaddrinfo(host, parts.port or (443 if parts.scheme == "https" else 80), proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValueError("callback_url 的主机无法解析")
+    for info in infos:
+        addr = ipaddress.ip_address(info[4][0].split("%")[0])
+        if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
+            addr = addr.ipv4_mapped
+        if not addr.is_global or addr.is_multicast:
+            raise ValueError("callback_url 不能指向回环、内网或链路本地地址")
+
+
+def _post_callback(url: str, payload: Dict[str, Any], attempts: int = 3) -> bool:
+    import httpx
+    try:
+        # 提交后 DNS 记录可能已改指内网地址，发送前再校验一次
+        check_callback_url(url)
+    except ValueError as e:
+        log.warning("callback refused: %s", e)
+        return False
+    delay = 1.0
+    for i in range(attempts):
+        try:
+            r = httpx.post(url, json=payload, timeout=10.0, follow_redirects=False)  # 重定向可绕过地址校验
+            if r.status_code < 500:
+                return r.is_success
+        except Exception:
+            pass
+        if i + 1 < attempts:
+            time.sleep(delay)
+            delay *= 2
+    return False
+
+
+# 本进程内存活的 JobManager 的 owner 标识
+_live_owners: Set[str] = set()
+_live_owners_lock = threading.Lock()
+
+
+class JobManager:
+    def __init__(
+        self,
+        root: str,
+        workers: int = 1,
+        ttl_s: float = 86400,
+        gc_interval_s: float = 600,
+        lease_s: float = 300,
+        runner: Callable[[str, Dict[str, Any]], Dict[str, Any]] = _default_runner,
+        notifier: Callable[[str, Dict[str, Any]], bool] = _post_callback,
+    ) -> None:
+        self.root = root
+        self.audio_dir = os.path.join(root, "audio")
+        os.makedirs(self.audio_dir, exist_ok=True)
+        self.store = JobStore(os.path.join(root, "jobs.db"))
+        self.ttl_s = ttl_s
+        self.gc_interval_s = gc_interval_s
+        self.lease_s = lease_s
+        # 主机:进程号:随机串；随机串区分容器重启后复用了同一进程号的新进程
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with _live_owners_lock:
+            _live_owners.add(self.owner)
+        self._runner = runner
+        self._notifier = notifier
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._stop = threading.Event()
+        self._gc_thread: Optional[threading.Thread] = None
+        self._lease_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        root = os.environ.get("JOBS_DIR") or os.path.join(os.getcwd(), "var", "jobs")
+        try:
+            ttl = float(os.environ.get("JOBS_TTL_S") or 86400)
+            gc_interval = float(os.environ.get("JOBS_GC_INTERVAL_S") or 600)
+            lease = float(os.environ.get("JOBS_LEASE_S") or 300)
+        except Exception:
+            ttl, gc_interval, lease = 86400.0, 600.0, 300.0
+        return cls(root, workers=_env_int("JOBS_WORKERS", 1), ttl_s=ttl, gc_interval_s=gc_interval, lease_s=lease)
+
+    def start(self) -> None:
+        # 重启恢复：排队中与执行到一半（owner 已退出）的任务重新入队；多个进程同时恢复时由 claim 保证只执行一次
+        self.recover()
+        if self.gc_interval_s > 0 and self._gc_thread is None:
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="job-gc", daemon=True)
+            self._gc_thread.start()
+        if self.lease_s > 0 and self._lease_thread is None:
+            self._lease_thread = threading.Thread(target=self._lease_loop, name="job-lease", daemon=True)
+            self._lease_thread.start()
+
+    def _owner_dead(self, owner: Optional[str]) -> bool:
+        if not owner:
+            return True
+        host, _, rest = owner.partition(":")
+        pid_s, _, _ = rest.partition(":")
+        if host != socket.gethostname() or not pid_s.isdigit():
+            return False  # 其他主机上的进程无法探测，等租约过期
+        if int(pid_s) == os.getpid():
+            # 同一进程号：本进程内仍在运行的 JobManager（如测试中多个实例）不算退出，其余是复用了进程号的上一个实例
+            with _live_owners_lock:
+                return owner not in _live_owners
+        try:
+            os.kill(int(pid_s), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def recover(self, only_if_requeued: bool = False) -> int:
+        """把失效的执行中任务放回队列，并把排队中的任务交给本进程尝试认领；返回重新排队的数量。"""
+        n = self.store.requeue_stale(time.time(), self._owner_dead)
+        if n:
+            log.warning("requeued %d jobs from exited workers or expired leases", n)
+        if n or not only_if_requeued:
+            for job_id in self.store.queued():
+                self._executor.submit(self._run, job_id)
+        return n
+
+    def _lease_loop(self) -> None:
+        while not self._stop.wait(self.lease_s / 3):
+            try:
+                self.store.renew(self.owner, time.time() + self.lease_s)
+                # 运行期间其他 worker 也可能退出，它认领的任务由存活的进程接手
+                self.recover(only_if_requeued=True)
+            except Exception as e:
+                log.warning("lease renewal failed: %s", e)
+
+    def new_audio_path(self, suffix: str) -> str:
+        return os.path.join(self.audio_dir, f"{uuid.uuid4().hex}{suffix or '.wav'}")
+
+    def submit(self, audio_path: str, params: Dict[str, Any], callback_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, params, audio_path, callback_url)
+        metrics.inc("jobs_submitted")
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def _remove_audio(self, path: Optional[str]) -> None:
+        if not path:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        lease_until = time.time() + self.lease_s if self.lease_s > 0 else float("inf")
+        if not self.store.claim(job_id, self.owner, lease_until):
+            return  # 已被其他进程认领
+        path = job["audio_path"]
+        if not path or not os.path.exists(path):
+            self.store.update(job_id, FAILED, error="音频文件已丢失")
+            metrics.inc("jobs_failed")
+            return
+        try:
+            result = self._runner(path, job["params"])
+        except Exception as e:
+            self.store.update(job_id, FAILED, error=f"音频解析/转写失败: {e}")
+            metrics.inc("jobs_failed")
+            payload: Dict[str, Any] = {"job_id": job_id, "status": FAILED, "error": f"音频解析/转写失败: {e}"}
+        else:
+            self.store.update(job_id, DONE, result=result)
+            metrics.inc("jobs_done")
+            payload = {"job_id": job_id, "status": DONE, "result": result}
+        self._remove_audio(path)
+        if job.get("callback_url"):
+            ok = self._notifier(job["callback_url"], payload)
+            metrics.inc("jobs_callback_ok" if ok else "jobs_callback_failed")
+
+    def gc_once(self, now: Optional[float] = None) -> int:
+        """清理过期任务与遗留音频，返回删除的任务数。"""
+        now = time.time() if now is None else now
+        paths = self.store.purge_finished(now - self.ttl_s)
+        for p in paths:
+            self._remove_audio(p)
+        # 清理不属于任何任务的音频（如写入中途崩溃），仅处理超过 TTL 的文件
+        known = set(self.store.audio_paths())
+        for name in os.listdir(self.audio_dir):
+            p = os.path.join(self.audio_dir, name)
+            try:
+                if p not in known and os.path.getmtime(p) < now - self.ttl_s:
+                    os.remove(p)
+            except Exception:
+                pass
+        return len(paths)
+
+    def _gc_loop(self) -> None:
+        while not self._stop.wait(self.gc_interval_s):
+            try:
+                self.gc_once()
+            except Exception as e:
+                log.warning("gc failed: %s", e)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+        self.store.close()
+        with _live_owners_lock:
+            _live_owners.discard(self.owner)
+
+
+_manager_singleton: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager_singleton
+    with _manager_lock:
+        if _manager_singleton is None:
+            _manager_singleton = JobManager.from_env()
+            _manager_singleton.start()
+    return _manager_singleton
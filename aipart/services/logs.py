@@ -0,0 +1,258 @@
+"""
+结构化 JSON 日志：请求线程只把记录放入有界队列，由后台 QueueListener 线程格式化并写出，热路径不做 I/O。
+
+- 记录写到 aipart.* logger（各模块 logging.getLogger(__name__)），每行一个 JSON 对象；
+  LOG_FILE 指定文件，否则写 stderr；LOG_LEVEL 默认 INFO；
+- 队列容量 LOG_QUEUE_SIZE（默认 10000），写满时丢弃新记录并计数 log_dropped，不阻塞调用方；
+- INFO 及以下的记录按令牌桶限速（LOG_RATE_PER_S，默认 200 条/秒，0 不限），超出计数 log_rate_limited；
+  WARNING 及以上不受限；
+- 每个 HTTP 请求一条 aipart.request 记录（见 api/request_log.py）：请求 ID、路由、状态码、输入字节数、
+  音频时长与各阶段耗时。服务代码用 stage() / annotate() 往当前请求的记录里追加字段，
+  上下文变量随 run_in_threadpool 传入工作线程；不在请求中时这两个函数什么也不做；
+- 请求记录按 LOG_SAMPLE_RATE（默认 1.0）抽样，出错（5xx）或慢请求（LOG_SLOW_MS，默认 5000）总是记录，
+  /healthz、/ready、/metrics 的正常请求不记录。
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from . import metrics
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行 JSON：ts / level / logger / msg，加上 extra={"fields": {...}} 中的字段。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """令牌桶：INFO 及以下每秒最多 rate 条（突发 burst 条），WARNING 及以上直接放行。"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+        metrics.inc("log_rate_limited")
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃并计数，而不是阻塞；消息与异常栈在入队前展开，格式化留给监听线程。"""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_dropped")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _LogState:
+    def __init__(self, handler: DroppingQueueHandler, listener: logging.handlers.QueueListener, size: int) -> None:
+        self.handler = handler
+        self.listener = listener
+        self.size = size
+
+
+_state: Optional[_LogState] = None
+_state_lock = threading.Lock()
+_fork_hook_registered = False  # register_at_fork 无法注销，整个进程只注册一次
+
+
+def _output_handler() -> logging.Handler:
+    path = os.environ.get("LOG_FILE")
+    handler: logging.Handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def setup_logging() -> None:
+    """给 aipart logger 挂上队列 handler 并启动监听线程；重复调用无副作用。"""
+    global _state, _fork_hook_registered
+    with _state_lock:
+        if _state is not None:
+            return
+        size = max(1, int(_env_float("LOG_QUEUE_SIZE", 10000)))
+        handler = DroppingQueueHandler(queue.Queue(size))
+        handler.addFilter(RateLimitFilter(_env_float("LOG_RATE_PER_S", 200.0)))
+        listener = logging.handlers.QueueListener(handler.queue, _output_handler(), respect_handler_level=True)
+        root = logging.getLogger("aipart")
+        root.setLevel((os.environ.get("LOG_LEVEL") or "INFO").strip().upper())
+        root.addHandler(handler)
+        root.propagate = False
+        listener.start()
+        _state = _LogState(handler, listener, size)
+        if not _fork_hook_registered and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_in_child)
+            _fork_hook_registered = True
+
+
+def _restart_in_child() -> None:
+    # fork 后监听线程不存在，旧队列的锁也可能处于持有状态：换新队列并重启监听线程（预派生模式）
+    if _state is None:
+        return
+    _state.handler.queue = queue.Queue(_state.size)
+    _state.listener = logging.handlers.QueueListener(
+        _state.handler.queue, *_state.listener.handlers, respect_handler_level=True
+    )
+    _state.listener.start()
+
+
+def shutdown_logging() -> None:
+    """停止监听线程（会先写完队列中剩余的记录）。"""
+    global _state
+    with _state_lock:
+        if _state is None:
+            return
+        _state.listener.stop()
+        logging.getLogger("aipart").removeHandler(_state.handler)
+        for h in _state.listener.handlers:
+            h.close()
+        _state = None
+
+
+def stats() -> Dict[str, Any]:
+    pending = _state.handler.queue.qsize() if _state is not None else 0
+    return {
+        "enabled": _state is not None,
+        "queued": pending,
+        "dropped": int(metrics.get("log_dropped")),
+        "rate_limited": int(metrics.get("log_rate_limited")),
+        "sampled_out": int(metrics.get("log_sampled_out")),
+    }
+
+
+class RequestLog:
+    """单个请求的日志字段与各阶段耗时（毫秒，同名阶段累加）。"""
+
+    __slots__ = ("request_id", "started", "stages", "fields")
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict[str, Any] = {}
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds * 1000, 2)
+
+
+_current: ContextVar[Optional[RequestLog]] = ContextVar("request_log", default=None)
+
+
+def begin(request_id: str) -> Any:
+    """开始记录一个请求，返回用于 end() 的 token。"""
+    return _current.set(RequestLog(request_id))
+
+
+def current() -> Optional[RequestLog]:
+    return _current.get()
+
+
+def end(token: Any) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    rl = _current.get()
+    if rl is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rl.add_stage(name, time.perf_counter() - t0)
+
+
+def add_stage(name: str, seconds: float) -> None:
+    rl = _current.get()
+    if rl is not None:
+        rl.add_stage(name, seconds)
+
+
+def annotate(**fields: Any) -> None:
+    rl = _current.get()
+    if rl is not None:
+        rl.fields.update(fields)
+
+
+_QUIET_ROUTES = ("/healthz", "/ready", "/metrics")
+
+
+class RequestSampler:
+    """决定一条请求记录是否写出：5xx 与慢请求总是写出；探活/指标接口（quiet_routes）的正常请求不写；
+    其余按 rate 抽样。"""
+
+    def __init__(self, rate: float = 1.0, slow_ms: float = 5000.0, quiet_routes: Iterable[str] = _QUIET_ROUTES) -> None:
+        self.rate = rate
+        self.slow_ms = slow_ms
+        self.quiet_routes = frozenset(quiet_routes)
+
+    @classmethod
+    def from_env(cls) -> "RequestSampler":
+        return cls(rate=_env_float("LOG_SAMPLE_RATE", 1.0), slow_ms=_env_float("LOG_SLOW_MS", 5000.0))
+
+    def keep(self, route: str, status: int, duration_ms: float) -> bool:
+        if status >= 500 or (self.slow_ms > 0 and duration_ms >= self.slow_ms):
+            return True
+        if route in self.quiet_routes:
+            return False
+        if self.rate >= 1 or random.random() < self.rate:
+            return True
+        metrics.inc("log_sampled_out")
+        return False
@@ -0,0 +1,38 @@
+"""
+进程内轻量指标：计数器 + 按名称注册的采集函数，统一由 GET /metrics 以 JSON 输出。
+"""
+import threading
+from typing import Any, Callable, Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_collectors: Dict[str, Callable[[], Any]] = {}
+
+
+def inc(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def register_collector(name: str, fn: Callable[[], Any]) -> None:
+    """注册一个在 snapshot 时调用的采集函数（重复注册同名会覆盖）。"""
+    with _lock:
+        _collectors[name] = fn
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        counters = dict(_counters)
+        collectors = dict(_collectors)
+    out: Dict[str, Any] = {"counters": counters}
+    for name, fn in collectors.items():
+        try:
+            out[name] = fn()
+        except Exception as e:
+            out[name] = {"error": str(e)}
+    return out
@@ -0,0 +1,194 @@
+"""
+STT 模型注册表：按 (模型, 设备, 精度) 惰性加载，受内存预算约束并按 LRU 淘汰。
+
+- 同一模型的并发加载只会触发一次真实加载，其余调用方等待其结果；
+- 被淘汰的模型仅从注册表移除，正在使用它的请求仍持有引用，结束后由 GC 回收；
+- stats() 提供每个模型的命中、加载次数与加载耗时。
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class ModelKey(NamedTuple):
+    name: str
+    device: str = "cpu"
+    compute_type: str = "default"
+
+
+# 参数量（百万），用于估算常驻内存
+_MODEL_PARAMS_M: Dict[str, float] = {
+    "tiny": 39, "tiny.en": 39,
+    "base": 74, "base.en": 74,
+    "small": 244, "small.en": 244,
+    "medium": 769, "medium.en": 769,
+    "large-v1": 1550, "large-v2": 1550, "large-v3": 1550, "large": 1550,
+    "distil-large-v2": 756, "distil-large-v3": 756, "distil-medium.en": 394, "distil-small.en": 166,
+    "large-v3-turbo": 809, "turbo": 809,
+}
+
+# 每个参数占用字节数
+_BYTES_PER_PARAM: Dict[str, float] = {
+    "int8": 1.0,
+    "int8_float32": 1.1, "int8_float16": 1.1, "int8_bfloat16": 1.1,
+    "float16": 2.0, "bfloat16": 2.0,
+    "float32": 4.0, "default": 4.0, "auto": 4.0,
+}
+
+
+def model_params_m(name: str) -> float:
+    """模型参数量（百万），未知模型按 base 计。"""
+    return _MODEL_PARAMS_M.get(name, _MODEL_PARAMS_M["base"])
+
+
+def estimate_model_mb(key: ModelKey) -> float:
+    """粗略估算模型常驻内存（MB），未知模型按 base 计。"""
+    params = model_params_m(key.name)
+    bpp = _BYTES_PER_PARAM.get(key.compute_type, 4.0)
+    # 额外 15% 用于词表、缓冲区等
+    return round(params * bpp * 1.15, 1)
+
+
+class _Entry:
+    __slots__ = ("model", "est_mb")
+
+    def __init__(self, model: Any, est_mb: float) -> None:
+        self.model = model
+        self.est_mb = est_mb
+
+
+class _Loading:
+    __slots__ = ("event", "model", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.model: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        loader: Callable[[ModelKey], Any],
+        budget_mb: float = 0,
+        estimator: Callable[[ModelKey], float] = estimate_model_mb,
+    ) -> None:
+        self._loader = loader
+        self._estimator = estimator
+        self.budget_mb = budget_mb  # <= 0 表示不限
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._loading: Dict[ModelKey, _Loading] = {}
+        self._stats: Dict[ModelKey, Dict[str, float]] = {}
+
+    def _stat(self, key: ModelKey) -> Dict[str, float]:
+        st = self._stats.get(key)
+        if st is None:
+            st = {"hits": 0, "loads": 0, "load_time_s": 0.0, "last_load_s": 0.0, "evictions": 0, "coalesced": 0}
+            self._stats[key] = st
+        return st
+
+    def _used_mb(self) -> float:
+        return sum(e.est_mb for e in self._models.values())
+
+    def _evict_for(self, need_mb: float) -> None:
+        # 调用方持有锁
+        if self.budget_mb <= 0:
+            return
+        while self._models and self._used_mb() + need_mb > self.budget_mb:
+            key, _ = self._models.popitem(last=False)
+            self._stat(key)["evictions"] += 1
+            log.info("evicted model %s/%s (budget %sMB)", key.name, key.compute_type, self.budget_mb)
+
+    def get(self, key: ModelKey) -> Any:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self._stat(key)["hits"] += 1
+                return entry.model
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = _Loading()
+                self._loading[key] = pending
+                owner = True
+            else:
+                self._stat(key)["coalesced"] += 1
+                owner = False
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.model
+
+        est = self._estimator(key)
+        t0 = time.perf_counter()
+        try:
+            # 先腾出空间再加载，避免峰值同时占用新旧模型
+            with self._lock:
+                self._evict_for(est)
+            model = self._loader(key)
+        except BaseException as e:
+            pending.error = e
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.event.set()
+            raise
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self._evict_for(est)
+            self._models[key] = _Entry(model, est)
+            st = self._stat(key)
+            st["loads"] += 1
+            st["load_time_s"] += elapsed
+            st["last_load_s"] = elapsed
+            self._loading.pop(key, None)
+        pending.model = model
+        pending.event.set()
+        return model
+
+    def items(self) -> List[Tuple[ModelKey, Any]]:
+        with self._lock:
+            return [(k, e.model) for k, e in self._models.items()]
+
+    def adopt(self, key: ModelKey, model: Any) -> None:
+        """登记一个已加载好的模型（来自其他注册表），不计入加载次数。"""
+        est = self._estimator(key)
+        with self._lock:
+            if key in self._models:
+                return
+            self._evict_for(est)
+            self._models[key] = _Entry(model, est)
+            self._stat(key)
+
+    def loaded(self) -> List[ModelKey]:
+        with self._lock:
+            return list(self._models.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = []
+            for key, st in self._stats.items():
+                entry = self._models.get(key)
+                models.append({
+                    "model": key.name,
+                    "device": key.device,
+                    "compute_type": key.compute_type,
+                    "loaded": entry is not None,
+                    "est_mb": entry.est_mb if entry else self._estimator(key),
+                    "hits": int(st["hits"]),
+                    "loads": int(st["loads"]),
+                    "coalesced": int(st["coalesced"]),
+                    "evictions": int(st["evictions"]),
+                    "load_time_s": round(st["load_time_s"], 3),
+                    "last_load_s": round(st["last_load_s"], 3),
+                })
+            return {"budget_mb": self.budget_mb, "used_mb": round(self._used_mb(), 1), "models": models}
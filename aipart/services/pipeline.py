@@ -0,0 +1,126 @@
+"""
+一体化处理流程（/v1/ai 与异步任务共用）：转写 → 术语纠错 → 摘要 → 优化。
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from . import logs
+from .optimizer import optimize as optimize_svc
+from .stt import TranscriptionCancelled, get_stt_engine
+from .summarizer import summarize as summarize_svc
+from .text_utils import apply_corrections
+
+
+def _check_cancel(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise TranscriptionCancelled("处理已取消")
+
+
+def run_text_pipeline(
+    text: str,
+    summarize: bool,
+    optimize: bool,
+    max_sentences: int,
+    strategy: str,
+    style: str,
+    language: Optional[str],
+    lang_detected: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """返回 (summary, optimized, language)；cancel 置位时在阶段之间抛出 TranscriptionCancelled。"""
+    summary = None
+    optimized = None
+    lang = language or lang_detected
+    if summarize:
+        with logs.stage("summarize"):
+            sentences = summarize_svc(text, max_sentences, strategy)
+        summary = " ".join(sentences)
+    _check_cancel(cancel)
+    if optimize:
+        base = summary or text
+        with logs.stage("optimize"):
+            optimized = optimize_svc(base, style, language)
+    return summary, optimized, lang
+
+
+def parse_audio_form(form: Any) -> Dict[str, Any]:
+    """从 multipart 表单解析音频流程参数（缺省值与 /v1/ai 一致）。"""
+    def get_bool(name: str, default: bool) -> bool:
+        v = form.get(name, None)
+        if v is None:
+            return default
+        return str(v).strip().lower() in ("1", "true", "yes", "on")
+
+    def get_int(name: str, default: int) -> int:
+        v = form.get(name, None)
+        try:
+            return int(v)
+        except Exception:
+            return default
+
+    def get_positive(name: str) -> Optional[float]:
+        try:
+            v = float(form.get(name, None))
+        except Exception:
+            return None
+        return v if v > 0 else None
+
+    return {
+        "summarize": get_bool("summarize", True),
+        "optimize": get_bool("optimize", False),
+        "max_sentences": get_int("max_sentences", 3),
+        "strategy": (form.get("strategy") or "frequency").strip(),
+        "style": (form.get("style") or "concise").strip(),
+        "language": (form.get("language") or None),
+        "initial_prompt": (form.get("initial_prompt") or None),
+        "model": (form.get("model") or None),
+        "compute_type": (form.get("compute_type") or None),
+        "max_audio_s": get_positive("max_audio_s"),
+        "deadline_s": get_positive("deadline_s"),
+    }
+
+
+def run_audio_pipeline(
+    path: str,
+    summarize: bool = True,
+    optimize: bool = False,
+    max_sentences: int = 3,
+    strategy: str = "frequency",
+    style: str = "concise",
+    language: Optional[str] = None,
+    initial_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    compute_type: Optional[str] = None,
+    max_audio_s: Optional[float] = None,
+    deadline_s: Optional[float] = None,
+    started: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """转写音频文件并执行文本流程，返回 AiResponse 字段组成的 dict。转写失败时抛出原始异常。
+
+    deadline_s 从 started（time.monotonic()，缺省为调用时刻）起算；预算用尽时摘要/优化基于已转写的部分文本。
+    """
+    engine = get_stt_engine()
+    deadline = (started if started is not None else time.monotonic()) + deadline_s if deadline_s else None
+    tr = engine.transcribe_detailed(
+        path, language=language, initial_prompt=initial_prompt, model=model, compute_type=compute_type, cancel=cancel,
+        max_audio_s=max_audio_s, deadline=deadline,
+    )
+    _check_cancel(cancel)
+    text = apply_corrections(tr.text, tr.language or "en")
+    summary, optimized, lang_out = run_text_pipeline(
+        text, summarize, optimize, max_sentences, strategy, style, language, tr.language, cancel=cancel
+    )
+    return {
+        "text": text,
+        "summary": summary,
+        "optimized": optimized,
+        "language": lang_out,
+        "engine": engine.name,
+        "tier": tr.tier,
+        "audio_seconds": tr.audio_seconds,
+        "trimmed_seconds": tr.trimmed_seconds,
+        "partial": tr.partial,
+        "covered_range": list(tr.covered_range) if tr.covered_range else None,
+    }
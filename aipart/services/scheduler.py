@@ -0,0 +1,258 @@
+"""
+STT 公平调度：在解码前根据音频头估算代价（时长 × 模型相对开销），按客户端做加权公平排队（WFQ）。
+
+- 代价：WAV 读头部得到精确时长，其他格式按文件大小粗估；乘以模型参数量相对 base 的比例；
+- 每个客户端（X-API-Key，否则客户端 IP）维护虚拟完成时间：F = max(V, 该客户端上次的 F) + 代价 / 权重，
+  空闲槽位总是分给 F 最小的任务——同一客户端的任务依次排开，短任务天然排在前面（最短预期任务优先）；
+- 老化：有效优先级 = F − STT_SCHED_AGING × 已等待秒数，长任务等得越久越靠前，不会被持续到来的短任务饿死；
+- 同时运行的转写数上限 STT_CONCURRENCY；按时长分类（short/medium/long）统计排队等待时间。
+
+异步端点用 `await acquire(...)`，后台线程（异步任务）用 `acquire_blocking(...)`，结束后都需 `release(ticket)`。
+"""
+import asyncio
+import os
+import threading
+import time
+import wave
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .model_registry import model_params_m
+
+# 非 WAV 文件按约 128 kbps 粗估时长
+_FALLBACK_BYTES_PER_S = 16000.0
+_CLASSES: Tuple[Tuple[str, float], ...] = (("short", 30.0), ("medium", 300.0), ("long", float("inf")))
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+def _parse_weights(s: str) -> Dict[str, float]:
+    # "keyA=2,keyB=0.5"
+    out: Dict[str, float] = {}
+    for raw in (s or "").split(","):
+        if "=" not in raw:
+            continue
+        k, v = raw.split("=", 1)
+        try:
+            w = float(v)
+        except ValueError:
+            continue
+        if k.strip() and w > 0:
+            out[k.strip()] = w
+    return out
+
+
+def estimate_audio_seconds(path: str) -> float:
+    """从 WAV 头（装有 soundfile 时也读 FLAC/Ogg 头）读取时长；其他格式按文件大小粗估。"""
+    try:
+        with wave.open(path, "rb") as wf:
+            sr = wf.getframerate()
+            if sr > 0:
+                return wf.getnframes() / float(sr)
+    except Exception:
+        pass
+    try:
+        import soundfile as sf  # type: ignore
+        info = sf.info(path)
+        if info.samplerate > 0 and info.frames > 0:
+            return info.frames / float(info.samplerate)
+    except Exception:
+        pass
+    try:
+        return os.path.getsize(path) / _FALLBACK_BYTES_PER_S
+    except OSError:
+        return 0.0
+
+
+def estimate_cost(path: str, model_name: Optional[str]) -> Tuple[float, float]:
+    """返回 (估算音频时长秒, 代价)。代价以 base 模型解码 1 秒音频为单位。"""
+    audio_s = estimate_audio_seconds(path)
+    factor = model_params_m(model_name or "base") / model_params_m("base")
+    return audio_s, max(0.1, audio_s) * factor
+
+
+def size_class(audio_s: float) -> str:
+    for name, upper in _CLASSES:
+        if audio_s < upper:
+            return name
+    return _CLASSES[-1][0]
+
+
+class Ticket:
+    __slots__ = ("client", "cost", "audio_s", "cls", "start", "finish", "enqueued", "granted", "granted_at", "_wake")
+
+    def __init__(self, client: str, cost: float, audio_s: float) -> None:
+        self.client = client
+        self.cost = cost
+        self.audio_s = audio_s
+        self.cls = size_class(audio_s)
+        self.start = 0.0
+        self.finish = 0.0
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.granted_at = 0.0
+        self._wake: Any = None  # () -> None，由 acquire 设置
+
+
+class FairScheduler:
+    def __init__(self, slots: int = 2, aging: float = 1.0, weights: Optional[Dict[str, float]] = None,
+                 default_weight: float = 1.0) -> None:
+        self.slots = max(1, slots)
+        self.aging = aging
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self._lock = threading.Lock()
+        self._queue: List[Ticket] = []
+        self._running = 0
+        self._vtime = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=512) for name, _ in _CLASSES}
+        self._counts: Dict[str, int] = {name: 0 for name, _ in _CLASSES}
+        # 已完成任务的指数加权平均：latency = 排队 + 执行，service = 执行
+        self.ewma_latency_s: Optional[float] = None
+        self.ewma_service_s: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "FairScheduler":
+        return cls(
+            slots=int(_env_float("STT_CONCURRENCY", 2)),
+            aging=_env_float("STT_SCHED_AGING", 1.0),
+            weights=_parse_weights(os.environ.get("STT_CLIENT_WEIGHTS") or ""),
+        )
+
+    def _enqueue(self, t: Ticket) -> None:
+        # 调用方持有 self._lock
+        weight = self.weights.get(t.client, self.default_weight)
+        t.start = max(self._vtime, self._last_finish.get(t.client, 0.0))
+        t.finish = t.start + t.cost / weight
+        self._last_finish[t.client] = t.finish
+        self._queue.append(t)
+
+    def _dispatch(self) -> List[Ticket]:
+        # 调用方持有 self._lock；返回需要唤醒的任务（在锁外唤醒）
+        woken: List[Ticket] = []
+        now = time.monotonic()
+        while self._running < self.slots and self._queue:
+            best = min(self._queue, key=lambda t: t.finish - self.aging * (now - t.enqueued))
+            self._queue.remove(best)
+            self._running += 1
+            best.granted = True
+            best.granted_at = now
+            self._vtime = max(self._vtime, best.start)
+            self._waits[best.cls].append(now - best.enqueued)
+            self._counts[best.cls] += 1
+            woken.append(best)
+        if not self._queue and len(self._last_finish) > 1024:
+            # 已落后于虚拟时间的客户端与新客户端等价，清理以限制内存
+            self._last_finish = {k: v for k, v in self._last_finish.items() if v > self._vtime}
+        return woken
+
+    def _submit(self, t: Ticket) -> None:
+        with self._lock:
+            self._enqueue(t)
+            woken = self._dispatch()
+        for w in woken:
+            w._wake()
+
+    async def acquire(self, client: str, cost: float, audio_s: float = 0.0) -> Ticket:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        t = Ticket(client, cost, audio_s)
+        t._wake = lambda: loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+        self._submit(t)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # 等待中被取消（如客户端断开）：出队；若恰好已获得槽位则归还
+            with self._lock:
+                if t in self._queue:
+                    self._queue.remove(t)
+                    return_slot = False
+                else:
+                    return_slot = t.granted
+            if return_slot:
+                self.release(t)
+            raise
+        return t
+
+    def acquire_blocking(self, client: str, cost: float, audio_s: float = 0.0) -> Ticket:
+        ev = threading.Event()
+        t = Ticket(client, cost, audio_s)
+        t._wake = ev.set
+        self._submit(t)
+        ev.wait()
+        return t
+
+    def release(self, t: Ticket) -> None:
+        with self._lock:
+            if not t.granted:
+                return
+            t.granted = False
+            self._running = max(0, self._running - 1)
+            now = time.monotonic()
+            self.ewma_latency_s = _ewma(self.ewma_latency_s, now - t.enqueued)
+            self.ewma_service_s = _ewma(self.ewma_service_s, now - t.granted_at)
+            woken = self._dispatch()
+        for w in woken:
+            w._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            classes = {}
+            for name, _ in _CLASSES:
+                w = sorted(self._waits[name])
+                classes[name] = {
+                    "dispatched": self._counts[name],
+                    "queued": sum(1 for t in self._queue if t.cls == name),
+                    "wait_avg_s": round(sum(w) / len(w), 3) if w else None,
+                    "wait_p95_s": round(w[min(len(w) - 1, int(0.95 * (len(w) - 1) + 0.5))], 3) if w else None,
+                    "wait_max_s": round(w[-1], 3) if w else None,
+                }
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "queued": len(self._queue),
+                "queued_cost": round(sum(t.cost for t in self._queue), 1),
+                "ewma_latency_s": _round(self.ewma_latency_s),
+                "ewma_service_s": _round(self.ewma_service_s),
+                "classes": classes,
+            }
+
+    def capacity(self) -> Dict[str, Any]:
+        """供就绪探针/负载均衡使用的轻量视图；saturation = (运行 + 排队) / 槽位数。"""
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "free_slots": max(0, self.slots - self._running),
+                "queued": len(self._queue),
+                "queued_cost": round(sum(t.cost for t in self._queue), 1),
+                "saturation": round((self._running + len(self._queue)) / self.slots, 3),
+                "ewma_latency_s": _round(self.ewma_latency_s),
+                "ewma_service_s": _round(self.ewma_service_s),
+            }
+
+
+def _ewma(prev: Optional[float], sample: float, alpha: float = 0.2) -> float:
+    return sample if prev is None else (1 - alpha) * prev + alpha * sample
+
+
+def _round(v: Optional[float]) -> Optional[float]:
+    return round(v, 3) if v is not None else None
+
+
+_scheduler_singleton: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    global _scheduler_singleton
+    with _scheduler_lock:
+        if _scheduler_singleton is None:
+            _scheduler_singleton = FairScheduler.from_env()
+    return _scheduler_singleton
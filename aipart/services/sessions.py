@@ -0,0 +1,240 @@
+"""
+增量摘要会话（实时转写场景）：客户端只追加新文本，服务端增量维护分句结果与词频，随时给出当前 top-k 摘要。
+
+- 追加时只对新文本分句/分词，未以句末标点结束的尾部暂存，待后续文本补全（或 final=true 时提交）；
+- 追加只登记新句的词（词表编号 + 所属句子下标，各一个 int32 数组）并累加全局词频，
+  开销与新文本长度成正比，与已有转写长度无关；
+- 句子原始得分（句内各词词频之和）推迟到查询时一次向量化计算（bincount），并缓存到下次追加；
+  归一化只是除以最大词频，不改变排序，查询时用原始得分选 top-k；
+- 结果与对全文调用 summarize() 一致（首次出现中文时切换停用词表，会对已有句子重建一次索引）；
+- 会话空闲超过 SESSION_TTL_S 自动过期；单会话文本上限 SESSION_MAX_CHARS，
+  全部会话估算内存超过 SESSIONS_MAX_MB 或数量超过 SESSIONS_MAX 时淘汰最久未用的会话。
+"""
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import metrics
+from .text_utils import CJK_REGEX, split_sentences, tokenize
+
+_TERMINATORS = "。！？.!?\n"
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class SessionLimitError(Exception):
+    """单个会话超过文本上限。"""
+
+
+class SummarySession:
+    def __init__(self, session_id: str, max_sentences: int = 3, strategy: str = "frequency") -> None:
+        self.id = session_id
+        self.max_sentences = max_sentences
+        self.strategy = strategy
+        self.lang = "en"
+        self.sentences: List[str] = []
+        self.tail = ""
+        self.chars = 0
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+        self._reset_index()
+
+    def _reset_index(self) -> None:
+        self.vocab: Dict[str, int] = {}
+        self.freq = np.zeros(64, dtype=np.int64)  # 词表编号 → 全局词频
+        self.tok_ids = array("i")  # 每个词出现一次记一项：词表编号
+        self.tok_sent = array("i")  # 与 tok_ids 对齐：所在句子下标
+        self._raw: Optional[np.ndarray] = None  # 缓存的句子原始得分，追加后失效
+
+    @property
+    def tokens(self) -> int:
+        return len(self.tok_ids)
+
+    @property
+    def approx_bytes(self) -> int:
+        # 字符串按 UCS-2 估算，每个词出现约 8 字节（词表编号 + 句子下标），外加每句对象开销
+        return 2 * (self.chars + len(self.tail)) + 8 * self.tokens + 64 * len(self.sentences)
+
+    def _add_sentences(self, sentences: List[str]) -> None:
+        vocab = self.vocab
+        start = len(self.tok_ids)
+        for j, sent in enumerate(sentences):
+            i = len(self.sentences) + j
+            for t in tokenize(sent, self.lang):
+                tid = vocab.get(t)
+                if tid is None:
+                    tid = vocab[t] = len(vocab)
+                self.tok_ids.append(tid)
+                self.tok_sent.append(i)
+            self.chars += len(sent)
+        if len(vocab) > len(self.freq):
+            grown = np.zeros(max(len(vocab), 2 * len(self.freq)), dtype=np.int64)
+            grown[: len(self.freq)] = self.freq
+            self.freq = grown
+        new_ids = np.frombuffer(self.tok_ids, dtype=np.int32)[start:]
+        np.add.at(self.freq, new_ids, 1)
+        self.sentences.extend(sentences)
+        self._raw = None
+
+    def raw_scores(self) -> np.ndarray:
+        """每句原始得分 = 句内各词（含重复）全局词频之和；按需计算，追加前一直缓存。"""
+        n = len(self.sentences)
+        if self._raw is None or len(self._raw) != n:
+            ids = np.frombuffer(self.tok_ids, dtype=np.int32)
+            sent = np.frombuffer(self.tok_sent, dtype=np.int32)
+            self._raw = np.bincount(sent, weights=self.freq[ids], minlength=n).astype(np.int64)
+        return self._raw
+
+    def _rebuild(self) -> None:
+        sentences = self.sentences
+        self.sentences, self.chars = [], 0
+        self._reset_index()
+        self._add_sentences(sentences)
+
+    def append(self, text: str, final: bool = False, max_chars: int = 0) -> None:
+        if max_chars and self.chars + len(self.tail) + len(text) > max_chars:
+            raise SessionLimitError(f"会话文本超过上限 {max_chars} 字符")
+        if self.lang == "en" and CJK_REGEX.search(text):
+            self.lang = "zh"
+            if self.sentences:
+                self._rebuild()
+        buf = self.tail + text
+        if final:
+            complete, self.tail = buf, ""
+        else:
+            cut = max(buf.rfind(ch) for ch in _TERMINATORS)
+            complete, self.tail = buf[: cut + 1], buf[cut + 1:]
+        if complete:
+            new = split_sentences(complete)
+            if new:
+                self._add_sentences(new)
+        self.last_used = time.time()
+
+    def top(self, k: Optional[int] = None) -> List[str]:
+        k = self.max_sentences if k is None else k
+        n = len(self.sentences)
+        if n == 0 or k <= 0:
+            return []
+        if self.strategy == "lead" or k >= n:
+            return self.sentences[:k]
+        raw = self.raw_scores()
+        # 第 k 大的得分作为门槛；高于门槛的全取，等于门槛的按原文顺序补足（与稳定排序的并列规则一致）
+        thr = np.partition(raw, n - k)[n - k]
+        above = np.flatnonzero(raw > thr)
+        ties = np.flatnonzero(raw == thr)[: k - len(above)]
+        idx = np.sort(np.concatenate((above, ties)))
+        return [self.sentences[int(i)] for i in idx]
+
+    def view(self, k: Optional[int] = None) -> Dict[str, Any]:
+        with self.lock:
+            return self._view(k)
+
+    def _view(self, k: Optional[int]) -> Dict[str, Any]:
+        sentences = self.top(k)
+        return {
+            "session_id": self.id,
+            "summary": " ".join(sentences),
+            "sentences": sentences,
+            "sentence_count": len(self.sentences),
+            "chars": self.chars,
+            "pending_chars": len(self.tail),
+        }
+
+
+class SessionStore:
+    def __init__(self, ttl_s: float = 900.0, max_sessions: int = 1000, max_bytes: int = 256 * 1024 * 1024,
+                 max_chars: int = 2_000_000) -> None:
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, SummarySession]" = OrderedDict()  # LRU：最近使用的在末尾
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        return cls(
+            ttl_s=_env_float("SESSION_TTL_S", 900.0),
+            max_sessions=int(_env_float("SESSIONS_MAX", 1000)),
+            max_bytes=int(_env_float("SESSIONS_MAX_MB", 256) * 1024 * 1024),
+            max_chars=int(_env_float("SESSION_MAX_CHARS", 2_000_000)),
+        )
+
+    def _expire(self, now: float) -> None:
+        # 调用方持有 self._lock；按 LRU 顺序，遇到未过期的即可停止
+        while self._sessions:
+            sid, s = next(iter(self._sessions.items()))
+            if now - s.last_used <= self.ttl_s:
+                break
+            del self._sessions[sid]
+            metrics.inc("sessions_expired")
+
+    def _enforce_caps(self) -> None:
+        while len(self._sessions) > self.max_sessions or (
+            len(self._sessions) > 1 and self.total_bytes() > self.max_bytes
+        ):
+            self._sessions.popitem(last=False)
+            metrics.inc("sessions_evicted")
+
+    def total_bytes(self) -> int:
+        return sum(s.approx_bytes for s in self._sessions.values())
+
+    def create(self, max_sentences: int = 3, strategy: str = "frequency") -> SummarySession:
+        s = SummarySession(uuid.uuid4().hex, max_sentences, strategy)
+        with self._lock:
+            self._expire(time.time())
+            self._sessions[s.id] = s
+            self._enforce_caps()
+        metrics.inc("sessions_created")
+        return s
+
+    def get(self, session_id: str) -> Optional[SummarySession]:
+        with self._lock:
+            self._expire(time.time())
+            s = self._sessions.get(session_id)
+            if s is not None:
+                s.last_used = time.time()
+                self._sessions.move_to_end(session_id)
+            return s
+
+    def append(self, session_id: str, text: str, final: bool = False) -> Optional[SummarySession]:
+        s = self.get(session_id)
+        if s is None:
+            return None
+        with s.lock:
+            s.append(text, final=final, max_chars=self.max_chars)
+        with self._lock:
+            self._enforce_caps()
+        metrics.inc("sessions_appended_chars", len(text))
+        return s
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"active": len(self._sessions), "approx_bytes": self.total_bytes(), "max_bytes": self.max_bytes}
+
+
+_store_singleton: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store_singleton
+    with _store_lock:
+        if _store_singleton is None:
+            _store_singleton = SessionStore.from_env()
+    return _store_singleton
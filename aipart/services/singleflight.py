@@ -0,0 +1,103 @@
+"""
+在途请求合并（single-flight）：内容哈希与参数相同的请求在前一个仍在处理时不再重复计算，而是等待同一次结果。
+
+- 首个请求（leader）创建后台任务执行计算，后到的相同请求（follower）只登记为等待者；
+- 每个等待者通过 asyncio.shield 等待，任一调用方被取消（如客户端断开）不会中断其他人的计算；
+- 只有全部等待者都已取消时才取消后台任务（释放转写槽位）并立即移出表，之后的相同请求另起计算；
+- 结果与异常原样分发给所有等待者；任务结束后立即移出表，之后的相同请求重新计算（不做结果缓存）；
+- REQUEST_COALESCE=0 关闭合并。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+from . import logs
+
+T = TypeVar("T")
+
+
+def request_key(kind: str, content: bytes, params: Mapping[str, Any]) -> str:
+    """按请求类型、参数与内容计算合并键（sha256）。"""
+    h = hashlib.sha256()
+    h.update(kind.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    h.update(b"\0")
+    h.update(content)
+    return h.hexdigest()
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+    def joinable(self) -> bool:
+        # 已取消但尚未结束的计算（工作线程还没走到下一个取消检查点）不能再加入，否则新请求会收到 CancelledError
+        cancelling = getattr(self.task, "cancelling", None)
+        return not self.task.done() and not (cancelling is not None and cancelling())
+
+
+class SingleFlight:
+    """仅在事件循环线程中使用，无需加锁。"""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0  # 复用在途计算的请求数
+        self.abandoned = 0  # 所有等待者都已取消而被取消的计算
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+        call = self._calls.get(key)
+        if call is None or not call.joinable():
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logs.annotate(coalesced=True)  # 计算与各阶段耗时记在首个请求的日志里
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+                self.abandoned += 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self._calls),
+            "waiters": sum(c.waiters for c in self._calls.values()),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
+
+
+_singleflight_singleton: Optional[SingleFlight] = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    global _singleflight_singleton
+    with _singleflight_lock:
+        if _singleflight_singleton is None:
+            enabled = (os.environ.get("REQUEST_COALESCE") or "1").strip() != "0"
+            _singleflight_singleton = SingleFlight(enabled=enabled)
+    return _singleflight_singleton
@@ -0,0 +1,244 @@
+"""
+实时流式转写（/v1/stt/stream）：客户端持续发送原始 PCM 帧，服务端以滚动窗口反复解码，推送临时/最终结果。
+
+- 每收到 STREAM_STEP_S 秒新音频就对「未提交窗口」解码一次，推送 partial；
+- 窗口末尾静音超过 STREAM_ENDPOINT_SILENCE_S（端点）时提交整段为 final；窗口达到 STREAM_WINDOW_S 时
+  提交除最后一段外的所有片段，最后一段留在窗口里继续识别，保证缓冲有上限；
+- 待处理音频超过 STREAM_MAX_BUFFER_S（解码跟不上实时）时丢弃最旧的音频并计数；
+- 纯静音窗口不调用模型；已提交文本的末尾作为下一窗口的 initial_prompt 保持上下文；
+- 连接数上限 STREAM_MAX_CONNECTIONS；每条消息带 latency_ms（窗口内最新音频到达 → 结果发出）。
+
+StreamDecoder 与 WebSocket 无关，decode 函数可注入，便于测试。
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import metrics
+from .audio_prep import TARGET_SR, StreamResampler, frame_db
+
+Segments = List[Tuple[float, float, str]]
+DecodeFn = Callable[[np.ndarray, Optional[str]], Tuple[Segments, Optional[str]]]
+
+END_MESSAGES = {"end", "eof", '{"type":"end"}', '{"type": "end"}'}
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class StreamConfig:
+    def __init__(
+        self,
+        step_s: float = 1.0,
+        window_s: float = 15.0,
+        max_buffer_s: float = 30.0,
+        endpoint_silence_s: float = 0.8,
+        silence_db: float = -45.0,
+        max_connections: int = 4,
+    ) -> None:
+        self.step_s = step_s
+        self.window_s = window_s
+        self.max_buffer_s = max(max_buffer_s, window_s)
+        self.endpoint_silence_s = endpoint_silence_s
+        self.silence_db = silence_db
+        self.max_connections = max_connections
+
+    @classmethod
+    def from_env(cls) -> "StreamConfig":
+        return cls(
+            step_s=_env_float("STREAM_STEP_S", 1.0),
+            window_s=_env_float("STREAM_WINDOW_S", 15.0),
+            max_buffer_s=_env_float("STREAM_MAX_BUFFER_S", 30.0),
+            endpoint_silence_s=_env_float("STREAM_ENDPOINT_SILENCE_S", 0.8),
+            silence_db=_env_float("AUDIO_PREP_SILENCE_DB", -45.0),
+            max_connections=int(_env_float("STREAM_MAX_CONNECTIONS", 4)),
+        )
+
+
+class StreamDecoder:
+    """单个连接的滚动窗口状态。feed() 可在接收协程中调用，step() 在工作线程中执行。"""
+
+    def __init__(self, decode: DecodeFn, config: StreamConfig, sample_rate: int = TARGET_SR) -> None:
+        self.decode = decode
+        self.cfg = config
+        self.sample_rate = sample_rate
+        # 每个连接一个有状态的重采样器：逐帧调用无状态重采样会在帧边界丢样本、产生不连续
+        self._resampler = StreamResampler(sample_rate, TARGET_SR) if sample_rate != TARGET_SR else None
+        self._lock = threading.Lock()
+        self._incoming: List[np.ndarray] = []
+        self._incoming_n = 0
+        self._last_arrival = 0.0  # 最新一帧的到达时间
+        self.buf = np.zeros(0, dtype=np.float32)  # 未提交的 16 kHz 音频
+        self.offset_s = 0.0  # buf[0] 在整条音频中的时间
+        self.received_s = 0.0
+        self.dropped_s = 0.0
+        self.committed: List[str] = []
+        self.language: Optional[str] = None
+        self._last_partial = ""
+        self._frame = int(0.03 * TARGET_SR)
+
+    def feed(self, pcm: bytes) -> None:
+        """追加一帧 16-bit 小端单声道 PCM。"""
+        if len(pcm) % 2:
+            pcm = pcm[:-1]
+        x = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if self._resampler is not None:
+            x = self._resampler.push(x)
+        with self._lock:
+            self._incoming.append(x)
+            self._incoming_n += len(x)
+            self._last_arrival = time.perf_counter()
+
+    def _take_incoming(self) -> float:
+        with self._lock:
+            parts, self._incoming, self._incoming_n = self._incoming, [], 0
+            arrival = self._last_arrival
+        if parts:
+            n = sum(len(p) for p in parts)
+            self.received_s += n / TARGET_SR
+            self.buf = np.concatenate([self.buf] + parts)
+            limit = int(self.cfg.max_buffer_s * TARGET_SR)
+            if len(self.buf) > limit:
+                drop = len(self.buf) - limit
+                self.buf = self.buf[drop:]
+                self.offset_s += drop / TARGET_SR
+                self.dropped_s += drop / TARGET_SR
+                metrics.inc("stt_stream_dropped_seconds", drop / TARGET_SR)
+        return arrival
+
+    def ready(self) -> bool:
+        with self._lock:
+            return self._incoming_n >= int(self.cfg.step_s * TARGET_SR)
+
+    def has_audio(self) -> bool:
+        with self._lock:
+            return bool(self._incoming_n) or len(self.buf) > 0
+
+    def _prompt(self) -> Optional[str]:
+        text = "".join(self.committed).strip()
+        return text[-200:] if text else None
+
+    def _trailing_silence_s(self, audio: np.ndarray) -> float:
+        db = frame_db(audio, self._frame)
+        voiced = np.flatnonzero(db > self.cfg.silence_db)
+        if len(voiced) == 0:
+            return len(audio) / TARGET_SR
+        return (len(db) - 1 - int(voiced[-1])) * self._frame / TARGET_SR
+
+    def _commit(self, segs: Segments, upto: int) -> Dict[str, Any]:
+        text = "".join(t for _, _, t in segs).strip()
+        start = self.offset_s + (segs[0][0] if segs else 0.0)
+        end = self.offset_s + (segs[-1][1] if segs else upto / TARGET_SR)
+        self.buf = self.buf[upto:]
+        self.offset_s += upto / TARGET_SR
+        self._last_partial = ""
+        if text:
+            self.committed.append(text if not self.committed else " " + text)
+        return {"type": "final", "text": text, "start": round(start, 3), "end": round(end, 3)}
+
+    def step(self, final: bool = False) -> Tuple[List[Dict[str, Any]], float]:
+        """解码一次，返回 (待发送消息, 最新音频到达时间)。final=True 时提交窗口内全部音频。"""
+        arrival = self._take_incoming()
+        window_n = int(self.cfg.window_s * TARGET_SR)
+        audio = self.buf[:window_n]
+        if len(audio) == 0:
+            return [], arrival
+        silence = self._trailing_silence_s(audio)
+        if silence >= len(audio) / TARGET_SR:
+            # 纯静音：不调用模型；只保留一小段尾巴，避免吞掉下一句的开头
+            keep = int(min(len(audio), 0.3 * TARGET_SR)) if not final else 0
+            self.buf = self.buf[len(audio) - keep:]
+            self.offset_s += (len(audio) - keep) / TARGET_SR
+            return [], arrival
+        segs, lang = self.decode(audio, self._prompt())
+        self.language = self.language or lang
+        full = len(audio) >= window_n
+        if final or silence >= self.cfg.endpoint_silence_s:
+            return [self._commit(segs, len(audio))], arrival
+        if full:
+            if len(segs) > 1:
+                cut = int(segs[-1][0] * TARGET_SR)
+                if cut > 0:
+                    return [self._commit(segs[:-1], cut)], arrival
+            return [self._commit(segs, len(audio))], arrival
+        text = "".join(t for _, _, t in segs).strip()
+        if text == self._last_partial:
+            return [], arrival
+        self._last_partial = text
+        return [{
+            "type": "partial", "text": text,
+            "start": round(self.offset_s, 3), "end": round(self.offset_s + len(audio) / TARGET_SR, 3),
+        }], arrival
+
+
+class StreamManager:
+    """连接数限制与流式指标。"""
+
+    def __init__(self, config: Optional[StreamConfig] = None) -> None:
+        self.config = config or StreamConfig.from_env()
+        self._lock = threading.Lock()
+        self.active = 0
+        self.total = 0
+        self.rejected = 0
+        self.messages = 0
+        self.ewma_latency_ms: Optional[float] = None
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.config.max_connections:
+                self.rejected += 1
+                return False
+            self.active += 1
+            self.total += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+    def record_latency(self, ms: float) -> None:
+        with self._lock:
+            self.messages += 1
+            e = self.ewma_latency_ms
+            self.ewma_latency_ms = ms if e is None else 0.8 * e + 0.2 * ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "max_connections": self.config.max_connections,
+                "total": self.total,
+                "rejected": self.rejected,
+                "messages": self.messages,
+                "ewma_latency_ms": round(self.ewma_latency_ms, 1) if self.ewma_latency_ms is not None else None,
+            }
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"avg": None, "p95": None, "max": None}
+    s = sorted(samples)
+    return {
+        "avg": round(sum(s) / len(s), 1),
+        "p95": round(s[min(len(s) - 1, int(0.95 * (len(s) - 1) + 0.5))], 1),
+        "max": round(s[-1], 1),
+    }
+
+
+_manager_singleton: Optional[StreamManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_stream_manager() -> StreamManager:
+    global _manager_singleton
+    with _manager_lock:
+        if _manager_singleton is None:
+            _manager_singleton = StreamManager()
+    return _manager_singleton
@@ -1,5 +1,17 @@
-from typing import Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Mapping, Optional, Tuple, Union
+import logging
 import os
+import threading
+import time
+
+from . import logs, metrics
+from .adaptive import TIERS, get_policy
+from .audio_prep import TARGET_SR, prepare_audio
+from .model_registry import ModelKey, ModelRegistry, model_params_m
+
+log = logging.getLogger(__name__)
 
 # 解决 Windows 上 OpenMP 运行时重复加载导致的崩溃（libiomp5md.dll already initialized）
 # 在导入/初始化 STT 引擎之前设置环境变量，避免 502/进程退出
@@ -7,12 +19,57 @@ if os.name == "nt":
     os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
     os.environ.setdefault("OMP_NUM_THREADS", "1")
 
+# 请求可选的模型（STT_ALLOWED_MODELS 可覆盖；环境变量中的默认模型总是允许）
+_DEFAULT_ALLOWED_MODELS = "tiny,base,small,medium"
+_ALLOWED_COMPUTE_TYPES = {
+    "int8", "int8_float32", "int8_float16", "int8_bfloat16", "float16", "bfloat16", "float32", "default", "auto",
+}
+
+
+@dataclass
+class Transcription:
+    text: str
+    language: Optional[str]
+    tier: Optional[str] = None  # 自适应解码档位
+    model: Optional[str] = None
+    audio_seconds: Optional[float] = None  # 原始音频时长
+    trimmed_seconds: Optional[float] = None  # 预处理裁掉的静音时长（未预处理时为 None）
+    partial: bool = False  # 因 deadline / max_audio_s 提前结束，只覆盖了部分音频
+    covered_range: Optional[Tuple[float, float]] = None  # partial 时已转写的原始音频区间（秒）
+
+
+class TranscriptionCancelled(Exception):
+    """调用方已放弃（如客户端断开），转写在片段之间提前结束。"""
+
+
+def _check_cancel(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        metrics.inc("stt_cancelled")
+        raise TranscriptionCancelled("转写已取消")
+
+
+def _parse_temperature(v: Optional[str]) -> Union[float, List[float]]:
+    # 支持单值 "0.0" 或回退序列 "0.0,0.2,0.4"（解码失败时逐级升温重试）
+    try:
+        vals = [float(x) for x in (v or "0.0").split(",") if x.strip()]
+    except Exception:
+        return 0.0
+    if not vals:
+        return 0.0
+    return vals[0] if len(vals) == 1 else vals
+
+
 class STTEngine:
-    def __init__(self) -> None:
+    def __init__(self, env: Optional[Mapping[str, str]] = None) -> None:
+        # env：配置快照（热加载时传入）；为 None 时直接读取 os.environ
+        self._env = dict(env) if env is not None else None
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._retired = False  # 已被新实例替换：新请求转交给当前实例
         self._engine = None
         self._name: Optional[str] = None
-        self._model = None  # cache actual model instance for faster-whisper
         self._fw_opts = None  # decode options for faster-whisper
+        self._registry: Optional[ModelRegistry] = None  # loaded models, keyed by (model, device, compute)
         # Try faster-whisper first, then openai-whisper
         try:
             from faster_whisper import WhisperModel  # type: ignore
@@ -35,78 +92,383 @@ class STTEngine:
     def name(self) -> Optional[str]:
         return self._name
 
+    def _getenv(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        src = os.environ if self._env is None else self._env
+        return src.get(name, default)
+
+    @contextmanager
+    def _track(self) -> Iterator[bool]:
+        """登记一次在途调用；实例已退役时产出 False，调用方应改用 get_stt_engine()。"""
+        with self._cond:
+            if self._retired:
+                active = False
+            else:
+                active = True
+                self._inflight += 1
+        try:
+            yield active
+        finally:
+            if active:
+                with self._cond:
+                    self._inflight -= 1
+                    if self._inflight == 0:
+                        self._cond.notify_all()
+
+    @property
+    def inflight(self) -> int:
+        with self._cond:
+            return self._inflight
+
+    def retire(self, timeout: Optional[float] = None) -> bool:
+        """停止接收新调用并等待在途调用结束，然后释放已加载的模型；超时返回 False（模型保留）。"""
+        with self._cond:
+            self._retired = True
+            drained = self._cond.wait_for(lambda: self._inflight == 0, timeout)
+        if drained and self._registry is not None:
+            self._registry.clear()
+        return drained
+
+    def adopt_models(self, other: "STTEngine") -> int:
+        """复用另一实例已加载且键相同的模型（模型与精度不变时热加载无需重新加载权重）。
+
+        cpu_threads / num_workers 只在构造模型时生效、不在注册表键中：二者变化时不复用，全部重新加载。"""
+        if other._registry is None or other._name != self._name:
+            return 0
+        if other._model_init_opts() != self._model_init_opts():
+            return 0
+        n = 0
+        registry = self._get_registry()
+        for key, model in other._registry.items():
+            registry.adopt(key, model)
+            n += 1
+        return n
+
     def _read_bool(self, env: str, default: bool) -> bool:
-        v = os.environ.get(env)
+        v = self._getenv(env)
         if v is None:
             return default
         return str(v).strip().lower() in ("1", "true", "yes", "on")
 
-    def _ensure_fw_model(self):
-        if self._model is None:
-            from faster_whisper import WhisperModel  # type: ignore
-            # 默认提升到 base，兼顾准确率
-            model_size = (os.environ.get("FAST_WHISPER_MODEL", "base") or "base").strip()
-            compute_type = (os.environ.get("FAST_WHISPER_COMPUTE", "int8") or "int8").strip()
-            device = (os.environ.get("FAST_WHISPER_DEVICE", "cpu") or "cpu").strip()
-            self._model = WhisperModel(model_size, device=device, compute_type=compute_type)
+    def _read_float(self, env: str, default: float) -> float:
+        try:
+            return float((self._getenv(env) or str(default)).strip())
+        except Exception:
+            return default
+
+    def _get_registry(self) -> ModelRegistry:
+        if self._registry is None:
+            # 内存预算（MB），超出时按 LRU 淘汰；<=0 表示不限
+            budget = self._read_float("STT_MODEL_MEM_BUDGET_MB", 2048)
+            self._registry = ModelRegistry(self._load_model, budget_mb=budget)
+        return self._registry
+
+    def _load_fw_opts(self) -> dict:
+        if self._fw_opts is None:
             # 推理选项（解码阶段）
             self._fw_opts = {
-                "beam_size": int(os.environ.get("FAST_WHISPER_BEAM_SIZE", "5") or 5),
-                "best_of": int(os.environ.get("FAST_WHISPER_BEST_OF", "5") or 5),
+                "beam_size": int(self._getenv("FAST_WHISPER_BEAM_SIZE", "5") or 5),
+                "best_of": int(self._getenv("FAST_WHISPER_BEST_OF", "5") or 5),
                 "vad_filter": self._read_bool("FAST_WHISPER_VAD_FILTER", True),
-                "temperature": float(os.environ.get("FAST_WHISPER_TEMPERATURE", "0.0") or 0.0),
-                "no_speech_threshold": float(os.environ.get("FAST_WHISPER_NO_SPEECH_THRESHOLD", "0.6") or 0.6),
-                "compression_ratio_threshold": float(os.environ.get("FAST_WHISPER_COMPRESSION_RATIO_THRESHOLD", "2.4") or 2.4),
+                "temperature": _parse_temperature(self._getenv("FAST_WHISPER_TEMPERATURE")),
+                "no_speech_threshold": float(self._getenv("FAST_WHISPER_NO_SPEECH_THRESHOLD", "0.6") or 0.6),
+                "compression_ratio_threshold": float(self._getenv("FAST_WHISPER_COMPRESSION_RATIO_THRESHOLD", "2.4") or 2.4),
                 "condition_on_previous_text": self._read_bool("FAST_WHISPER_CONDITION_ON_PREV", True),
-                "fixed_language": (os.environ.get("FAST_WHISPER_LANGUAGE") or None),
-                "task": (os.environ.get("FAST_WHISPER_TASK", "transcribe") or "transcribe").strip(),
+                "fixed_language": (self._getenv("FAST_WHISPER_LANGUAGE") or None),
+                "task": (self._getenv("FAST_WHISPER_TASK", "transcribe") or "transcribe").strip(),
                 # 初始提示（偏置提示）
-                "initial_prompt": (os.environ.get("FAST_WHISPER_INITIAL_PROMPT") or None),
+                "initial_prompt": (self._getenv("FAST_WHISPER_INITIAL_PROMPT") or None),
             }
-            # 打印一次关键配置便于诊断（避免噪音，不频繁打印）
-            try:
-                print(
-                    f"[STT] faster-whisper model={model_size}, device={device}, compute={compute_type}, "
-                    f"opts={{beam={self._fw_opts['beam_size']}, best_of={self._fw_opts['best_of']}, vad={self._fw_opts['vad_filter']}, "
-                    f"temp={self._fw_opts['temperature']}, lang={self._fw_opts['fixed_language']}, task={self._fw_opts['task']}, prompt={'yes' if self._fw_opts['initial_prompt'] else 'no'}}}"
+        return self._fw_opts
+
+    def resolve_model(self, model: Optional[str] = None, compute_type: Optional[str] = None) -> ModelKey:
+        """解析请求指定的模型/精度（缺省取环境变量），不在白名单内时抛 ValueError。"""
+        if self._name == "faster-whisper":
+            # 默认提升到 base，兼顾准确率
+            default_model = (self._getenv("FAST_WHISPER_MODEL", "base") or "base").strip()
+            default_compute = (self._getenv("FAST_WHISPER_COMPUTE", "int8") or "int8").strip()
+            device = (self._getenv("FAST_WHISPER_DEVICE", "cpu") or "cpu").strip()
+        else:
+            default_model = (self._getenv("OPENAI_WHISPER_MODEL", "base") or "base").strip()
+            default_compute = "default"
+            device = "cpu"
+        name = (model or "").strip() or default_model
+        ctype = (compute_type or "").strip() or default_compute
+        allowed = {m.strip() for m in (self._getenv("STT_ALLOWED_MODELS") or _DEFAULT_ALLOWED_MODELS).split(",") if m.strip()}
+        allowed.add(default_model)
+        if name not in allowed:
+            raise ValueError(f"不支持的模型: {name}（可选 {', '.join(sorted(allowed))}）")
+        if self._name == "faster-whisper":
+            if ctype not in _ALLOWED_COMPUTE_TYPES:
+                raise ValueError(f"不支持的计算精度: {ctype}（可选 {', '.join(sorted(_ALLOWED_COMPUTE_TYPES))}）")
+        else:
+            ctype = "default"
+        return ModelKey(name, device, ctype)
+
+    def _model_init_opts(self) -> dict:
+        # cpu_threads=0 使用 CTranslate2 默认线程数；num_workers>1 时同一模型可并行处理多个请求
+        return {
+            "cpu_threads": int(self._read_float("FAST_WHISPER_CPU_THREADS", 0)),
+            "num_workers": max(1, int(self._read_float("FAST_WHISPER_NUM_WORKERS", 1))),
+        }
+
+    def _load_model(self, key: ModelKey):
+        if self._name == "faster-whisper":
+            from faster_whisper import WhisperModel  # type: ignore
+            model = WhisperModel(key.name, device=key.device, compute_type=key.compute_type, **self._model_init_opts())
+            opts = self._load_fw_opts()
+            # 记录一次关键配置便于诊断（每个模型仅在加载时记录）
+            log.info("loaded faster-whisper model", extra={"fields": {
+                "model": key.name, "device": key.device, "compute_type": key.compute_type,
+                "beam_size": opts.get("beam_size"), "best_of": opts.get("best_of"), "vad": opts.get("vad_filter"),
+                "temperature": opts.get("temperature"), "fixed_language": opts.get("fixed_language"),
+                "task": opts.get("task"), "initial_prompt": bool(opts.get("initial_prompt")),
+            }})
+            return model
+        import whisper  # type: ignore
+        return whisper.load_model(key.name)
+
+    def _ensure_fw_model(self, model: Optional[str] = None, compute_type: Optional[str] = None):
+        self._load_fw_opts()
+        return self._get_registry().get(self.resolve_model(model, compute_type))
+
+    def model_stats(self) -> dict:
+        if self._registry is None:
+            return {"budget_mb": None, "used_mb": 0, "models": []}
+        return self._registry.stats()
+
+    def _pick_small_model(self, key: ModelKey) -> ModelKey:
+        """自适应最低档使用的小模型；仅当它确实比当前模型更小且在白名单内时才切换。"""
+        small = (self._getenv("STT_ADAPTIVE_SMALL_MODEL") or "tiny").strip()
+        if small == key.name or model_params_m(small) >= model_params_m(key.name):
+            return key
+        try:
+            return self.resolve_model(small, key.compute_type)
+        except ValueError:
+            return key
+
+    def transcribe_detailed(
+        self,
+        file_path: str,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+        max_audio_s: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> "Transcription":
+        """cancel 置位后在下一个片段边界停止解码并抛出 TranscriptionCancelled。
+
+        max_audio_s：只转写原始音频的前 N 秒；deadline：time.monotonic() 截止时刻，到点后不再取下一段。
+        二者触发时返回已解码的部分（partial=True，covered_range 为覆盖区间）；deadline 以片段为粒度，
+        仅 faster-whisper 支持。
+        """
+        limits = {"max_audio_s": max_audio_s, "deadline": deadline}
+        with self._track() as active:
+            if not active:
+                return get_stt_engine().transcribe_detailed(
+                    file_path, language, initial_prompt, model, compute_type, cancel=cancel, **limits
                 )
-            except Exception:
-                pass
-        return self._model
+            return self._transcribe_detailed(file_path, language, initial_prompt, model, compute_type, cancel, **limits)
 
-    def transcribe(self, file_path: str, language: Optional[str] = None, initial_prompt: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    def _transcribe_detailed(
+        self,
+        file_path: str,
+        language: Optional[str],
+        initial_prompt: Optional[str],
+        model: Optional[str],
+        compute_type: Optional[str],
+        cancel: Optional[threading.Event] = None,
+        max_audio_s: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> "Transcription":
         if not self.available:
             raise RuntimeError("No STT engine available. Please install faster-whisper or openai-whisper.")
-        # faster-whisper path
+        key = self.resolve_model(model, compute_type)
+        # 预处理：重采样/下混/裁剪首尾静音；无法解码的格式交给模型自行处理
+        try:
+            with logs.stage("audio_prep"):
+                prep = prepare_audio(file_path)
+        except Exception:
+            prep = None
+        audio_in = file_path  # 路径或 16 kHz 单声道样本
+        trimmed: Optional[float] = None
+        offset = 0.0  # audio_in 起点在原始音频中的位置
+        truncated = False  # 已按 max_audio_s 截断
+        if prep is not None:
+            trimmed = prep.trimmed_seconds
+            logs.annotate(audio_s=round(prep.original_seconds, 3))
+            metrics.inc("stt_audio_seconds_total", prep.original_seconds)
+            metrics.inc("stt_trimmed_seconds_total", prep.trimmed_seconds)
+            if prep.silent:
+                # 整段静音：不调用模型，直接返回空结果
+                metrics.inc("stt_skipped_silent")
+                fixed = (self._fw_opts or {}).get("fixed_language") if self._name == "faster-whisper" else None
+                return Transcription(
+                    "", language or fixed, model=key.name, audio_seconds=prep.original_seconds, trimmed_seconds=trimmed
+                )
+            audio_in = prep.samples
+            offset = prep.offset_seconds
+            if max_audio_s is not None and prep.original_seconds > max_audio_s:
+                truncated = True
+                audio_in = audio_in[:int(max(0.0, max_audio_s - offset) * TARGET_SR)]
+                if not len(audio_in):
+                    metrics.inc("stt_partial")
+                    return Transcription(
+                        "", language, model=key.name, audio_seconds=prep.original_seconds, trimmed_seconds=trimmed,
+                        partial=True, covered_range=(0.0, round(max_audio_s, 3)),
+                    )
+        _check_cancel(cancel)
+        policy = get_policy()
+        # openai-whisper 不参与降档，始终按 full 档执行
+        tier = policy.acquire() if self._name == "faster-whisper" else TIERS[0]
+        t0 = time.perf_counter()
+        audio_s: Optional[float] = None
+        try:
+            # faster-whisper path
+            if self._name == "faster-whisper":
+                opts = dict(self._load_fw_opts())
+                opts.update(tier.opts)
+                if tier.small_model:
+                    key = self._pick_small_model(key)
+                fw_model = self._get_registry().get(key)
+                lang = language or opts.get("fixed_language")
+                prompt = initial_prompt or opts.get("initial_prompt")
+                segments, info = fw_model.transcribe(
+                    audio_in,
+                    language=lang,
+                    task=opts.get("task", "transcribe"),
+                    beam_size=opts.get("beam_size", 5),
+                    best_of=opts.get("best_of", 5),
+                    vad_filter=opts.get("vad_filter", True),
+                    temperature=opts.get("temperature", 0.0),
+                    no_speech_threshold=opts.get("no_speech_threshold", 0.6),
+                    compression_ratio_threshold=opts.get("compression_ratio_threshold", 2.4),
+                    condition_on_previous_text=opts.get("condition_on_previous_text", True),
+                    initial_prompt=prompt,
+                )
+                # segments 是惰性生成器：每次迭代才解码下一段，取消或超出预算时不再继续消费
+                parts: List[str] = []
+                covered_end = 0.0
+                stopped = False
+                it = iter(segments)
+                while True:
+                    _check_cancel(cancel)
+                    if deadline is not None and time.monotonic() >= deadline:
+                        stopped = True
+                        break
+                    seg = next(it, None)
+                    if seg is None:
+                        break
+                    if max_audio_s is not None and offset + seg.start >= max_audio_s:
+                        stopped = True
+                        covered_end = max_audio_s
+                        break
+                    parts.append(seg.text)
+                    covered_end = offset + seg.end
+                text = "".join(parts)
+                detected = getattr(info, "language", None)
+                audio_s = getattr(info, "duration", None)
+                partial = stopped or truncated
+                if partial:
+                    metrics.inc("stt_partial")
+                    if not stopped:  # 截断后的样本已全部转写
+                        covered_end = max_audio_s
+                    elif max_audio_s is not None:
+                        covered_end = min(covered_end, max_audio_s)
+                return Transcription(
+                    text.strip(), lang or detected, tier=tier.name, model=key.name,
+                    audio_seconds=prep.original_seconds if prep is not None else audio_s, trimmed_seconds=trimmed,
+                    partial=partial, covered_range=(0.0, round(covered_end, 3)) if partial else None,
+                )
+            # openai-whisper path（模型同样经注册表缓存，避免每次请求重新加载）
+            else:
+                ow_model = self._get_registry().get(key)
+                # openai-whisper 使用 prompt 参数名
+                result = ow_model.transcribe(audio_in, language=language, prompt=initial_prompt)
+                segs = result.get("segments") or []
+                audio_s = prep.original_seconds if prep is not None else (segs[-1].get("end") if segs else None)
+                text = result.get("text", "")
+                if max_audio_s is not None and not truncated and any(sg.get("start", 0.0) >= max_audio_s for sg in segs):
+                    # 未预处理（无法截断样本）：丢弃超出部分的片段
+                    truncated = True
+                    text = "".join(sg.get("text", "") for sg in segs if sg.get("start", 0.0) < max_audio_s)
+                if truncated:
+                    metrics.inc("stt_partial")
+                return Transcription(
+                    text.strip(), result.get("language"), tier=tier.name, model=key.name,
+                    audio_seconds=audio_s, trimmed_seconds=trimmed,
+                    partial=truncated, covered_range=(0.0, round(max_audio_s, 3)) if truncated else None,
+                )
+        finally:
+            elapsed = time.perf_counter() - t0
+            logs.add_stage("decode", elapsed)
+            logs.annotate(model=key.name, tier=tier.name)
+            if prep is None and audio_s is not None:
+                logs.annotate(audio_s=round(audio_s, 3))
+            if self._name == "faster-whisper":
+                policy.release(tier, elapsed, audio_s)
+
+    def transcribe_window(
+        self,
+        samples,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        compute_type: Optional[str] = None,
+    ) -> Tuple[List[Tuple[float, float, str]], Optional[str]]:
+        """流式识别用：对一段 16 kHz 单声道 float32 样本做低延迟解码，返回 ([(start, end, text)], 语言)。
+
+        与 transcribe_detailed 共用已加载的模型；默认贪心解码（STREAM_BEAM_SIZE=1）、不做 VAD、
+        不以前文为条件（窗口会反复重解码，前文由调用方通过 initial_prompt 传入）。
+        """
+        with self._track() as active:
+            if not active:
+                return get_stt_engine().transcribe_window(samples, language, initial_prompt, model, compute_type)
+            return self._transcribe_window(samples, language, initial_prompt, model, compute_type)
+
+    def _transcribe_window(
+        self,
+        samples,
+        language: Optional[str],
+        initial_prompt: Optional[str],
+        model: Optional[str],
+        compute_type: Optional[str],
+    ) -> Tuple[List[Tuple[float, float, str]], Optional[str]]:
+        if not self.available:
+            raise RuntimeError("No STT engine available. Please install faster-whisper or openai-whisper.")
+        key = self.resolve_model(model, compute_type)
         if self._name == "faster-whisper":
-            model = self._ensure_fw_model()
-            opts = self._fw_opts or {}
+            opts = self._load_fw_opts()
             lang = language or opts.get("fixed_language")
-            prompt = initial_prompt or opts.get("initial_prompt")
-            segments, info = model.transcribe(
-                file_path,
+            segments, info = self._get_registry().get(key).transcribe(
+                samples,
                 language=lang,
                 task=opts.get("task", "transcribe"),
-                beam_size=opts.get("beam_size", 5),
-                best_of=opts.get("best_of", 5),
-                vad_filter=opts.get("vad_filter", True),
-                temperature=opts.get("temperature", 0.0),
-                no_speech_threshold=opts.get("no_speech_threshold", 0.6),
-                compression_ratio_threshold=opts.get("compression_ratio_threshold", 2.4),
-                condition_on_previous_text=opts.get("condition_on_previous_text", True),
-                initial_prompt=prompt,
+                beam_size=int(self._read_float("STREAM_BEAM_SIZE", 1)),
+                vad_filter=False,
+                temperature=0.0,
+                condition_on_previous_text=False,
+                initial_prompt=initial_prompt,
             )
-            text = "".join(seg.text for seg in segments)
-            detected = getattr(info, "language", None)
-            return text.strip(), (lang or detected)
-        # openai-whisper path
-        else:
-            import whisper  # type: ignore
-            model_size = (os.environ.get("OPENAI_WHISPER_MODEL", "base") or "base").strip()
-            model = whisper.load_model(model_size)
-            # openai-whisper 使用 prompt 参数名
-            result = model.transcribe(file_path, language=language, prompt=initial_prompt)
-            return (result.get("text", "").strip(), result.get("language"))
+            out = [(float(seg.start), float(seg.end), seg.text) for seg in segments]
+            return out, lang or getattr(info, "language", None)
+        result = self._get_registry().get(key).transcribe(
+            samples, language=language, prompt=initial_prompt, condition_on_previous_text=False
+        )
+        out = [(float(seg.get("start", 0.0)), float(seg.get("end", 0.0)), seg.get("text", "")) for seg in result.get("segments") or []]
+        return out, result.get("language")
+
+    def transcribe(
+        self,
+        file_path: str,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        compute_type: Optional[str] = None,
+    ) -> Tuple[str, Optional[str]]:
+        r = self.transcribe_detailed(file_path, language, initial_prompt, model=model, compute_type=compute_type)
+        return r.text, r.language
 
     def warm_up(self) -> bool:
         """预热模型：
@@ -127,9 +489,19 @@ class STTEngine:
 
 
 _engine_singleton: Optional[STTEngine] = None
+_engine_lock = threading.Lock()
 
 def get_stt_engine() -> STTEngine:
     global _engine_singleton
-    if _engine_singleton is None:
-        _engine_singleton = STTEngine()
-    return _engine_singleton
+    with _engine_lock:
+        if _engine_singleton is None:
+            _engine_singleton = STTEngine()
+        return _engine_singleton
+
+
+def swap_stt_engine(new: STTEngine) -> Optional[STTEngine]:
+    """原子替换全局引擎，返回旧实例（由调用方负责 retire）。"""
+    global _engine_singleton
+    with _engine_lock:
+        old, _engine_singleton = _engine_singleton, new
+    return old
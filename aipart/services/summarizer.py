@@ -1,17 +1,69 @@
-from typing import List
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
 from .text_utils import split_sentences, detect_language, sentence_scores
 
 
-def summarize(text: str, max_sentences: int = 3, strategy: str = "frequency") -> List[str]:
+def _compact_threshold() -> int:
+    """超过该字符数的文本改用紧凑表示（compact_text）；0 表示总是使用。"""
+    try:
+        return int((os.environ.get("SUMMARY_COMPACT_THRESHOLD") or "100000").strip())
+    except Exception:
+        return 100000
+
+
+class Ranking:
+    """一次切分与打分的结果：order 为句子下标按得分降序（同分取靠前者）排列，
+    任意长度的摘要都是 order 的前缀，无需重新切分/打分。lead 策略按原文顺序，scores 为 None。"""
+
+    __slots__ = ("_sentence", "order", "scores")
+
+    def __init__(self, sentence: Callable[[int], str], order: Sequence[int], scores: Optional[Sequence[float]]) -> None:
+        self._sentence = sentence
+        self.order = order
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def sentence(self, i: int) -> str:
+        return self._sentence(i)
+
+    def top(self, k: int) -> List[str]:
+        """前 k 名，按原文顺序返回。"""
+        return [self._sentence(i) for i in sorted(self.order[:k])]
+
+    def ranked(self) -> List[Tuple[int, str, Optional[float]]]:
+        """全部句子按名次排列：(原文下标, 句子, 得分)。"""
+        return [
+            (i, self._sentence(i), float(self.scores[i]) if self.scores is not None else None) for i in self.order
+        ]
+
+
+def rank_sentences(text: str, strategy: str = "frequency") -> Ranking:
+    if len(text or "") >= _compact_threshold():
+        return _rank_compact(text, strategy)
     sentences = split_sentences(text)
-    if not sentences:
-        return []
-    if strategy == "lead":
-        return sentences[: max_sentences]
+    if strategy == "lead" or not sentences:
+        return Ranking(sentences.__getitem__, range(len(sentences)), None)
     # frequency-based ranking
     lang = detect_language(text)
-    scored = sentence_scores(sentences, lang)
-    # sort by score desc, but keep original order when equal; then select top k by index order
-    top_idx = sorted(sorted(scored, key=lambda x: -x[1])[: max_sentences], key=lambda x: x[0])
-    return [sentences[i] for i, _ in top_idx]
+    scores = [s for _, s in sentence_scores(sentences, lang)]
+    # sort by score desc, keeping original order when equal
+    order = sorted(range(len(sentences)), key=lambda i: -scores[i])
+    return Ranking(sentences.__getitem__, order, scores)
+
 
+def _rank_compact(text: str, strategy: str) -> Ranking:
+    import numpy as np
+    from .compact_text import CompactDoc, sentence_spans
+    text = (text or "").strip()
+    if strategy == "lead":
+        starts, ends = sentence_spans(text)
+        return Ranking(lambda i: text[starts[i]:ends[i]], range(len(starts)), None)
+    doc = CompactDoc(text, detect_language(text))
+    scores = doc.scores()
+    return Ranking(doc.sentence, np.argsort(-scores, kind="stable").tolist(), scores)
+
+
+def summarize(text: str, max_sentences: int = 3, strategy: str = "frequency") -> List[str]:
+    return rank_sentences(text, strategy).top(max_sentences)
@@ -1,5 +1,5 @@
 import re
-from typing import List, Tuple, Dict, Optional
+from typing import List, Mapping, Tuple, Dict, Optional
 import os
 import json
 
@@ -91,33 +91,39 @@ def _parse_pairs(s: str) -> Dict[str, str]:
     return out
 
 
-def _load_corrections_once():
+def load_corrections(env: Optional[Mapping[str, str]] = None) -> None:
+    """（重新）读取术语纠错配置；env 缺省为 os.environ。热加载时以新配置整体替换。"""
     global _CORR_LOADED, _CORR_ENABLE, _CORR_MAP
-    if _CORR_LOADED:
-        return
-    _CORR_ENABLE = _str_to_bool(os.environ.get("TEXT_CORRECT_ENABLE"), False)
+    src = os.environ if env is None else env
     def parse_map(env_json: str, env_pairs: str) -> Dict[str, str]:
-        js = os.environ.get(env_json)
+        js = src.get(env_json)
         if js:
             try:
                 m = json.loads(js)
                 return {str(k): str(v) for k, v in m.items()}
             except Exception:
                 pass
-        pairs = os.environ.get(env_pairs)
+        pairs = src.get(env_pairs)
         if pairs:
             try:
                 return _parse_pairs(pairs)
             except Exception:
                 pass
         return {}
-    _CORR_MAP = {
+    corr_map = {
         "zh": parse_map("TEXT_CORRECT_MAP_ZH", "TEXT_CORRECT_PAIRS_ZH"),
         "en": parse_map("TEXT_CORRECT_MAP_EN", "TEXT_CORRECT_PAIRS_EN"),
     }
+    _CORR_MAP = corr_map
+    _CORR_ENABLE = _str_to_bool(src.get("TEXT_CORRECT_ENABLE"), False)
     _CORR_LOADED = True
 
 
+def _load_corrections_once():
+    if not _CORR_LOADED:
+        load_corrections()
+
+
 def apply_corrections(text: str, lang: str) -> str:
     _load_corrections_once()
     if not _CORR_ENABLE or not text:
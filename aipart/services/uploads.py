@@ -0,0 +1,268 @@
+"""
+可续传分块上传：弱网下长录音上传中断后，只需从已接收的偏移继续发送，不必重传整个文件。
+
+- 创建上传时声明总长度 length，得到 upload_id；
+- 每个分块带 offset，直接写入磁盘文件的对应位置（不在内存中拼接）；
+  分块请求中途断开时，已到达的字节同样保留，offset 只会前进；
+- 已接收偏移 = 数据文件大小（只允许 offset ≤ 已接收偏移，重叠部分内容相同，跳过不写），
+  元数据（length、创建时间）存为同目录下的 JSON 文件，服务重启后仍可续传；
+- 接收完整后 finalize 转写，成功即删除；超过 UPLOADS_TTL_S 无新分块的上传由后台线程清理；
+- 同一上传的写入/转写/删除互斥：对数据文件加 flock 排他锁，多进程（预派生 worker）共享同一目录时同样生效；
+  无 fcntl 的平台退化为进程内互斥。
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+log = logging.getLogger(__name__)
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _env_float(env: str, default: float) -> float:
+    try:
+        return float((os.environ.get(env) or str(default)).strip())
+    except Exception:
+        return default
+
+
+class UploadError(Exception):
+    """分块请求无效；status 为建议的 HTTP 状态码。"""
+
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class UploadStore:
+    def __init__(self, root: str, ttl_s: float = 3600.0, max_bytes: int = 200 * 1024 * 1024,
+                 max_active: int = 200, gc_interval_s: float = 300.0) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.max_active = max_active
+        self.gc_interval_s = gc_interval_s
+        self._lock = threading.Lock()
+        self._busy: Dict[str, Optional[int]] = {}  # 本进程已 claim 的 upload_id → 持有 flock 的文件描述符
+        self._stop = threading.Event()
+        self._gc_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "UploadStore":
+        return cls(
+            os.environ.get("UPLOADS_DIR") or os.path.join(os.getcwd(), "var", "uploads"),
+            ttl_s=_env_float("UPLOADS_TTL_S", 3600.0),
+            max_bytes=int(_env_float("UPLOADS_MAX_MB", 200) * 1024 * 1024),
+            max_active=int(_env_float("UPLOADS_MAX", 200)),
+            gc_interval_s=_env_float("UPLOADS_GC_INTERVAL_S", 300.0),
+        )
+
+    def start(self) -> None:
+        if self.gc_interval_s > 0 and self._gc_thread is None:
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="upload-gc", daemon=True)
+            self._gc_thread.start()
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.json")
+
+    def data_path(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.part")
+
+    def _ids(self) -> Iterator[str]:
+        for name in os.listdir(self.root):
+            if name.endswith(".json") and _ID_RE.match(name[:-5]):
+                yield name[:-5]
+
+    def create(self, length: int) -> Dict[str, Any]:
+        if length > self.max_bytes:
+            raise UploadError(413, f"文件过大，限制为 {self.max_bytes // (1024 * 1024)}MB")
+        if sum(1 for _ in self._ids()) >= self.max_active:
+            raise UploadError(429, "未完成的上传数已达上限，请稍后重试")
+        upload_id = uuid.uuid4().hex
+        meta = {"length": length, "created_at": time.time()}
+        open(self.data_path(upload_id), "wb").close()
+        # 先写临时文件再改名，崩溃时不会留下半截元数据
+        tmp = self._meta_path(upload_id) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(upload_id))
+        metrics.inc("uploads_created")
+        return self._view(upload_id, meta)
+
+    def _load(self, upload_id: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        if not _ID_RE.match(upload_id or ""):
+            return None
+        try:
+            with open(self._meta_path(upload_id), encoding="utf-8") as f:
+                meta = json.load(f)
+            st = os.stat(self.data_path(upload_id))
+        except (FileNotFoundError, ValueError):
+            return None
+        meta["offset"] = st.st_size
+        meta["updated_at"] = st.st_mtime
+        if (time.time() if now is None else now) - st.st_mtime > self.ttl_s:
+            return None
+        return meta
+
+    def _view(self, upload_id: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        offset = meta.get("offset", 0)
+        return {
+            "upload_id": upload_id,
+            "offset": offset,
+            "length": meta["length"],
+            "complete": offset >= meta["length"],
+            "expires_at": meta.get("updated_at", meta["created_at"]) + self.ttl_s,
+        }
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        meta = self._load(upload_id)
+        return None if meta is None else self._view(upload_id, meta)
+
+    def claim(self, upload_id: str) -> bool:
+        """独占一个上传（写入、转写或删除期间）；已被本进程或其他进程占用时返回 False。"""
+        with self._lock:
+            if upload_id in self._busy:
+                return False
+            fd = None
+            if fcntl is not None and _ID_RE.match(upload_id or ""):
+                try:
+                    fd = os.open(self.data_path(upload_id), os.O_RDONLY)
+                except FileNotFoundError:
+                    fd = None  # 上传不存在，后续操作自会返回 404
+                else:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        os.close(fd)
+                        return False
+            self._busy[upload_id] = fd
+            return True
+
+    def unclaim(self, upload_id: str) -> None:
+        with self._lock:
+            fd = self._busy.pop(upload_id, None)
+        if fd is not None:
+            os.close(fd)  # 关闭即释放 flock
+
+    def open_chunk(self, upload_id: str, offset: int) -> "ChunkWriter":
+        """校验 offset 并返回写入器；调用方须已 claim 该上传。"""
+        meta = self._load(upload_id)
+        if meta is None:
+            raise UploadError(404, "上传不存在或已过期")
+        if offset > meta["offset"]:
+            raise UploadError(409, f"offset 超过已接收的 {meta['offset']} 字节，请从该位置续传")
+        return ChunkWriter(self.data_path(upload_id), offset, meta["length"], meta["offset"])
+
+    def delete(self, upload_id: str) -> bool:
+        if not _ID_RE.match(upload_id or ""):
+            return False
+        found = False
+        for path in (self._meta_path(upload_id), self.data_path(upload_id)):
+            try:
+                os.remove(path)
+                found = True
+            except FileNotFoundError:
+                pass
+        return found
+
+    def gc_once(self, now: Optional[float] = None) -> int:
+        """删除超过 TTL 没有新分块的上传（正在处理的除外），返回删除数。"""
+        now = time.time() if now is None else now
+        removed = 0
+        for upload_id in list(self._ids()):
+            if not self.claim(upload_id):
+                continue
+            try:
+                if self._load(upload_id, now) is None and self.delete(upload_id):
+                    removed += 1
+                    metrics.inc("uploads_expired")
+            finally:
+                self.unclaim(upload_id)
+        # 元数据写入前崩溃遗留的孤立数据文件
+        for name in os.listdir(self.root):
+            p = os.path.join(self.root, name)
+            stem = name.split(".")[0]
+            try:
+                if not os.path.exists(self._meta_path(stem)) and os.path.getmtime(p) < now - self.ttl_s:
+                    os.remove(p)
+            except Exception:
+                pass
+        return removed
+
+    def _gc_loop(self) -> None:
+        while not self._stop.wait(self.gc_interval_s):
+            try:
+                self.gc_once()
+            except Exception as e:
+                log.warning("gc failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        active, received = 0, 0
+        for upload_id in self._ids():
+            try:
+                received += os.path.getsize(self.data_path(upload_id))
+                active += 1
+            except OSError:
+                pass
+        return {"active": active, "received_bytes": received, "busy": len(self._busy)}
+
+    def shutdown(self) -> None:
+        self._stop.set()
+
+
+class ChunkWriter:
+    """把分块按到达顺序写到文件的 offset 处；超过声明长度的部分拒绝写入。
+
+    与已接收字节重叠的部分内容相同，不再重写，因此本分块只会在文件末尾追加，
+    失败时 rollback() 截断到写入前的长度即可撤销。
+    """
+
+    def __init__(self, path: str, offset: int, length: int, received: int) -> None:
+        self.position = offset
+        self.length = length
+        self.received = received
+        self._f = open(path, "r+b")
+        self._f.seek(received)
+
+    def write(self, data: bytes) -> None:
+        if self.position + len(data) > self.length:
+            raise UploadError(400, f"分块超出声明的总长度 {self.length} 字节")
+        skip = min(len(data), max(0, self.received - self.position))
+        self.position += len(data)
+        if skip < len(data):
+            self._f.write(data[skip:] if skip else data)
+        metrics.inc("uploads_bytes", len(data))
+
+    def rollback(self) -> None:
+        """丢弃本分块追加的字节（请求体损坏等非断开错误时调用）。"""
+        self._f.truncate(self.received)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+_uploads_singleton: Optional[UploadStore] = None
+_uploads_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    global _uploads_singleton
+    with _uploads_lock:
+        if _uploads_singleton is None:
+            _uploads_singleton = UploadStore.from_env()
+            _uploads_singleton.start()
+    return _uploads_singleton
@@ -1,5 +1,10 @@
+import os
+
 from uvicorn import run
 
 if __name__ == "__main__":
+    # 设置 PREFORK_WORKERS（正整数或 auto）且平台支持 fork 时，启用预派生多进程模式
+    if os.environ.get("PREFORK_WORKERS") and hasattr(os, "fork"):
+        from aipart.prefork import serve_from_env
+        raise SystemExit(serve_from_env(host="0.0.0.0", port=8080))
     run("aipart.app:app", host="0.0.0.0", port=8080, reload=False)
-
@@ -0,0 +1,74 @@
+"""
+faster-whisper 自动调优（离线）：用校准音频实测精度 / 线程 / worker / beam 组合，打印各次试验并保存本机最优配置。
+
+保存后服务启动时（STT_AUTOTUNE=apply，默认）自动应用；运行中的服务可用 POST /admin/reload 立即生效。
+
+示例：
+  python scripts/autotune_stt.py
+  python scripts/autotune_stt.py --model small --concurrency 4 --beams 1,5
+"""
+import argparse
+import json
+import os
+import sys
+
+# 将项目根目录加入 sys.path，保证可导入 aipart
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from aipart.services.autotune import AutoTuner, host_fingerprint, save_result  # noqa: E402
+from aipart.services.hot_reload import load_config  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="faster-whisper 自动调优")
+    p.add_argument("--model", default=None, help="模型（默认 FAST_WHISPER_MODEL 或 base）")
+    p.add_argument("--clip", default=None, help="校准音频（默认 data/nihao.wav）")
+    p.add_argument("--concurrency", type=int, default=None, help="测吞吐的并发路数")
+    p.add_argument("--repeats", type=int, default=None, help="每个配置重复次数")
+    p.add_argument("--beams", default=None, help="候选 beam_size，逗号分隔（默认 1,2,5）")
+    p.add_argument("--no-save", action="store_true", help="只打印，不保存结果")
+    p.add_argument("--json", action="store_true", help="以 JSON 输出完整结果")
+    args = p.parse_args(argv)
+
+    try:
+        import faster_whisper  # noqa: F401
+    except Exception:
+        print("[Error] 未安装 faster-whisper", file=sys.stderr)
+        return 1
+
+    cfg = load_config(include_tuned=False)
+    if args.model:
+        cfg["FAST_WHISPER_MODEL"] = args.model
+    tuner = AutoTuner.from_env(cfg, log=print)  # 命令行直接打印各候选配置的进度
+    if args.clip:
+        tuner.clip = args.clip
+    if args.concurrency:
+        tuner.concurrency = max(1, args.concurrency)
+    if args.repeats:
+        tuner.repeats = max(1, args.repeats)
+    if args.beams:
+        tuner.beam_sizes = tuple(int(b) for b in args.beams.split(",") if b.strip())
+
+    host, info = host_fingerprint()
+    print(f"host {host}: {info['cpu']} x{info['cpus']}, model={tuner.model}, concurrency={tuner.concurrency}")
+    result = tuner.run()
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'compute':<14}{'threads':>8}{'workers':>8}{'beam':>6}{'rtf':>9}{'tput(x)':>9}")
+        for t in result["trials"]:
+            c = t["config"]
+            tail = f"{t['rtf']:>9.3f}{t['throughput']:>9.2f}" if "error" not in t else f"  error: {t['error']}"
+            print(f"{c['compute_type']:<14}{c['cpu_threads']:>8}{c['num_workers']:>8}{c['beam_size']:>6}{tail}")
+        base = result["baseline"]
+        print(f"best: {result['config']}  rtf={result['rtf']} throughput={result['throughput']}x "
+              f"(baseline rtf={base['rtf']} throughput={base['throughput']}x), {result['elapsed_s']}s")
+    if not args.no_save:
+        print(f"saved to {save_result(result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
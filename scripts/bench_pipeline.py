@@ -0,0 +1,98 @@
+"""
+一体化流程端到端基准：把 manifest 中的音频并发上传到运行中的服务（/v1/ai 或 /v1/stt），
+统计延迟分位数、失败数与吞吐（每秒处理的音频秒数）。
+
+示例：
+  python run_server.py            # 另开终端启动服务
+  python scripts/bench_pipeline.py --manifest data/corpus/manifest.json --concurrency 4 --max-duration 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+BASE = os.environ.get("BASE", "http://127.0.0.1:8080")
+
+
+def load_manifest(path: str, kinds=None, max_duration=None):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    return [
+        dict(e, abs_path=os.path.join(base, e["path"]))
+        for e in manifest["files"]
+        if (not kinds or e["kind"] in kinds) and (max_duration is None or e["duration_s"] <= max_duration)
+    ]
+
+
+def percentile(values, q: float) -> float:
+    s = sorted(values)
+    if not s:
+        return 0.0
+    k = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[k]
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="一体化流程（HTTP）基准")
+    p.add_argument("--manifest", default=os.path.join(os.getcwd(), "data", "corpus", "manifest.json"))
+    p.add_argument("--base", default=BASE, help="服务地址，默认读取环境变量 BASE")
+    p.add_argument("--endpoint", choices=["/v1/ai", "/v1/stt"], default="/v1/ai")
+    p.add_argument("--kinds", default=None, help="只测这些类型，逗号分隔")
+    p.add_argument("--max-duration", type=float, default=None, help="跳过超过该时长（秒）的文件")
+    p.add_argument("--concurrency", type=int, default=1, help="并发请求数")
+    p.add_argument("--rounds", type=int, default=1, help="整份语料重复发送的轮数")
+    p.add_argument("--json", default=None, help="把逐请求结果写入该 JSON 文件")
+    args = p.parse_args(argv)
+
+    kinds = {k.strip() for k in args.kinds.split(",")} if args.kinds else None
+    files = load_manifest(args.manifest, kinds, args.max_duration) * max(1, args.rounds)
+    if not files:
+        print("[Error] manifest 中没有符合条件的文件", file=sys.stderr)
+        return 1
+
+    client = httpx.Client(base_url=args.base, timeout=None,
+                          limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency))
+
+    def send(e):
+        # 字段投影是查询参数（表单中的 fields 会被忽略）
+        ai = args.endpoint == "/v1/ai"
+        data = {"summarize": "1"} if ai else {}
+        params = {"fields": "summary,language,audio_seconds"} if ai else {}
+        t0 = time.perf_counter()
+        try:
+            with open(e["abs_path"], "rb") as f:
+                r = client.post(args.endpoint, files={"file": (os.path.basename(e["path"]), f, "audio/wav")},
+                                data=data, params=params)
+            status = r.status_code
+        except Exception as ex:
+            status = f"error: {ex}"
+        return {"path": e["path"], "duration_s": e["duration_s"], "status": status, "latency_s": time.perf_counter() - t0}
+
+    t0 = time.perf_counter()
+    with client, ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(send, files))
+    wall = time.perf_counter() - t0
+
+    ok = [r for r in results if r["status"] == 200]
+    lat = [r["latency_s"] for r in ok]
+    audio = sum(r["duration_s"] for r in ok)
+    print(f"请求 {len(results)}，成功 {len(ok)}，失败 {len(results) - len(ok)}，并发 {args.concurrency}，总耗时 {wall:.2f}s")
+    if lat:
+        print(f"延迟 p50 {percentile(lat, 0.5):.3f}s  p95 {percentile(lat, 0.95):.3f}s  max {max(lat):.3f}s")
+        print(f"吞吐 {len(ok) / wall:.2f} req/s，{audio / wall:.1f} 音频秒/秒")
+    failed = {str(r["status"]) for r in results if r["status"] != 200}
+    if failed:
+        print(f"失败状态: {sorted(failed)}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+STT 基准（进程内）：按 scripts/generate_corpus.py 生成的 manifest 逐个文件测量
+- 预处理（解码/下混/重采样/裁静音）耗时；
+- 转写耗时与实时率 RTF（墙钟时间 / 音频时长，越小越快）。
+
+未安装 STT 引擎或指定 --prep-only 时只测预处理。
+
+示例：
+  python scripts/generate_corpus.py --durations 1,10
+  python scripts/bench_stt.py --manifest data/corpus/manifest.json --kinds padded,tone --max-duration 60
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+# 将项目根目录加入 sys.path，保证可导入 aipart
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from aipart.services.audio_prep import prepare_audio  # noqa: E402
+from aipart.services.stt import get_stt_engine  # noqa: E402
+
+
+def load_manifest(path: str, kinds=None, max_duration=None):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    files = []
+    for e in manifest["files"]:
+        if kinds and e["kind"] not in kinds:
+            continue
+        if max_duration is not None and e["duration_s"] > max_duration:
+            continue
+        files.append(dict(e, abs_path=os.path.join(base, e["path"])))
+    return files
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="STT 预处理/转写基准")
+    p.add_argument("--manifest", default=os.path.join(ROOT, "data", "corpus", "manifest.json"))
+    p.add_argument("--kinds", default=None, help="只测这些类型，逗号分隔")
+    p.add_argument("--max-duration", type=float, default=None, help="跳过超过该时长（秒）的文件")
+    p.add_argument("--repeat", type=int, default=1, help="每个文件重复次数（取中位数）")
+    p.add_argument("--prep-only", action="store_true", help="只测预处理")
+    p.add_argument("--model", default=None, help="转写使用的模型（需在白名单内）")
+    p.add_argument("--json", default=None, help="把逐文件结果写入该 JSON 文件")
+    args = p.parse_args(argv)
+
+    kinds = {k.strip() for k in args.kinds.split(",")} if args.kinds else None
+    files = load_manifest(args.manifest, kinds, args.max_duration)
+    if not files:
+        print("[Error] manifest 中没有符合条件的文件", file=sys.stderr)
+        return 1
+
+    engine = None
+    if not args.prep_only:
+        engine = get_stt_engine()
+        if not engine.available:
+            print("[Warn] STT 引擎不可用，仅测量预处理", file=sys.stderr)
+            engine = None
+        else:
+            engine.warm_up()
+
+    rows = []
+    for e in files:
+        prep_t, stt_t = [], []
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            prepare_audio(e["abs_path"])
+            prep_t.append(time.perf_counter() - t0)
+            if engine is not None:
+                t0 = time.perf_counter()
+                engine.transcribe_detailed(e["abs_path"], model=args.model)
+                stt_t.append(time.perf_counter() - t0)
+        row = {
+            "path": e["path"],
+            "kind": e["kind"],
+            "sample_rate": e["sample_rate"],
+            "duration_s": e["duration_s"],
+            "prep_s": statistics.median(prep_t),
+            "stt_s": statistics.median(stt_t) if stt_t else None,
+        }
+        row["prep_x_realtime"] = e["duration_s"] / row["prep_s"] if row["prep_s"] > 0 else None
+        row["rtf"] = row["stt_s"] / e["duration_s"] if row["stt_s"] is not None else None
+        rows.append(row)
+        rtf = f"{row['rtf']:.3f}" if row["rtf"] is not None else "-"
+        print(f"{e['path']:<36} {e['duration_s']:>8.1f}s  prep {row['prep_s'] * 1000:>9.1f} ms  RTF {rtf}")
+
+    by_sr = defaultdict(list)
+    for r in rows:
+        by_sr[r["sample_rate"]].append(r)
+    print("\n按采样率汇总：")
+    for sr in sorted(by_sr):
+        g = by_sr[sr]
+        audio = sum(r["duration_s"] for r in g)
+        prep = sum(r["prep_s"] for r in g)
+        line = f"  {sr:>6} Hz  音频 {audio:>8.1f}s  预处理 {prep:.3f}s（{audio / prep:,.0f}x 实时）"
+        if engine is not None:
+            stt = sum(r["stt_s"] for r in g)
+            line += f"  转写 {stt:.2f}s（RTF {stt / audio:.3f}）"
+        print(line)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"engine": engine.name if engine else None, "rows": rows}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+对比摘要两种中间表示的峰值内存（tracemalloc）与耗时：
+- list：split_sentences + sentence_scores（每句/每词一个字符串对象）；
+- compact：句子偏移 + 词 ID 数组 + 单次请求词表（aipart/services/compact_text.py）。
+
+示例：
+  python scripts/bench_summary_memory.py --sizes 100000,1000000,10000000 --lang zh
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# 将项目根目录加入 sys.path，保证可导入 aipart
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from aipart.services.compact_text import CompactDoc  # noqa: E402
+from aipart.services.text_utils import detect_language, sentence_scores, split_sentences  # noqa: E402
+
+EN_WORDS = ("speech model audio transcript summary latency request server client memory token sentence "
+            "whisper batch decode stream window buffer index score vocabulary offset").split()
+ZH_WORDS = list("语音识别模型摘要文本句子内存延迟请求服务客户端缓冲窗口解码索引词表偏移分数会议记录")
+
+
+def make_text(size: int, lang: str, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    parts, n = [], 0
+    while n < size:
+        if lang == "zh":
+            s = "".join(rng.choice(ZH_WORDS) for _ in range(rng.randint(8, 30))) + rng.choice("。！？")
+        else:
+            s = " ".join(rng.choice(EN_WORDS) for _ in range(rng.randint(5, 20))).capitalize() + rng.choice(".!?") + " "
+        parts.append(s)
+        n += len(s)
+    return "".join(parts)[:size]
+
+
+def run_list(text: str, k: int):
+    sentences = split_sentences(text)
+    scored = sentence_scores(sentences, detect_language(text))
+    top = sorted(sorted(scored, key=lambda x: -x[1])[:k], key=lambda x: x[0])
+    return [sentences[i] for i, _ in top]
+
+
+def run_compact(text: str, k: int):
+    return CompactDoc(text, detect_language(text)).top_sentences(k)
+
+
+def measure(fn, text: str, k: int):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(text, k)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, peak, elapsed
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="摘要中间表示峰值内存对比")
+    p.add_argument("--sizes", default="100000,1000000,5000000", help="文本字符数列表")
+    p.add_argument("--lang", choices=["en", "zh"], default="en")
+    p.add_argument("--k", type=int, default=5, help="摘要句数")
+    args = p.parse_args(argv)
+
+    print(f"{'chars':>10} {'input MB':>9} {'list peak MB':>13} {'compact peak MB':>16} {'ratio':>6} {'list s':>7} {'compact s':>10}")
+    for size in (int(v) for v in args.sizes.split(",") if v.strip()):
+        text = make_text(size, args.lang)
+        input_mb = sys.getsizeof(text) / 1e6
+        a, peak_list, t_list = measure(run_list, text, args.k)
+        b, peak_compact, t_compact = measure(run_compact, text, args.k)
+        if a != b:
+            print(f"[Warn] {size}: 两种实现结果不一致", file=sys.stderr)
+        print(f"{size:>10} {input_mb:>9.1f} {peak_list / 1e6:>13.1f} {peak_compact / 1e6:>16.1f} "
+              f"{peak_list / max(1, peak_compact):>6.1f} {t_list:>7.2f} {t_compact:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
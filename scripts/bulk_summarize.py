@@ -0,0 +1,281 @@
+"""
+离线批量摘要：对大型 JSONL / 纯文本语料多进程运行 summarizer.summarize（可选 optimizer.optimize），结果逐块写入 JSONL。
+
+- 输入：.jsonl 每行一个 JSON 对象（正文取 --text-field，编号取 --id-field）；其他文件每个非空行为一篇文档；
+- 主进程只用 mmap 按 --chunk-mb 在换行处切分字节区间，工作进程各自 mmap 读取自己的区间，原文不经进程间传输；
+- 结果按输入顺序写出（无编号时以 source + 字节偏移标识），每块写完即刷新并更新检查点 <out>.ckpt；
+- 中断后用相同参数重跑即从检查点续跑（截掉检查点之后的半截输出）；输入或参数变化时需加 --restart；
+- 运行中定期在 stderr 打印进度、吞吐（文档/秒、MB/秒）与预计剩余时间。
+
+示例：
+  python scripts/bulk_summarize.py data/archive/*.jsonl --out summaries.jsonl
+  python scripts/bulk_summarize.py notes.txt --out notes.summary.jsonl --optimize --style bullet --workers 8
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# 将项目根目录加入 sys.path，保证可导入 aipart
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from aipart.services.optimizer import optimize  # noqa: E402
+from aipart.services.summarizer import summarize  # noqa: E402
+
+Chunk = Tuple[int, int, int]  # (输入文件序号, 起始字节, 结束字节)
+
+_opts: Dict[str, Any] = {}
+
+
+def is_jsonl(path: str) -> bool:
+    return path.lower().endswith((".jsonl", ".ndjson"))
+
+
+def plan_chunks(paths: List[str], chunk_bytes: int) -> List[Chunk]:
+    """在换行处把每个文件切成约 chunk_bytes 的区间（只扫描切分点附近，不读全文）。"""
+    chunks: List[Chunk] = []
+    for i, path in enumerate(paths):
+        size = os.path.getsize(path)
+        if size == 0:
+            continue
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                nl = mm.find(b"\n", min(size, start + chunk_bytes) - 1)
+                end = size if nl < 0 else nl + 1
+                chunks.append((i, start, end))
+                start = end
+    return chunks
+
+
+def _init_worker(opts: Dict[str, Any]) -> None:
+    _opts.clear()
+    _opts.update(opts)
+
+
+def _records(path: str, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            stop = end if nl < 0 else nl + 1
+            line = mm[pos:stop].strip()
+            if line:
+                yield pos, line
+            pos = stop
+
+
+def _summarize_doc(text: str) -> Dict[str, Any]:
+    sentences = summarize(text, _opts["max_sentences"], _opts["strategy"])
+    out: Dict[str, Any] = {"summary": " ".join(sentences), "sentences": sentences}
+    if _opts["optimize"]:
+        out["optimized"] = optimize(text, _opts["style"], _opts["language"])
+    return out
+
+
+def process_chunk(chunk: Chunk) -> Tuple[bytes, int, int]:
+    """处理一个区间，返回 (JSONL 结果字节, 文档数, 失败数)。"""
+    idx, start, end = chunk
+    path = _opts["paths"][idx]
+    source = os.path.basename(path)
+    jsonl = is_jsonl(path)
+    lines: List[str] = []
+    docs = errors = 0
+    for offset, raw in _records(path, start, end):
+        docs += 1
+        rec: Dict[str, Any] = {}
+        try:
+            if jsonl:
+                obj = json.loads(raw)
+                if not isinstance(obj, dict):
+                    raise ValueError("需为 JSON 对象")
+                doc_id = obj.get(_opts["id_field"])
+                text = obj.get(_opts["text_field"])
+                if not isinstance(text, str):
+                    raise ValueError(f"缺少文本字段 {_opts['text_field']}")
+            else:
+                doc_id, text = None, raw.decode("utf-8", errors="replace")
+            rec = {"id": doc_id} if doc_id is not None else {"source": source, "offset": offset}
+            rec.update(_summarize_doc(text))
+        except Exception as e:
+            errors += 1
+            rec = {"source": source, "offset": offset, **rec, "error": str(e)}
+        lines.append(json.dumps(rec, ensure_ascii=False))
+    body = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+    return body, docs, errors
+
+
+def _ordered_map(pool: ProcessPoolExecutor, chunks: List[Chunk], window: int) -> Iterator[Tuple[bytes, int, int]]:
+    """按输入顺序产出结果；最多 window 个块在途，写出慢时不会在内存里堆积已完成的结果。"""
+    pending: Deque["Future[Tuple[bytes, int, int]]"] = deque()
+    it = iter(chunks)
+    for chunk in it:
+        pending.append(pool.submit(process_chunk, chunk))
+        if len(pending) >= window:
+            break
+    while pending:
+        result = pending.popleft().result()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append(pool.submit(process_chunk, nxt))
+        yield result
+
+
+def fingerprint(paths: List[str], opts: Dict[str, Any], chunk_bytes: int) -> Dict[str, Any]:
+    """检查点只在输入文件（大小/修改时间）与影响输出的参数都未变时可用。"""
+    files = []
+    for p in paths:
+        st = os.stat(p)
+        files.append([os.path.abspath(p), st.st_size, st.st_mtime_ns])
+    keys = ("text_field", "id_field", "max_sentences", "strategy", "optimize", "style", "language")
+    return {"files": files, "chunk_bytes": chunk_bytes, "options": {k: opts[k] for k in keys}}
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: str, data: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _fmt_eta(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+def run(paths: List[str], out: str, opts: Dict[str, Any], workers: int = 1, chunk_bytes: int = 4 << 20,
+        restart: bool = False, max_chunks: Optional[int] = None, progress_interval: float = 5.0,
+        log=None) -> Dict[str, Any]:
+    """批量处理并返回统计；max_chunks 限定本次最多处理的块数（之后可续跑）。"""
+    log = log or (lambda msg: print(msg, file=sys.stderr))
+    opts = dict(opts, paths=[os.path.abspath(p) for p in paths])
+    ckpt_path = out + ".ckpt"
+    fp = fingerprint(paths, opts, chunk_bytes)
+    chunks = plan_chunks(opts["paths"], chunk_bytes)
+    total_bytes = sum(e - s for _, s, e in chunks)
+
+    state = {"fingerprint": fp, "done_chunks": 0, "out_bytes": 0, "docs": 0, "errors": 0, "elapsed_s": 0.0}
+    ckpt = None if restart else load_checkpoint(ckpt_path)
+    if ckpt is not None:
+        if ckpt.get("fingerprint") != fp:
+            raise SystemExit(f"[Error] {ckpt_path} 与当前输入或参数不一致；确认后加 --restart 重新开始")
+        state.update({k: ckpt[k] for k in ("done_chunks", "out_bytes", "docs", "errors", "elapsed_s")})
+        log(f"从检查点续跑：已完成 {state['done_chunks']}/{len(chunks)} 块，{state['docs']} 篇")
+
+    if ckpt is not None and (os.path.getsize(out) if os.path.exists(out) else 0) < state["out_bytes"]:
+        raise SystemExit(f"[Error] {out} 缺失或比检查点记录的短，无法续跑；加 --restart 重新开始")
+    mode = "r+b" if ckpt is not None and os.path.exists(out) else "wb"
+    todo = chunks[state["done_chunks"]:]
+    if max_chunks is not None:
+        todo = todo[:max(0, max_chunks)]
+
+    done_bytes = sum(e - s for _, s, e in chunks[:state["done_chunks"]])
+    run_bytes = run_docs = 0
+    t0 = time.perf_counter()
+    last_report = t0
+    with open(out, mode) as f:
+        # 丢弃上次中断时检查点之后写出的半截结果
+        f.seek(state["out_bytes"])
+        f.truncate()
+        if workers > 1 and len(todo) > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(opts,))
+            results = _ordered_map(pool, todo, window=workers * 4)
+        else:
+            pool = None
+            _init_worker(opts)
+            results = map(process_chunk, todo)
+        try:
+            for (_, s, e), (body, docs, errors) in zip(todo, results):
+                f.write(body)
+                f.flush()
+                state["done_chunks"] += 1
+                state["out_bytes"] += len(body)
+                state["docs"] += docs
+                state["errors"] += errors
+                run_bytes += e - s
+                run_docs += docs
+                now = time.perf_counter()
+                state["elapsed_s"] = round((ckpt or {}).get("elapsed_s", 0.0) + now - t0, 3)
+                save_checkpoint(ckpt_path, state)
+                if now - last_report >= progress_interval:
+                    last_report = now
+                    rate = run_bytes / max(1e-9, now - t0)
+                    remaining = total_bytes - done_bytes - run_bytes
+                    log(f"{(done_bytes + run_bytes) / max(1, total_bytes):6.1%}  {state['docs']} 篇  "
+                        f"{run_docs / (now - t0):.0f} 篇/s  {rate / 1e6:.1f} MB/s  ETA {_fmt_eta(remaining / max(1e-9, rate))}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    wall = time.perf_counter() - t0
+    complete = state["done_chunks"] >= len(chunks)
+    summary = {
+        "complete": complete,
+        "chunks": len(chunks),
+        "done_chunks": state["done_chunks"],
+        "docs": state["docs"],
+        "errors": state["errors"],
+        "run_docs": run_docs,
+        "run_s": round(wall, 3),
+        "docs_per_s": round(run_docs / wall, 1) if wall > 0 else None,
+        "mb_per_s": round(run_bytes / wall / 1e6, 2) if wall > 0 else None,
+    }
+    log(f"{'完成' if complete else '已暂停'}：{state['done_chunks']}/{len(chunks)} 块，共 {state['docs']} 篇"
+        f"（失败 {state['errors']}），本次 {run_docs} 篇 / {wall:.1f}s")
+    return summary
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="离线批量摘要（JSONL / 纯文本）")
+    p.add_argument("inputs", nargs="+", help="输入文件：.jsonl 每行一个 JSON 对象，其他文件每行一篇")
+    p.add_argument("--out", required=True, help="输出 JSONL；检查点写入 <out>.ckpt")
+    p.add_argument("--text-field", default="text")
+    p.add_argument("--id-field", default="id")
+    p.add_argument("--max-sentences", type=int, default=3)
+    p.add_argument("--strategy", choices=["frequency", "lead"], default="frequency")
+    p.add_argument("--optimize", action="store_true", help="同时输出 optimize 结果")
+    p.add_argument("--style", choices=["concise", "bullet", "formal"], default="concise")
+    p.add_argument("--language", default=None, help="optimize 的语言（默认自动检测）")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（默认 CPU 核数）")
+    p.add_argument("--chunk-mb", type=float, default=4.0, help="每个工作块的输入大小（MB）")
+    p.add_argument("--restart", action="store_true", help="忽略已有检查点，从头开始")
+    p.add_argument("--max-chunks", type=int, default=None, help="本次最多处理的块数（分批回填，之后续跑）")
+    p.add_argument("--progress-interval", type=float, default=5.0, help="进度打印间隔（秒）")
+    args = p.parse_args(argv)
+
+    missing = [x for x in args.inputs if not os.path.isfile(x)]
+    if missing:
+        print(f"[Error] 找不到输入文件: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    opts = {
+        "text_field": args.text_field, "id_field": args.id_field, "max_sentences": args.max_sentences,
+        "strategy": args.strategy, "optimize": args.optimize, "style": args.style, "language": args.language,
+    }
+    summary = run(
+        args.inputs, args.out, opts, workers=max(1, args.workers), chunk_bytes=max(1, int(args.chunk_mb * 1024 * 1024)),
+        restart=args.restart, max_chunks=args.max_chunks, progress_interval=args.progress_interval,
+    )
+    print(json.dumps(summary, ensure_ascii=False))
+    # 全部文档都失败（多半是字段名不对）时返回非零
+    return 1 if summary["docs"] and summary["errors"] == summary["docs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+合成音频语料生成器（NumPy 向量化），为 STT / 一体化流程基准测试提供可复现的输入。
+
+- 类型：tone（正弦音）、noise（白噪声）、padded（首尾静音 + 中间类语音的调幅扫频）、multi（多声道不同频率）；
+- 采样率默认 8000/16000/44100/48000，时长 1 秒 ~ 1 小时；
+- 按块（默认 10 秒）合成并整块写入，长音频内存占用恒定；可用 --jobs 多进程并行生成；
+- 输出 manifest.json，列出每个文件的参数与有效语音区间，供 scripts/bench_stt.py、scripts/bench_pipeline.py 使用。
+
+示例：
+  python scripts/generate_corpus.py                      # small 预设：1s/10s
+  python scripts/generate_corpus.py --preset full        # 含 1min/10min/1h
+  python scripts/generate_corpus.py --kinds tone,padded --rates 16000 --durations 1,30
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+KINDS = ("tone", "noise", "padded", "multi")
+PRESETS = {
+    "small": [1.0, 10.0],
+    "full": [1.0, 10.0, 60.0, 600.0, 3600.0],
+}
+DEFAULT_RATES = [8000, 16000, 44100, 48000]
+AMP = 0.5
+
+
+def _signal(kind: str, t: np.ndarray, sr: int, channels: int, duration: float,
+            rng: np.random.Generator, state: Dict[str, float]) -> np.ndarray:
+    """合成一个块，返回 (n, channels) 的 float32；t 为该块各样本的绝对时间（秒），state 保存跨块相位。"""
+    if kind == "tone":
+        x = AMP * np.sin(2 * np.pi * 440.0 * t)
+    elif kind == "noise":
+        x = 0.3 * rng.standard_normal(len(t))
+    elif kind == "padded":
+        # 首尾各留 20%（至多 2 秒）静音，中间为 4 Hz 调幅的 200~800 Hz 扫频，近似语音能量包络
+        lo, hi = _speech_range(kind, duration)
+        f = 200.0 + 600.0 * ((t / 3.0) % 1.0)
+        ph = state.get("phase", 0.0) + 2 * np.pi * np.cumsum(f) / sr
+        state["phase"] = float(ph[-1]) if len(ph) else state.get("phase", 0.0)
+        x = AMP * np.sin(ph) * (0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t))
+        x = np.where((t >= lo) & (t < hi), x, 0.0)
+    elif kind == "multi":
+        freqs = 220.0 * (1 + np.arange(channels))
+        return (AMP * np.sin(2 * np.pi * np.outer(t, freqs))).astype(np.float32)
+    else:
+        raise ValueError(f"unknown kind: {kind}")
+    x = x.astype(np.float32)
+    return np.repeat(x[:, None], channels, axis=1) if channels > 1 else x[:, None]
+
+
+def _speech_range(kind: str, duration: float) -> List[float]:
+    if kind == "padded":
+        pad = min(2.0, 0.2 * duration)
+        return [pad, duration - pad]
+    return [0.0, duration]
+
+
+def write_clip(path: str, kind: str, sr: int, duration: float, channels: int, seed: int,
+               block_s: float = 10.0) -> Dict[str, Any]:
+    """按块合成并写入 16-bit PCM WAV，返回 manifest 条目。"""
+    rng = np.random.default_rng(seed)
+    total = int(round(duration * sr))
+    block = max(1, int(block_s * sr))
+    state: Dict[str, float] = {}
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.setnframes(total)  # 预写正确的头，避免关闭时回写
+        for start in range(0, total, block):
+            t = np.arange(start, min(total, start + block), dtype=np.int64) / float(sr)
+            x = _signal(kind, t, sr, channels, duration, rng, state)
+            pcm = (np.clip(x, -1.0, 1.0) * 32767.0).astype("<i2")
+            wf.writeframes(pcm.tobytes())
+    return {
+        "kind": kind,
+        "sample_rate": sr,
+        "channels": channels,
+        "duration_s": duration,
+        "speech_s": _speech_range(kind, duration),
+        "bytes": os.path.getsize(path),
+        "seed": seed,
+    }
+
+
+def _job(args: Dict[str, Any]) -> Dict[str, Any]:
+    entry = write_clip(args["abs_path"], args["kind"], args["sr"], args["duration"], args["channels"], args["seed"])
+    entry["path"] = args["rel_path"]
+    return entry
+
+
+def _fmt_duration(d: float) -> str:
+    if d >= 3600 and d % 3600 == 0:
+        return f"{int(d // 3600)}h"
+    if d >= 60 and d % 60 == 0:
+        return f"{int(d // 60)}m"
+    return f"{d:g}s"
+
+
+def build_specs(kinds: List[str], rates: List[int], durations: List[float], channels: int, seed: int,
+                out: str) -> List[Dict[str, Any]]:
+    specs = []
+    for i, (kind, sr, d) in enumerate((k, r, d) for k in kinds for r in rates for d in durations):
+        ch = max(2, channels) if kind == "multi" else channels
+        rel = f"{kind}_{sr}_{_fmt_duration(d)}_{ch}ch.wav"
+        specs.append({"kind": kind, "sr": sr, "duration": d, "channels": ch, "seed": seed + i,
+                      "rel_path": rel, "abs_path": os.path.join(out, rel)})
+    return specs
+
+
+def _csv(value: str, cast) -> list:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="生成可复现的合成音频语料与 manifest.json")
+    p.add_argument("--out", default=os.path.join(os.getcwd(), "data", "corpus"), help="输出目录，默认 data/corpus")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="small", help="时长预设（--durations 优先）")
+    p.add_argument("--kinds", default=",".join(KINDS), help=f"类型，逗号分隔，可选 {','.join(KINDS)}")
+    p.add_argument("--rates", default=",".join(map(str, DEFAULT_RATES)), help="采样率列表")
+    p.add_argument("--durations", default=None, help="时长（秒）列表，如 1,10,60")
+    p.add_argument("--channels", type=int, default=1, help="声道数（multi 类型至少 2），默认 1")
+    p.add_argument("--seed", type=int, default=1234, help="随机种子（噪声可复现）")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    args = p.parse_args(argv)
+
+    kinds = _csv(args.kinds, str)
+    bad = [k for k in kinds if k not in KINDS]
+    if bad:
+        print(f"[Error] 未知类型: {bad}", file=sys.stderr)
+        return 2
+    durations = _csv(args.durations, float) if args.durations else PRESETS[args.preset]
+    os.makedirs(args.out, exist_ok=True)
+    specs = build_specs(kinds, _csv(args.rates, int), durations, max(1, args.channels), args.seed, args.out)
+
+    t0 = time.perf_counter()
+    if args.jobs > 1 and len(specs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            entries = list(pool.map(_job, specs))
+    else:
+        entries = [_job(s) for s in specs]
+    elapsed = time.perf_counter() - t0
+
+    manifest = {"version": 1, "seed": args.seed, "created_at": time.time(), "files": entries}
+    path = os.path.join(args.out, "manifest.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    audio_s = sum(e["duration_s"] for e in entries)
+    size = sum(e["bytes"] for e in entries)
+    print(f"生成 {len(entries)} 个文件，共 {audio_s:.0f} 秒音频 / {size / 1e6:.1f} MB，用时 {elapsed:.2f}s")
+    print(f"manifest: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
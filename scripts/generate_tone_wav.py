@@ -1,7 +1,7 @@
-import math
-import wave
-import struct
 import os
+import wave
+
+import numpy as np
 
 OUT = os.environ.get("OUT", os.path.join(os.getcwd(), "data", "sample_440.wav"))
 DURATION = float(os.environ.get("DURATION", "1.0"))  # seconds
@@ -14,16 +14,13 @@ if dirname:
     os.makedirs(dirname, exist_ok=True)
 
 nframes = int(DURATION * SR)
+t = np.arange(nframes) / SR
+samples = (np.clip(AMP * np.sin(2 * np.pi * FREQ * t), -1.0, 1.0) * 32767).astype("<i2")
 with wave.open(OUT, "wb") as wf:
     wf.setnchannels(1)  # mono
     wf.setsampwidth(2)  # 16-bit
     wf.setframerate(SR)
-    for i in range(nframes):
-        t = i / SR
-        sample = AMP * math.sin(2 * math.pi * FREQ * t)
-        value = int(max(-1.0, min(1.0, sample)) * 32767)
-        wf.writeframesraw(struct.pack('<h', value))
-    # finalize header
-    wf.writeframes(b"")
+    wf.writeframes(samples.tobytes())
 
 print(f"Generated WAV: {OUT}")
+print("更多类型/采样率/时长的批量语料见 scripts/generate_corpus.py")
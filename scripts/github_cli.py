@@ -7,28 +7,52 @@ from typing import Optional, Dict, Any, List
 # 确保可从脚本直接运行（将项目根目录加入 sys.path）
 try:
     from aipart.services.github_api import GitHubAPI
+    from aipart.services.http_cache import HttpCache
 except ModuleNotFoundError:
     _here = os.path.dirname(__file__)
     _root = os.path.dirname(_here)
     if _root not in sys.path:
         sys.path.insert(0, _root)
     from aipart.services.github_api import GitHubAPI
+    from aipart.services.http_cache import HttpCache
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aipart", "github")
+
+_cache: Optional[HttpCache] = None
 
 
 def build_client(token: Optional[str], base_url: str) -> GitHubAPI:
-    return GitHubAPI(token=token, base_url=base_url)
+    return GitHubAPI(token=token, base_url=base_url, cache=_cache)
+
+
+def report_cache() -> None:
+    if _cache is None:
+        return
+    st = _cache.stats()
+    total = st["hits"] + st["misses"]
+    if total:
+        print(
+            f"[cache] 命中 {st['hits']}/{total}（304 不计入限额，节省 {st['bytes_saved']} 字节），"
+            f"缓存 {st['entries']} 条 / {st['bytes']} 字节，淘汰 {st['evictions']}",
+            file=sys.stderr,
+        )
 
 
 def cmd_list_repos(args: argparse.Namespace) -> int:
     client = build_client(args.token, args.base_url)
     try:
-        repos = client.list_repos(per_page=args.per_page)
+        if args.all:
+            repos = client.list_all_repos(per_page=args.per_page, concurrency=args.concurrency)
+        else:
+            repos = client.list_repos(per_page=args.per_page)
     except RuntimeError as e:
         print(f"[Error] {e}", file=sys.stderr)
         return 1
     except Exception as e:
         print(f"[Error] 调用 GitHub API 失败: {e}", file=sys.stderr)
         return 2
+    finally:
+        client.close()
 
     if args.json:
         print(json.dumps(repos, ensure_ascii=False, indent=2))
@@ -120,11 +144,17 @@ def make_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="GitHub API 命令行工具")
     p.add_argument("--token", default=os.getenv("GITHUB_TOKEN"), help="GitHub Token（缺省读取环境变量 GITHUB_TOKEN）")
     p.add_argument("--base-url", default="https://api.github.com", help="API 基础地址（GitHub Enterprise 可改）")
+    p.add_argument("--cache-dir", default=os.getenv("GITHUB_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                   help="GET 请求的 ETag 缓存目录（默认 ~/.cache/aipart/github）")
+    p.add_argument("--cache-max-mb", type=float, default=50.0, help="缓存上限（MB），默认 50")
+    p.add_argument("--no-cache", action="store_true", help="禁用 ETag 缓存")
 
     sub = p.add_subparsers(dest="command", required=True)
 
     sp = sub.add_parser("list-repos", help="列出当前用户仓库")
     sp.add_argument("--per-page", type=int, default=5, help="每页数量，默认 5")
+    sp.add_argument("--all", action="store_true", help="拉取全部分页（建议配合 --per-page 100）")
+    sp.add_argument("--concurrency", type=int, default=4, help="--all 时并发拉取的页数，默认 4")
     sp.add_argument("--json", action="store_true", help="以 JSON 格式输出")
     sp.set_defaults(func=cmd_list_repos)
 
@@ -165,7 +195,16 @@ def main(argv: Optional[List[str]] = None) -> int:
     if not args.token:
         print("[Error] 缺少 Token。请通过 --token 传入或设置环境变量 GITHUB_TOKEN。", file=sys.stderr)
         return 1
-    return args.func(args)
+    global _cache
+    if not args.no_cache:
+        try:
+            _cache = HttpCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        except OSError as e:
+            print(f"[Warn] 无法使用缓存目录 {args.cache_dir}: {e}", file=sys.stderr)
+    try:
+        return args.func(args)
+    finally:
+        report_cache()
 
 
 if __name__ == "__main__":
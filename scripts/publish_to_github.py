@@ -13,6 +13,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from aipart.services.github_api import GitHubAPI  # type: ignore
+from aipart.services.http_cache import HttpCache  # type: ignore
 
 
 def run(cmd: list[str], cwd: Path, check: bool = True) -> subprocess.CompletedProcess:
@@ -101,6 +102,48 @@ def push_with_token(root: Path, token: str, clone_url: str) -> None:
     run(["git", "push", "-u", push_url, "main"], cwd=root)
 
 
+_SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", ".pytest_cache", "var", "node_modules"}
+
+
+def collect_files(root: Path) -> dict[str, str]:
+    """待发布文件：{仓库内路径: 本地路径}。有 git 时遵循 .gitignore，否则遍历目录并跳过常见生成目录。"""
+    try:
+        cp = run(["git", "ls-files", "-co", "--exclude-standard", "-z"], cwd=root)
+        names = [n for n in cp.stdout.split("\0") if n]
+        return {n: str(root / n) for n in names if (root / n).is_file()}
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    files: dict[str, str] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+        for fn in filenames:
+            full = Path(dirpath) / fn
+            files[full.relative_to(root).as_posix()] = str(full)
+    return files
+
+
+def publish_via_api(client: GitHubAPI, root: Path, full_name: str, branch: str, message: str, concurrency: int,
+                    prune: bool = False) -> dict:
+    owner, repo = full_name.split("/", 1)
+    files = collect_files(root)
+    print(f"共 {len(files)} 个文件，计算 blob SHA 并比对远程已有对象…")
+
+    def progress(st: dict) -> None:
+        total = st["blobs_total"] - st["blobs_skipped"]
+        print(f"\r上传 blob {st['blobs_uploaded']}/{total}，已上传 {st['bytes_uploaded'] / 1024:.1f} KiB", end="", flush=True)
+
+    stats = client.publish_files(owner, repo, files, branch=branch, message=message,
+                                 concurrency=concurrency, progress=progress, prune=prune)
+    if stats["blobs_uploaded"]:
+        print()
+    print(
+        f"blob 共 {stats['blobs_total']}：上传 {stats['blobs_uploaded']}（{stats['bytes_uploaded']} 字节），"
+        f"已存在跳过 {stats['blobs_skipped']}；耗时 {stats['elapsed_s']}s"
+    )
+    print(f"提交 {stats['commit']} → {branch}")
+    return stats
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="创建 GitHub 仓库并推送当前项目")
     parser.add_argument("--name", default=None, help="仓库名（默认使用目录名）")
@@ -113,19 +156,35 @@ def main(argv: Optional[list[str]] = None) -> int:
     parser.add_argument("--auto-init", action="store_true", help="GitHub 端自动初始化（README）")
     parser.add_argument("--remote-name", default="origin", help="远程名，默认 origin")
     parser.add_argument("--base-url", default="https://api.github.com", help="GitHub API 基础地址")
+    parser.add_argument("--mode", choices=["git", "api"], default="git",
+                        help="git：本地提交后 git push（默认）；api：通过 Git Data API 直接上传（无需本地 git）")
+    parser.add_argument("--branch", default="main", help="api 模式下写入的分支，默认 main")
+    parser.add_argument("--message", default="Initial commit", help="api 模式下的提交说明")
+    parser.add_argument("--concurrency", type=int, default=8, help="api 模式下并发上传 blob 数，默认 8")
+    parser.add_argument("--prune", action="store_true",
+                        help="api 模式下用本地文件整体替换分支内容（删除本地没有的文件）；默认只新增/更新")
     args = parser.parse_args(argv)
+    if args.mode == "api":
+        # Git Data API 不能写入空仓库，新建时让 GitHub 生成首个提交
+        args.auto_init = True
 
     token = os.getenv("GITHUB_TOKEN")
     if not token:
         print("[Error] 未检测到环境变量 GITHUB_TOKEN，请先设置它。", file=sys.stderr)
         return 1
 
-    ensure_git_available()
+    if args.mode == "git":
+        ensure_git_available()
 
     root = ROOT
     repo_name = args.name or root.name
 
-    client = GitHubAPI(token=token, base_url=args.base_url)
+    # GITHUB_CACHE_DIR 设置时对 GET 请求做 ETag 条件请求；用完关闭连接池
+    with GitHubAPI(token=token, base_url=args.base_url, cache=HttpCache.from_env()) as client:
+        return publish(client, args, token, root, repo_name)
+
+
+def publish(client: GitHubAPI, args: argparse.Namespace, token: str, root: Path, repo_name: str) -> int:
     if not client.available:
         print("[Error] Token 不可用。", file=sys.stderr)
         return 1
@@ -158,6 +217,15 @@ def main(argv: Optional[list[str]] = None) -> int:
     clone_url = repo.get("clone_url")
     html_url = repo.get("html_url")
 
+    if args.mode == "api":
+        try:
+            publish_via_api(client, root, repo["full_name"], args.branch, args.message, args.concurrency, args.prune)
+        except Exception as e:
+            print(f"\n[Error] 通过 API 发布失败: {e}", file=sys.stderr)
+            return 3
+        print(("已创建并发布到: " if created else "已复用并发布到: ") + html_url)
+        return 0
+
     # 初始化并推送
     init_git_repo(root, client)
     # 永远把 remote 设置成不含 token 的 URL
@@ -0,0 +1,102 @@
+"""
+以实时速度把 WAV 推送到 /v1/stt/stream，打印服务端返回的临时/最终结果与延迟。
+
+示例：
+  python scripts/stream_wav.py data/nihao.wav
+  python scripts/stream_wav.py data/corpus/padded_16000_10s_1ch.wav --speed 2 --frame-ms 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from urllib.parse import urlencode
+
+import numpy as np
+
+try:
+    from websockets.sync.client import connect  # websockets>=11（uvicorn[standard] 自带）
+except Exception:  # pragma: no cover
+    connect = None
+
+BASE = os.environ.get("BASE", "http://127.0.0.1:8080")
+
+
+def read_pcm16_mono(path: str):
+    """读取 PCM WAV，返回 (int16 单声道样本, 采样率)；多声道取平均。"""
+    with wave.open(path, "rb") as wf:
+        sr, ch, width = wf.getframerate(), wf.getnchannels(), wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+    if width != 2:
+        raise SystemExit(f"仅支持 16-bit PCM WAV（当前 {width * 8}-bit）")
+    x = np.frombuffer(raw, dtype="<i2")
+    if ch > 1:
+        x = x.reshape(-1, ch).mean(axis=1).astype("<i2")
+    return x, sr
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="模拟麦克风：按实时速度推送 WAV 到流式转写接口")
+    p.add_argument("wav", help="16-bit PCM WAV 文件")
+    p.add_argument("--base", default=BASE, help="服务地址，默认读取环境变量 BASE")
+    p.add_argument("--frame-ms", type=int, default=100, help="每帧时长（毫秒），默认 100")
+    p.add_argument("--speed", type=float, default=1.0, help="推送速度倍数，0 表示不等待")
+    p.add_argument("--language", default=None)
+    p.add_argument("--model", default=None)
+    args = p.parse_args(argv)
+    if connect is None:
+        print("[Error] 需要 websockets 包：pip install websockets", file=sys.stderr)
+        return 1
+
+    samples, sr = read_pcm16_mono(args.wav)
+    query = {"sample_rate": sr}
+    if args.language:
+        query["language"] = args.language
+    if args.model:
+        query["model"] = args.model
+    url = args.base.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + "/v1/stt/stream?" + urlencode(query)
+    frame = max(1, int(sr * args.frame_ms / 1000))
+    t0 = time.perf_counter()
+    done = {}
+
+    with connect(url, max_size=None) as ws:
+        def reader():
+            for raw in ws:
+                msg = json.loads(raw)
+                t = time.perf_counter() - t0
+                kind = msg.get("type")
+                if kind == "partial":
+                    print(f"[{t:6.2f}s] … {msg['text']}  ({msg['latency_ms']} ms)")
+                elif kind == "final":
+                    print(f"[{t:6.2f}s] ✔ {msg['text']}  [{msg['start']}-{msg['end']}s] ({msg['latency_ms']} ms)")
+                elif kind == "done":
+                    done.update(msg)
+                    return
+                else:
+                    print(f"[{t:6.2f}s] {msg}", file=sys.stderr)
+                    if kind == "error":
+                        return
+
+        th = threading.Thread(target=reader, daemon=True)
+        th.start()
+        for i, start in enumerate(range(0, len(samples), frame)):
+            if args.speed > 0:
+                # 按绝对时间对齐，避免 sleep 误差累积
+                due = t0 + start / sr / args.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            ws.send(samples[start:start + frame].tobytes())
+        ws.send("end")
+        th.join()
+
+    if done:
+        print(f"\n全文: {done.get('text')}")
+        print(f"音频 {done.get('audio_seconds')}s，丢弃 {done.get('dropped_seconds')}s，延迟 {done.get('latency_ms')}")
+    return 0 if done else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
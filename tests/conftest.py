@@ -1,6 +1,102 @@
+import io
 import os
 import sys
+import threading
+import time
+import wave
+from types import SimpleNamespace
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, ROOT)
 
+import numpy as np
+import pytest
+
+from aipart.services.stt import STTEngine
+
+
+def tone_wav(seconds: float = 1.0, sr: int = 16000) -> bytes:
+    """440 Hz 单声道 16-bit PCM WAV。"""
+    t = np.arange(int(sr * seconds)) / float(sr)
+    pcm = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+class FakeWhisperModel:
+    """假 faster-whisper 模型，惰性产出片段。
+
+    - segment_s 为每段时长，段数按音频时长向上取整；count 固定段数；segment_s=None 时整段一个片段；
+    - text 为片段文本模板，可用 {i}（段序号）与 {seconds}（音频时长）；
+    - 每段产出前等待 delay 秒；decoded 为实际解码的段数，calls 为 transcribe 调用次数，
+      started 在产出首段时置位。
+    音频未能预处理时（收到文件路径而非采样数组）按 0 秒处理。
+    """
+
+    def __init__(self, segment_s=0.5, text=" Part {i}.", delay=0.0, count=None):
+        self.segment_s = segment_s
+        self.text = text
+        self.delay = delay
+        self.count = count
+        self.decoded = 0
+        self.calls = 0
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, **kw):
+        seconds = 0.0 if isinstance(audio, str) else len(audio) / 16000
+        if self.count is not None:
+            n = self.count
+        elif self.segment_s is None:
+            n = 1
+        else:
+            n = max(1, int(np.ceil(seconds / self.segment_s)))
+        step = self.segment_s if self.segment_s is not None else seconds
+        with self._lock:
+            self.calls += 1
+
+        def segments():
+            for i in range(n):
+                time.sleep(self.delay)
+                with self._lock:
+                    self.decoded += 1
+                self.started.set()
+                yield SimpleNamespace(text=self.text.format(i=i, seconds=seconds), start=step * i, end=step * (i + 1))
+        duration = step * n if self.count is not None else seconds
+        return segments(), SimpleNamespace(language="en", duration=duration)
+
+
+class FakeEngine(STTEngine):
+    """faster-whisper 引擎，模型换成 FakeWhisperModel（或任何有 transcribe 的对象），其余流程不变。"""
+
+    def __init__(self, model=None, env=None):
+        super().__init__({"FAST_WHISPER_MODEL": "base", **(env or {})})
+        self._name = "faster-whisper"
+        self._engine = "lazy"
+        self.model = model if model is not None else FakeWhisperModel()
+
+    def _load_model(self, key):
+        return self.model
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state_dirs(tmp_path_factory, monkeypatch):
+    """任务库、分块上传与调优结果写到每个测试自己的临时目录，不在仓库里留下 var/；结束后关闭后台单例。"""
+    from aipart.services import jobs, uploads
+
+    tmp_path = tmp_path_factory.mktemp("state")  # 与测试自己的 tmp_path 分开，不影响其目录内容断言
+    monkeypatch.setenv("JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("AUTOTUNE_FILE", str(tmp_path / "autotune.json"))
+    monkeypatch.setattr(jobs, "_manager_singleton", None)
+    monkeypatch.setattr(uploads, "_uploads_singleton", None)
+    yield
+    if jobs._manager_singleton is not None:
+        jobs._manager_singleton.shutdown()
+    if uploads._uploads_singleton is not None:
+        uploads._uploads_singleton.shutdown()
@@ -0,0 +1,76 @@
+import asyncio
+
+from aipart.services import scheduler
+from aipart.services.adaptive import TIERS, AdaptivePolicy
+from aipart.services.scheduler import FairScheduler
+
+
+def test_steps_down_under_pressure_and_recovers():
+    policy = AdaptivePolicy(latency_target_s=10.0, cooldown_s=0.0)
+    # 首个请求无历史数据，保持 full
+    tier = policy.acquire()
+    assert tier.name == "full"
+    # RTF=0.5，音频 10s → 单请求约 5s
+    policy.release(tier, wall_s=5.0, audio_s=10.0)
+
+    # 4 个并发请求：预计 5s × 4 = 20s > 10s，逐级降档
+    held = [policy.acquire() for _ in range(4)]
+    assert [t.name for t in held][-1] != "full"
+    assert policy.stats()["tier"] != "full"
+    for t in held:
+        policy.release(t, wall_s=1.0, audio_s=10.0)
+
+    # 负载消退且 RTF 变低，逐步恢复到 full
+    for _ in range(len(TIERS) * 2):
+        t = policy.acquire()
+        policy.release(t, wall_s=0.5, audio_s=10.0)
+    assert policy.stats()["tier"] == "full"
+
+
+def test_disabled_policy_always_full():
+    policy = AdaptivePolicy(latency_target_s=0.001, enabled=False, cooldown_s=0.0)
+    t = policy.acquire()
+    policy.release(t, wall_s=100.0, audio_s=1.0)
+    assert all(policy.acquire().name == "full" for _ in range(5))
+
+
+def test_queued_work_degrades_even_with_one_request_in_flight():
+    # 在途数被执行槽位封顶为 1，只看它永远不会降档；排队的工作量必须计入预计延迟
+    queued = {"s": 0.0}
+    policy = AdaptivePolicy(latency_target_s=10.0, cooldown_s=0.0, backlog=lambda: queued["s"])
+    policy.release(policy.acquire(), wall_s=5.0, audio_s=10.0)  # RTF=0.5，单请求约 5s
+    t = policy.acquire()
+    assert t.name == "full" and policy.projected_latency() == 5.0
+    policy.release(t, wall_s=5.0, audio_s=10.0)
+
+    queued["s"] = 60.0  # 每个槽位分摊 60s 音频排队 → 0.5 × (60 + 10) = 35s
+    assert policy.acquire().name != "full"
+    assert policy.stats()["queued_work_s"] == 60.0 and policy.stats()["projected_latency_s"] > 10.0
+
+
+def test_deep_scheduler_queue_degrades_tier(monkeypatch):
+    # 端到端：解码在调度器槽位内调用 acquire()，在途数恒为 1；排队的任务足以让策略降档
+    sched = FairScheduler(slots=1)
+    monkeypatch.setattr(scheduler, "_scheduler_singleton", sched)
+    policy = AdaptivePolicy.from_env()
+    policy.cooldown_s = 0.0
+    policy.latency_target_s = 10.0
+
+    async def run():
+        running = await sched.acquire("a", 10.0, 10.0)
+        t = policy.acquire()
+        policy.release(t, wall_s=5.0, audio_s=10.0)  # RTF=0.5
+        assert policy.acquire().name == "full"
+        policy.release(TIERS[0], wall_s=5.0, audio_s=10.0)
+
+        waiters = [asyncio.create_task(sched.acquire(f"c{i}", 10.0, 10.0)) for i in range(8)]
+        await asyncio.sleep(0)
+        assert sched.capacity()["queued"] == 8
+        tier = policy.acquire()
+        for w in waiters:
+            w.cancel()
+        sched.release(running)
+        return tier
+
+    assert asyncio.run(run()).name != "full"
+    assert policy.stats()["queued_work_s"] == 0.0
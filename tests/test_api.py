@@ -30,6 +30,28 @@ def test_summarize_lead_and_boundary():
     assert data["sentences"] == ["A.", "B.", "C."]
 
 
+def test_summarize_multiple_lengths_and_ranked():
+    text = "Speech models help. Speech models transcribe speech. Summaries are short. Models help speech."
+    r = client.post("/v1/summarize", json={"text": text, "max_sentences": 2, "lengths": [1, 3], "ranked": True})
+    assert r.status_code == 200
+    data = r.json()
+    for variant in data["summaries"]:
+        single = client.post("/v1/summarize", json={"text": text, "max_sentences": variant["max_sentences"]}).json()
+        assert variant["sentences"] == single["sentences"] and variant["summary"] == single["summary"]
+    assert [v["max_sentences"] for v in data["summaries"]] == [1, 3]
+    ranked = data["ranked"]
+    assert sorted(x["index"] for x in ranked) == [0, 1, 2, 3]
+    assert [x["score"] for x in ranked] == sorted((x["score"] for x in ranked), reverse=True)
+    # 前 k 名按原文顺序即为长度 k 的摘要
+    top2 = sorted(ranked[:2], key=lambda x: x["index"])
+    assert [x["sentence"] for x in top2] == data["sentences"]
+
+    lead = client.post("/v1/summarize", json={"text": "A. B. C.", "strategy": "lead", "ranked": True}).json()
+    assert [(x["index"], x["score"]) for x in lead["ranked"]] == [(0, None), (1, None), (2, None)]
+    assert lead["summaries"] is None
+    assert client.post("/v1/summarize", json={"text": text, "lengths": [0]}).status_code == 422
+
+
 def test_summarize_empty_text_400():
     payload = {"text": "  ", "max_sentences": 2}
     r = client.post("/v1/summarize", json=payload)
@@ -112,3 +134,55 @@ def test_ai_multipart_audio_flow():
             assert "失败" in r.json().get("detail", "")
     else:
         assert r.status_code == 501
+
+
+def test_metrics_exposes_model_stats():
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    data = r.json()
+    assert "counters" in data
+    assert "models" in data.get("stt_models", {})
+
+
+def test_job_submit_and_unknown_job():
+    engine = get_stt_engine()
+    r = client.post("/v1/jobs", files={"file": ("fake.wav", b"fake-bytes", "audio/wav")})
+    if engine.available:
+        assert r.status_code == 202 and r.json().get("job_id")
+    else:
+        assert r.status_code == 501
+    r = client.get("/v1/jobs/does-not-exist")
+    assert r.status_code == 404
+
+
+def test_ai_json_field_projection():
+    payload = {"text": "This is a test. This test is simple. Summaries help users.", "max_sentences": 1}
+    r = client.post("/v1/ai?exclude=text", json=payload)
+    assert r.status_code == 200
+    data = r.json()
+    assert "text" not in data and isinstance(data.get("summary"), str)
+
+    r = client.post("/v1/ai?fields=summary,language", json=payload)
+    assert set(r.json().keys()) == {"summary", "language"}
+
+
+def test_ai_json_invalid_body_400():
+    r = client.post("/v1/ai", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert r.status_code == 400
+    r = client.post("/v1/ai", json={"text": "x", "max_sentences": 99})
+    assert r.status_code == 400
+
+
+def test_session_append_and_summary():
+    r = client.post("/v1/sessions", json={"max_sentences": 1})
+    assert r.status_code == 201
+    sid = r.json()["session_id"]
+    r = client.post(f"/v1/sessions/{sid}/append", json={"text": "Audio models are fast. Audio is "})
+    assert r.status_code == 200
+    assert r.json()["sentence_count"] == 1 and r.json()["pending_chars"] > 0
+    r = client.post(f"/v1/sessions/{sid}/append", json={"text": "audio data.", "final": True, "max_sentences": 2})
+    body = r.json()
+    assert body["sentence_count"] == 2 and len(body["sentences"]) == 2
+    assert client.get(f"/v1/sessions/{sid}", params={"fields": "summary"}).json() == {"summary": "Audio is audio data."}
+    assert client.delete(f"/v1/sessions/{sid}").status_code == 204
+    assert client.get(f"/v1/sessions/{sid}").status_code == 404
@@ -0,0 +1,74 @@
+import wave
+
+import numpy as np
+import pytest
+
+from aipart.services.audio_prep import TARGET_SR, prepare_audio, resample_stream
+
+
+def _write_wav(path, x, sr, channels=1, sampwidth=2):
+    x = np.clip(x, -1.0, 1.0)
+    if sampwidth == 2:
+        raw = (x * 32767).astype("<i2").tobytes()
+    else:
+        raw = ((x * 127) + 128).astype(np.uint8).tobytes()
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sampwidth)
+        wf.setframerate(sr)
+        wf.writeframes(raw)
+
+
+def _tone_with_silence(sr, lead=2.0, tone=3.0, tail=2.0):
+    t = np.arange(int(sr * tone)) / sr
+    return np.concatenate([np.zeros(int(sr * lead)), 0.5 * np.sin(2 * np.pi * 440 * t), np.zeros(int(sr * tail))])
+
+
+def test_trims_silence_and_resamples_stereo(tmp_path):
+    sr = 44100
+    mono = _tone_with_silence(sr)
+    stereo = np.repeat(mono[:, None], 2, axis=1).reshape(-1)
+    path = tmp_path / "stereo.wav"
+    _write_wav(path, stereo, sr, channels=2)
+
+    prep = prepare_audio(str(path))
+    assert prep is not None and not prep.silent
+    assert prep.samples.dtype == np.float32
+    assert abs(prep.original_seconds - 7.0) < 0.01
+    # 保留约 3s 语音 + 两侧 0.25s 留白
+    assert 3.0 <= prep.seconds <= 3.7
+    assert 3.3 <= prep.trimmed_seconds <= 4.0
+    assert 1.6 <= prep.offset_seconds <= 2.0
+
+
+def test_silent_clip_is_flagged(tmp_path):
+    path = tmp_path / "silence.wav"
+    _write_wav(path, np.zeros(8000 * 3), 8000, sampwidth=1)
+    prep = prepare_audio(str(path))
+    assert prep is not None and prep.silent
+    assert prep.trimmed_seconds == prep.original_seconds
+
+
+def test_non_wav_returns_none(tmp_path):
+    path = tmp_path / "fake.wav"
+    path.write_bytes(b"not-a-real-wav")
+    assert prepare_audio(str(path)) is None
+
+
+def test_streaming_resample_matches_single_block():
+    x = np.random.default_rng(0).standard_normal(48000).astype(np.float32)
+    whole = resample_stream(iter([x]), 48000)
+    blocks = resample_stream(iter([x[i:i + 1000] for i in range(0, len(x), 1000)]), 48000)
+    assert len(whole) == len(blocks) == TARGET_SR
+    assert np.abs(whole - blocks).max() < 1e-5
+
+
+def test_flac_is_decoded_and_trimmed(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    sr = 22050
+    path = tmp_path / "clip.flac"
+    sf.write(str(path), _tone_with_silence(sr).astype(np.float32), sr)
+    prep = prepare_audio(str(path))
+    assert prep is not None and not prep.silent
+    assert abs(prep.original_seconds - 7.0) < 0.01
+    assert 3.0 <= prep.seconds <= 3.7
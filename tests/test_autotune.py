@@ -0,0 +1,60 @@
+import time
+
+from aipart.services import autotune
+from aipart.services.autotune import AutoTuner, save_result, saved_result, tuned_overrides
+from aipart.services.hot_reload import load_config
+
+# 模拟的各配置耗时：int8 最快；2 线程最佳；beam 越小越快，但 beam=1 会改变转写结果
+_SPEED = {"int8": 1.0, "int8_float32": 1.5, "float32": 3.0}
+
+
+def _load(model, device, compute_type, cpu_threads, num_workers):
+    if compute_type == "int8_float32":
+        raise ValueError("unsupported compute type")
+    return (compute_type, cpu_threads, num_workers)
+
+
+def _transcribe(m, samples, beam):
+    compute_type, threads, workers = m
+    time.sleep(0.001 * _SPEED[compute_type] * (1 + abs(threads - 2)) * (beam + 1))
+    return "hello world" if beam > 1 else "hello word"
+
+
+def test_tuner_picks_fastest_accurate_config():
+    tuner = AutoTuner(model="base", concurrency=2, repeats=2, beam_sizes=(1, 2, 5), baseline_beam=5,
+                      load=_load, transcribe=_transcribe, log=lambda _: None)
+    tuner.thread_options = lambda: [1, 2, 4]
+    result = tuner.run()
+    cfg = result["config"]
+    assert cfg["compute_type"] == "int8" and cfg["cpu_threads"] == 2
+    # beam=1 最快但与基准转写不一致，被精度保护排除
+    assert cfg["beam_size"] == 2
+    assert result["throughput"] > result["baseline"]["throughput"]
+    assert any("error" in t for t in result["trials"])
+
+
+def test_results_persist_per_host_and_fill_unset_keys(tmp_path, monkeypatch):
+    path = tmp_path / "autotune.json"
+    monkeypatch.setenv("AUTOTUNE_FILE", str(path))
+    monkeypatch.delenv("STT_CONFIG_FILE", raising=False)
+    monkeypatch.delenv("STT_AUTOTUNE", raising=False)
+    for k in ("FAST_WHISPER_MODEL", "FAST_WHISPER_DEVICE", "FAST_WHISPER_COMPUTE", "FAST_WHISPER_CPU_THREADS",
+              "FAST_WHISPER_NUM_WORKERS", "FAST_WHISPER_BEAM_SIZE"):
+        monkeypatch.delenv(k, raising=False)
+    config = {"compute_type": "int8", "cpu_threads": 4, "num_workers": 2, "beam_size": 2}
+    save_result({"model": "base", "device": "cpu", "config": config, "rtf": 0.1, "throughput": 9.0})
+    assert saved_result("base", "cpu")["config"] == config
+    assert saved_result("small", "cpu") is None
+
+    monkeypatch.setenv("FAST_WHISPER_BEAM_SIZE", "5")  # 显式设置的优先
+    cfg = load_config()
+    assert cfg["FAST_WHISPER_COMPUTE"] == "int8" and cfg["FAST_WHISPER_CPU_THREADS"] == "4"
+    assert cfg["FAST_WHISPER_NUM_WORKERS"] == "2" and cfg["FAST_WHISPER_BEAM_SIZE"] == "5"
+
+    # 换一台主机（指纹不同）或关闭后不再应用
+    monkeypatch.setattr(autotune, "host_fingerprint", lambda: ("other-host", {}))
+    assert tuned_overrides({}) == {}
+    monkeypatch.undo()
+    monkeypatch.setenv("AUTOTUNE_FILE", str(path))
+    monkeypatch.setenv("STT_AUTOTUNE", "off")
+    assert tuned_overrides({}) == {}
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from scripts import bulk_summarize
+
+OPTS = {"text_field": "body", "id_field": "doc", "max_sentences": 1, "strategy": "lead",
+        "optimize": True, "style": "concise", "language": None}
+
+
+def _corpus(tmp_path, n=40):
+    path = tmp_path / "docs.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"doc": i, "body": f"Doc {i} first. It is really long. End."}) + "\n")
+        f.write("not json\n")
+    return path
+
+
+def test_chunks_split_on_line_boundaries(tmp_path):
+    path = _corpus(tmp_path)
+    chunks = bulk_summarize.plan_chunks([str(path)], 100)
+    data = path.read_bytes()
+    assert chunks[0][1] == 0 and chunks[-1][2] == len(data)
+    assert all(data[e - 1:e] == b"\n" for _, _, e in chunks)
+    assert all(a[2] == b[1] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_resume_after_interruption_matches_full_run(tmp_path):
+    path = _corpus(tmp_path)
+    full, part = str(tmp_path / "full.jsonl"), str(tmp_path / "part.jsonl")
+    quiet = dict(chunk_bytes=200, log=lambda _: None)
+    s = bulk_summarize.run([str(path)], full, OPTS, **quiet)
+    assert s["complete"] and s["docs"] == 41 and s["errors"] == 1
+
+    s = bulk_summarize.run([str(path)], part, OPTS, max_chunks=3, **quiet)
+    assert not s["complete"] and s["done_chunks"] == 3
+    with open(part, "a", encoding="utf-8") as f:
+        f.write('{"half-written')  # 模拟中断时写了一半的结果
+    s = bulk_summarize.run([str(path)], part, OPTS, workers=2, **quiet)
+    assert s["complete"] and s["docs"] == 41 and s["run_docs"] < 41
+
+    with open(full, "rb") as a, open(part, "rb") as b:
+        assert a.read() == b.read()
+    rows = [json.loads(line) for line in open(full, encoding="utf-8")]
+    assert rows[0] == {"id": 0, "summary": "Doc 0 first.", "sentences": ["Doc 0 first."],
+                       "optimized": "Doc 0 first. It is long. End."}
+    assert rows[-1]["source"] == "docs.jsonl" and "error" in rows[-1]
+
+    # 参数变化时拒绝沿用旧检查点
+    with pytest.raises(SystemExit):
+        bulk_summarize.run([str(path)], part, dict(OPTS, max_sentences=2), **quiet)
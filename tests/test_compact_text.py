@@ -0,0 +1,42 @@
+from aipart.services import summarizer
+from aipart.services.compact_text import CompactDoc, sentence_spans
+from aipart.services.text_utils import sentence_scores, split_sentences
+
+TEXT = (
+    "  Speech models turn audio into text. The text is long!\n\n"
+    "Summaries pick the most frequent words? Short one.\n"
+    "语音识别把音频转成文字。摘要从文字中挑选句子！  模型很快。 "
+)
+
+
+def test_spans_match_split_sentences():
+    starts, ends = sentence_spans(TEXT)
+    assert [TEXT[s:e] for s, e in zip(starts, ends)] == split_sentences(TEXT)
+    assert sentence_spans("") == sentence_spans("   \n ")
+
+
+def test_scores_match_list_implementation():
+    for lang in ("en", "zh"):
+        doc = CompactDoc(TEXT, lang)
+        expected = [s for _, s in sentence_scores(split_sentences(TEXT), lang)]
+        assert len(doc) == len(expected)
+        assert all(abs(a - b) < 1e-9 for a, b in zip(doc.scores().tolist(), expected))
+        # 词表按请求驻留：每个词只出现一次
+        assert len(doc.vocab) == len(set(doc.vocab))
+
+
+def test_summarize_switches_above_threshold(monkeypatch):
+    text = TEXT * 50
+    monkeypatch.setenv("SUMMARY_COMPACT_THRESHOLD", str(10 ** 9))
+    expected = {s: summarizer.summarize(text, 4, s) for s in ("frequency", "lead")}
+    monkeypatch.setenv("SUMMARY_COMPACT_THRESHOLD", "0")
+    for strategy, want in expected.items():
+        assert summarizer.summarize(text, 4, strategy) == want
+    assert summarizer.summarize("", 3) == []
+    # 排名同样一致
+    monkeypatch.setenv("SUMMARY_COMPACT_THRESHOLD", str(10 ** 9))
+    expected = summarizer.rank_sentences(text).ranked()
+    monkeypatch.setenv("SUMMARY_COMPACT_THRESHOLD", "0")
+    got = summarizer.rank_sentences(text).ranked()
+    assert [(i, s) for i, s, _ in got] == [(i, s) for i, s, _ in expected]
+    assert all(abs(a[2] - b[2]) < 1e-9 for a, b in zip(got, expected))
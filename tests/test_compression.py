@@ -0,0 +1,82 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from aipart.api.compression import CompressionMiddleware, choose_encoding
+from aipart.app import app
+
+client = TestClient(app)
+
+
+def _echo_app(limit):
+    inner = FastAPI()
+
+    @inner.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"size": len(body), "head": body[:20].decode("utf-8", "replace")}
+
+    @inner.get("/stream")
+    def stream():
+        return StreamingResponse((json.dumps({"i": i}) + "\n" for i in range(200)), media_type="application/json")
+
+    inner.add_middleware(CompressionMiddleware, max_body_size=limit, min_size=256)
+    return TestClient(inner)
+
+
+def test_gzip_request_body_is_decompressed():
+    text = "Compression saves bandwidth on mobile networks. " * 200
+    body = gzip.compress(json.dumps({"text": text, "max_sentences": 1}).encode())
+    r = client.post("/v1/summarize", content=body,
+                    headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json()["sentences"] == ["Compression saves bandwidth on mobile networks."]
+    stats = client.get("/metrics").json()["http_compression"]
+    assert stats["requests_decompressed"] >= 1 and stats["request_bytes_saved"] > 0
+
+
+def test_decompressed_size_limit_and_bad_input():
+    c = _echo_app(limit=64 * 1024)
+    ok = c.post("/echo", content=gzip.compress(b"a" * 60000), headers={"Content-Encoding": "gzip"})
+    assert ok.json() == {"size": 60000, "head": "a" * 20}
+    # 压缩后仅约 1KB，解压后 10MB：应在解压途中被拒绝
+    bomb = c.post("/echo", content=gzip.compress(b"\0" * (10 << 20)), headers={"Content-Encoding": "gzip"})
+    assert bomb.status_code == 413
+    assert c.post("/echo", content=b"not gzip", headers={"Content-Encoding": "gzip"}).status_code == 400
+    truncated = gzip.compress(b"b" * 5000)[:-12]
+    assert c.post("/echo", content=truncated, headers={"Content-Encoding": "gzip"}).status_code == 400
+    assert c.post("/echo", content=b"x", headers={"Content-Encoding": "br"}).status_code == 415
+
+
+def test_response_compression_threshold_and_streaming():
+    c = _echo_app(limit=1 << 20)
+    small = c.post("/echo", content=b"hi", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    streamed = c.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert streamed.headers["vary"] == "Accept-Encoding"
+    assert streamed.text.splitlines()[-1] == '{"i": 199}'
+    plain = c.get("/stream", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.text == streamed.text
+
+    text = "语音识别把音频转成文字。" * 500
+    r = client.post("/v1/ai", json={"text": text}, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < len(text.encode()) // 10
+    assert r.json()["text"] == text
+
+
+def test_zstd_both_directions():
+    zstandard = pytest.importorskip("zstandard")
+    assert choose_encoding("gzip, zstd;q=0.5") == "zstd"
+    assert choose_encoding("zstd;q=0, gzip") == "gzip"
+    c = _echo_app(limit=1 << 20)
+    body = zstandard.ZstdCompressor().compress(b"z" * 100000)
+    r = c.post("/echo", content=body, headers={"Content-Encoding": "zstd", "Accept-Encoding": "zstd"})
+    assert r.json()["size"] == 100000
+    s = c.get("/stream", headers={"Accept-Encoding": "zstd"})
+    assert s.headers["content-encoding"] == "zstd" and s.text.count("\n") == 200
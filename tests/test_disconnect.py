@@ -0,0 +1,63 @@
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+from conftest import FakeEngine, FakeWhisperModel, tone_wav
+
+from aipart.app import app
+from aipart.services import metrics, scheduler, singleflight, stt
+from aipart.services.scheduler import FairScheduler
+from aipart.services.singleflight import SingleFlight
+
+
+def test_client_disconnect_stops_transcription(monkeypatch, tmp_path):
+    # 惰性产出 200 段、每段 10ms 的假模型，记录实际解码了多少段
+    model = FakeWhisperModel(segment_s=1.0, text=" seg{i}", delay=0.01, count=200)
+    engine = FakeEngine(model)
+    sched = FairScheduler(slots=1)
+    monkeypatch.setattr(stt, "_engine_singleton", engine)
+    monkeypatch.setattr(scheduler, "_scheduler_singleton", sched)
+    monkeypatch.setattr(singleflight, "_singleflight_singleton", SingleFlight())
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    before = {k: metrics.get(k) for k in ("requests_cancelled", "work_cancelled", "stt_cancelled")}
+
+    req = httpx.Request("POST", "http://test/v1/stt", files={"file": ("a.wav", tone_wav(), "audio/wav")})
+    body = req.read()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/v1/stt", "raw_path": b"/v1/stt", "query_string": b"", "root_path": "",
+        "headers": [(k.lower(), v) for k, v in req.headers.raw], "client": ("127.0.0.1", 5000),
+        "server": ("test", 80),
+    }
+    sent = []
+    state = {"body_sent": False}
+
+    async def receive():
+        if not state["body_sent"]:
+            state["body_sent"] = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # 解码开始后客户端断开
+        while not model.started.is_set():
+            await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(msg):
+        sent.append(msg)
+
+    async def run():
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        # 工作线程在下一个片段边界退出后归还槽位
+        for _ in range(200):
+            if sched.capacity()["running"] == 0 and engine.inflight == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert sent and sent[0]["status"] == 499
+    assert sched.capacity()["running"] == 0 and engine.inflight == 0
+    assert 0 < model.decoded < model.count
+    assert os.listdir(tmp_path) == []  # 临时文件已删除
+    for k, v in before.items():
+        assert metrics.get(k) == v + 1, k
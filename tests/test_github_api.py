@@ -25,3 +25,227 @@ def test_methods_raise_without_token(monkeypatch):
     with pytest.raises(RuntimeError):
         client.dispatch_workflow("owner", "repo", "ci.yml", ref="main")
 
+
+def _paged_handler(total_pages, calls):
+    import httpx
+
+    def handler(request):
+        page = int(request.url.params.get("page", "1"))
+        calls.append(page)
+        base = str(request.url.copy_remove_param("page"))
+        links = [f'<{base}&page={page + 1}>; rel="next"'] if page < total_pages else []
+        links.append(f'<{base}&page={total_pages}>; rel="last"')
+        return httpx.Response(200, json=[{"id": page * 10 + i} for i in range(2)], headers={"Link": ", ".join(links)})
+
+    return handler
+
+
+def test_paginate_fetches_all_pages_in_order():
+    import httpx
+
+    calls = []
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(_paged_handler(5, calls)))
+    with client:
+        repos = client.list_all_repos(per_page=2, concurrency=3)
+    assert [r["id"] for r in repos] == [p * 10 + i for p in range(1, 6) for i in range(2)]
+    assert sorted(calls) == [1, 2, 3, 4, 5]
+
+
+def test_paginate_stops_fetching_when_consumer_stops():
+    import httpx
+
+    calls = []
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(_paged_handler(50, calls)))
+    with client:
+        pages = client.iter_pages("/user/repos", per_page=2, concurrency=3)
+        assert [next(pages) for _ in range(2)][1] == [{"id": 20}, {"id": 21}]
+        pages.close()
+    # first page + the in-flight window (3) + one refill after consuming page 2
+    assert len(calls) <= 5
+
+
+def test_async_paginate_and_max_pages():
+    import asyncio
+    import httpx
+    from aipart.services.github_api import AsyncGitHubAPI
+
+    calls = []
+
+    async def run():
+        async with AsyncGitHubAPI(token="t", transport=httpx.MockTransport(_paged_handler(5, calls))) as client:
+            return await client.list_all_repos(per_page=2, max_pages=3)
+
+    repos = asyncio.run(run())
+    assert [r["id"] for r in repos] == [10, 11, 20, 21, 30, 31]
+    assert sorted(calls) == [1, 2, 3]
+
+
+def test_rate_limit_backoff_and_retry():
+    import time
+    import httpx
+
+    responses = [
+        httpx.Response(403, json={"message": "You have exceeded a secondary rate limit"}, headers={"Retry-After": "7"}),
+        httpx.Response(403, json={"message": "API rate limit exceeded"},
+                       headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 30)}),
+        httpx.Response(200, json={"login": "me"}),
+    ]
+    slept = []
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(lambda req: responses.pop(0)), sleep=slept.append)
+    assert client.get_user() == {"login": "me"}
+    assert slept[0] == 7.0
+    assert 25 <= slept[1] <= 32
+
+    # 普通 403（权限不足）不重试；等待时间超过上限直接报错
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(lambda req: httpx.Response(403, json={"message": "forbidden"})),
+                       sleep=slept.append)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get_user()
+    client = GitHubAPI(token="t", max_backoff_s=60, sleep=slept.append,
+                       transport=httpx.MockTransport(lambda req: httpx.Response(429, headers={"Retry-After": "3600"})))
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get_user()
+    assert len(slept) == 2
+
+
+def test_etag_cache_revalidates_and_evicts(tmp_path):
+    import httpx
+    from aipart.services.http_cache import HttpCache
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"', "X-RateLimit-Remaining": "4999"})
+        return httpx.Response(200, json={"login": "me"}, headers={"ETag": '"v1"', "X-RateLimit-Remaining": "4998"})
+
+    cache = HttpCache(str(tmp_path / "c"))
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(handler), cache=cache)
+    assert client.get_user() == {"login": "me"}
+    # 新实例从磁盘加载缓存，发出条件请求并用 304 回放
+    cache2 = HttpCache(str(tmp_path / "c"))
+    client = GitHubAPI(token="t", transport=httpx.MockTransport(handler), cache=cache2)
+    assert client.get_user() == {"login": "me"}
+    assert seen == [None, '"v1"']
+    st = cache2.stats()
+    assert st["hits"] == 1 and st["entries"] == 1 and st["bytes_saved"] > 0
+
+    small = HttpCache(str(tmp_path / "s"), max_entries=2)
+    for i in range(3):
+        small.put(f"k{i}", f"u{i}", {"etag": f'"{i}"'}, b"x" * 10)
+    assert small.get("k0") is None and small.get("k2") is not None
+    assert small.stats()["evictions"] == 1
+
+
+class _FakeGitServer:
+    """本地替身：在内存中实现 Git Data API 的最小子集（blobs/trees/commits/refs）。"""
+
+    def __init__(self):
+        import hashlib
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.objects = {}  # sha -> dict
+        self.refs = {"main": self._put({"type": "commit", "tree": self._put({"type": "tree", "tree": []}), "parents": []})}
+        self.blob_posts = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, obj):
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].split("/")[5:]  # /repos/o/r/git/<...>
+                if parts[:2] == ["ref", "heads"]:
+                    sha = server.refs.get(parts[2])
+                    return self._send(200, {"object": {"sha": sha}}) if sha else self._send(404, {})
+                if parts[0] == "commits":
+                    return self._send(200, {"tree": {"sha": server.objects[parts[1]]["tree"]}})
+                if parts[0] == "trees":
+                    return self._send(200, {"tree": server.objects[parts[1]]["tree"]})
+                self._send(404, {})
+
+            def do_POST(self):
+                import base64
+                kind = self.path.split("/")[5]
+                data = self._body()
+                if kind == "blobs":
+                    server.blob_posts += 1
+                    content = base64.b64decode(data["content"])
+                    sha = hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+                    server.objects[sha] = {"type": "blob", "content": content}
+                    return self._send(201, {"sha": sha})
+                if kind == "trees":
+                    assert all(e["sha"] in server.objects for e in data["tree"])
+                    tree = {e["path"]: e for e in server.objects[data["base_tree"]]["tree"]} if "base_tree" in data else {}
+                    tree.update((e["path"], e) for e in data["tree"])
+                    return self._send(201, {"sha": server._put({"type": "tree", "tree": sorted(tree.values(), key=lambda e: e["path"])})})
+                if kind == "commits":
+                    return self._send(201, {"sha": server._put({"type": "commit", "tree": data["tree"], "parents": data["parents"]})})
+                if kind == "refs":
+                    server.refs[data["ref"].split("/")[-1]] = data["sha"]
+                    return self._send(201, {})
+
+            def do_PATCH(self):
+                server.refs[self.path.split("/")[-1]] = self._body()["sha"]
+                self._send(200, {})
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def _put(self, obj):
+        import hashlib
+        import json
+        sha = hashlib.sha1(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+        self.objects[sha] = obj
+        return sha
+
+
+def test_publish_files_uploads_only_missing_blobs(tmp_path):
+    from aipart.services.github_api import git_blob_sha
+
+    assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"  # git hash-object
+    (tmp_path / "a.txt").write_bytes(b"same")
+    (tmp_path / "b.txt").write_bytes(b"same")
+    (tmp_path / "c.txt").write_bytes(b"other")
+    files = {n: str(tmp_path / n) for n in ("a.txt", "b.txt", "c.txt")}
+
+    srv = _FakeGitServer()
+    try:
+        progress = []
+        with GitHubAPI(token="t", base_url=srv.url) as client:
+            st = client.publish_files("o", "r", files, concurrency=4, progress=progress.append)
+            assert (st["files"], st["blobs_total"], st["blobs_uploaded"], st["bytes_uploaded"]) == (3, 2, 2, 9)
+            assert srv.refs["main"] == st["commit"]
+            assert progress[-1]["blobs_uploaded"] == 2
+
+            (tmp_path / "d.txt").write_bytes(b"new!")
+            files["d.txt"] = str(tmp_path / "d.txt")
+            st2 = client.publish_files("o", "r", files)
+            # 默认在分支现有 tree 上增量更新：不在本次 files 中的文件保留，prune=True 时才删除
+            st3 = client.publish_files("o", "r", {"d.txt": files["d.txt"]})
+            st4 = client.publish_files("o", "r", {"d.txt": files["d.txt"]}, prune=True)
+        assert (st2["blobs_skipped"], st2["blobs_uploaded"]) == (2, 1)
+        assert srv.objects[st2["commit"]]["parents"] == [st["commit"]]
+        assert srv.blob_posts == 3
+
+        def paths(stats):
+            return [e["path"] for e in srv.objects[stats["tree"]]["tree"]]
+        assert paths(st3) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+        assert paths(st4) == ["d.txt"]
+    finally:
+        srv.httpd.shutdown()
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from conftest import FakeEngine
+
+from aipart.app import app
+from aipart.services import hot_reload, stt, text_utils
+from aipart.services.hot_reload import ReloadManager
+from aipart.services.stt import Transcription, get_stt_engine
+
+
+class _Engine(FakeEngine):
+    """转写结果为配置中的模型名；每次调用等待 release，便于观察排空过程。"""
+
+    def __init__(self, env=None):
+        super().__init__(env=env)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def warm_up(self):
+        return self._getenv("FAIL_WARMUP") != "1"
+
+    def _transcribe_detailed(self, file_path, language, initial_prompt, model, compute_type, cancel=None, **limits):
+        self.started.set()
+        assert self.release.wait(5)
+        return Transcription(self._getenv("FAST_WHISPER_MODEL") or "", "en")
+
+
+def _isolate(monkeypatch, tmp_path, config):
+    path = tmp_path / "stt.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.setenv("STT_CONFIG_FILE", str(path))
+    monkeypatch.setattr(text_utils, "_CORR_MAP", text_utils._CORR_MAP)
+    monkeypatch.setattr(text_utils, "_CORR_ENABLE", text_utils._CORR_ENABLE)
+    monkeypatch.setattr(text_utils, "_CORR_LOADED", text_utils._CORR_LOADED)
+    old = _Engine({"FAST_WHISPER_MODEL": "tiny"})
+    monkeypatch.setattr(stt, "_engine_singleton", old)
+    return old
+
+
+def test_reload_swaps_after_warmup_and_drains_inflight(monkeypatch, tmp_path):
+    old = _isolate(monkeypatch, tmp_path, {
+        "FAST_WHISPER_MODEL": "small", "TEXT_CORRECT_ENABLE": True, "TEXT_CORRECT_MAP_EN": {"wisper": "whisper"},
+    })
+    results = []
+    inflight = threading.Thread(target=lambda: results.append(old.transcribe_detailed("a.wav").text))
+    inflight.start()
+    assert old.started.wait(5)
+
+    manager = ReloadManager(factory=_Engine, drain_timeout_s=5)
+    assert manager.trigger()
+    assert not manager.trigger()  # 同一时间只允许一次
+    deadline = time.time() + 5
+    while get_stt_engine() is old and time.time() < deadline:
+        time.sleep(0.01)
+    new = get_stt_engine()
+    assert new is not old and manager.status()["state"] == "draining"
+    # 旧实例已退役：后续调用转交新实例
+    new.release.set()
+    assert old.transcribe_detailed("b.wav").text == "small"
+    assert text_utils.apply_corrections("wisper model", "en") == "whisper model"
+
+    old.release.set()
+    inflight.join(5)
+    manager.wait(5)
+    assert results == ["tiny"]
+    st = manager.status()
+    assert st["state"] == "idle" and st["generation"] == 1 and st["last_error"] is None
+    assert old.inflight == 0
+
+
+def test_failed_warmup_keeps_current_engine(monkeypatch, tmp_path):
+    old = _isolate(monkeypatch, tmp_path, {"FAST_WHISPER_MODEL": "small", "FAIL_WARMUP": "1"})
+    st = ReloadManager(factory=_Engine).reload()
+    assert get_stt_engine() is old
+    assert st["generation"] == 0 and "预热失败" in st["last_error"]
+
+
+def test_admin_endpoint_requires_token(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path, {"FAST_WHISPER_MODEL": "small"})
+    monkeypatch.setattr(hot_reload, "_reload_singleton", ReloadManager(factory=_Engine, drain_timeout_s=5))
+    client = TestClient(app)
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/reload").status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/reload", headers={"Authorization": "Bearer nope"}).status_code == 401
+    r = client.post("/admin/reload?wait=true", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 202 and r.json()["generation"] == 1 and r.json()["state"] == "idle"
+    assert get_stt_engine()._getenv("FAST_WHISPER_MODEL") == "small"
+
+
+def test_reload_reloads_models_when_thread_settings_change():
+    def engine(threads):
+        return FakeEngine(env={"FAST_WHISPER_CPU_THREADS": threads})
+
+    old = engine("2")
+    assert old.warm_up()  # 加载（假）模型
+    # 线程数/并行数只在构造模型时生效：变化后不能沿用旧模型实例
+    assert engine("2").adopt_models(old) == 1
+    assert engine("4").adopt_models(old) == 0
@@ -0,0 +1,157 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from aipart.services.jobs import DONE, FAILED, QUEUED, RUNNING, JobManager, JobStore, _post_callback, check_callback_url
+
+
+def _wait(manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job and job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def _audio(manager, data=b"RIFF"):
+    path = manager.new_audio_path(".wav")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_job_runs_in_background_and_notifies(tmp_path):
+    notified = []
+    manager = JobManager(
+        str(tmp_path), gc_interval_s=0,
+        runner=lambda path, params: {"text": "hello", "summary": params["max_sentences"]},
+        notifier=lambda url, payload: notified.append((url, payload)) or True,
+    )
+    manager.start()
+    path = _audio(manager)
+    job_id = manager.submit(path, {"max_sentences": 2}, callback_url="http://example.invalid/cb")
+    job = _wait(manager, job_id)
+    manager.shutdown()
+    assert job["status"] == DONE and job["result"] == {"text": "hello", "summary": 2}
+    assert notified and notified[0][1]["status"] == DONE
+    assert not (tmp_path / "audio" / path.split("/")[-1]).exists()
+
+
+def test_failed_job_records_error(tmp_path):
+    def boom(path, params):
+        raise RuntimeError("bad audio")
+
+    manager = JobManager(str(tmp_path), gc_interval_s=0, runner=boom)
+    manager.start()
+    job = _wait(manager, manager.submit(_audio(manager), {}))
+    manager.shutdown()
+    assert job["status"] == FAILED and "bad audio" in job["error"]
+
+
+def test_unfinished_jobs_survive_restart(tmp_path):
+    # 模拟上次进程在任务执行前退出：直接写库，不经线程池
+    store = JobStore(str(tmp_path / "jobs.db"))
+    (tmp_path / "audio").mkdir()
+    audio = tmp_path / "audio" / "pending.wav"
+    audio.write_bytes(b"RIFF")
+    store.create("pending", {}, str(audio), None)
+    store.close()
+
+    manager = JobManager(str(tmp_path), gc_interval_s=0, runner=lambda path, params: {"text": "recovered"})
+    assert manager.get("pending")["status"] == QUEUED
+    manager.start()
+    job = _wait(manager, "pending")
+    manager.shutdown()
+    assert job["result"] == {"text": "recovered"}
+
+
+def test_gc_purges_expired_jobs(tmp_path):
+    manager = JobManager(str(tmp_path), ttl_s=60, gc_interval_s=0, runner=lambda path, params: {"text": "x"})
+    manager.start()
+    job_id = manager.submit(_audio(manager), {})
+    _wait(manager, job_id)
+    assert manager.gc_once() == 0
+    assert manager.gc_once(now=time.time() + 120) == 1
+    assert manager.get(job_id) is None
+    manager.shutdown()
+
+
+def test_workers_sharing_a_store_run_each_job_once(tmp_path):
+    # 预派生模式下每个 worker 都会在启动时恢复任务：同一任务只能被一个进程认领执行
+    store = JobStore(str(tmp_path / "jobs.db"))
+    (tmp_path / "audio").mkdir()
+    for name in ("a", "b", "c"):
+        audio = tmp_path / "audio" / f"{name}.wav"
+        audio.write_bytes(b"RIFF")
+        store.create(name, {}, str(audio), None)
+    # 上一个实例执行到一半退出（owner 进程不存在）与仍在运行的其他 worker 各有一个任务
+    store.claim("b", f"{socket.gethostname()}:999999999:dead", time.time() + 300)
+    store.claim("c", f"{socket.gethostname()}:{os.getppid()}:alive", time.time() + 300)
+    store.close()
+
+    runs = []
+    lock = threading.Lock()
+
+    def runner(path, params):
+        with lock:
+            runs.append(os.path.basename(path))
+        time.sleep(0.05)
+        return {"text": "ok"}
+
+    managers = [JobManager(str(tmp_path), gc_interval_s=0, lease_s=0, runner=runner) for _ in range(3)]
+    # 同一进程内的其他实例仍然存活；同一进程号但不在本进程实例中的 owner 是上一次运行遗留的
+    assert not managers[0]._owner_dead(managers[1].owner)
+    assert managers[0]._owner_dead(f"{socket.gethostname()}:{os.getpid()}:stale")
+    for m in managers:
+        m.start()
+    for m in managers:
+        m.shutdown()  # 等待各自线程池中的任务执行完
+    assert sorted(runs) == ["a.wav", "b.wav"]
+    store = JobStore(str(tmp_path / "jobs.db"))
+    assert [store.get(j)["status"] for j in ("a", "b", "c")] == [DONE, DONE, RUNNING]
+    store.close()
+
+    # 租约过期后由存活的进程接手
+    manager = JobManager(str(tmp_path), gc_interval_s=0, lease_s=0, runner=runner)
+    assert manager.store.requeue_stale(time.time() + 600, lambda owner: False) == 1
+    manager.recover()
+    assert _wait(manager, "c")["status"] == DONE
+    manager.shutdown()
+    assert sorted(runs) == ["a.wav", "b.wav", "c.wav"]
+
+def test_callback_url_rejects_internal_addresses(monkeypatch):
+    monkeypatch.delenv("JOBS_CALLBACK_ALLOWED_HOSTS", raising=False)
+    for url in (
+        "ftp://example.com/cb", "http:///cb", "http://127.0.0.1:8080/cb", "http://localhost/cb",
+        "http://10.1.2.3/cb", "http://169.254.169.254/latest/meta-data", "http://[::1]/cb",
+        "http://[::ffff:192.168.0.1]/cb", "http://0.0.0.0/cb",
+    ):
+        with pytest.raises(ValueError):
+            check_callback_url(url)
+    check_callback_url("https://93.184.216.34/cb")
+    assert _post_callback("http://127.0.0.1:9/cb", {"job_id": "x"}) is False  # 发送前同样拒绝
+
+    # 设置白名单后只按主机名匹配
+    monkeypatch.setenv("JOBS_CALLBACK_ALLOWED_HOSTS", "hooks.example.com, *.internal.example")
+    check_callback_url("https://hooks.example.com/cb")
+    check_callback_url("http://svc.internal.example:8080/cb")
+    with pytest.raises(ValueError):
+        check_callback_url("https://93.184.216.34/cb")
+    with pytest.raises(ValueError):
+        check_callback_url("https://evil-hooks.example.com/cb")
+
+
+def test_submit_job_rejects_internal_callback():
+    from fastapi.testclient import TestClient
+
+    from aipart.app import app
+
+    r = TestClient(app).post(
+        "/v1/jobs", files={"file": ("a.wav", b"RIFF", "audio/wav")}, data={"callback_url": "http://169.254.169.254/"},
+    )
+    assert r.status_code == 400 and "callback_url" in r.json()["detail"]
@@ -0,0 +1,112 @@
+import json
+import logging
+import queue
+import sys
+
+from fastapi.testclient import TestClient
+
+from aipart.app import app
+from aipart.services import logs, metrics
+from aipart.services.logs import DroppingQueueHandler, JsonFormatter, RateLimitFilter, RequestSampler
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), exc_info=None):
+    return logging.LogRecord("aipart.test", level, __file__, 1, msg, args, exc_info)
+
+
+def test_one_structured_record_per_request():
+    cap = _Capture()
+    logger = logging.getLogger("aipart.request")
+    logger.addHandler(cap)
+    try:
+        client = TestClient(app)
+        body = {"text": "Alpha beta gamma. Beta gamma delta. Unrelated words here.", "optimize": True}
+        resp = client.post("/v1/ai", json=body, headers={"X-Request-ID": "req-1"})
+        assert resp.status_code == 200 and resp.headers["x-request-id"] == "req-1"
+        r = client.get("/v1/jobs/missing")
+        assert r.status_code == 404 and len(r.headers["x-request-id"]) == 32
+        client.get("/healthz")
+    finally:
+        logger.removeHandler(cap)
+
+    assert len(cap.records) == 2  # /healthz 正常请求不记录
+    ai, job = (rec.fields for rec in cap.records)
+    assert ai["request_id"] == "req-1" and ai["route"] == "/v1/ai" and ai["status"] == 200
+    assert ai["in_bytes"] == len(resp.request.content) and ai["out_bytes"] == len(resp.content)
+    assert set(ai["stages"]) == {"summarize", "optimize"} and ai["duration_ms"] >= ai["stages"]["summarize"]
+    assert job["route"] == "/v1/jobs/{job_id}" and job["status"] == 404 and "stages" not in job
+
+
+def test_stage_and_annotate_are_noops_outside_requests():
+    with logs.stage("decode"):
+        logs.annotate(audio_s=1.0)
+    token = logs.begin("r")
+    try:
+        with logs.stage("decode"):
+            pass
+        logs.add_stage("decode", 0.5)
+        logs.annotate(audio_s=2.0)
+        rl = logs.current()
+    finally:
+        logs.end(token)
+    assert logs.current() is None
+    assert rl.fields == {"audio_s": 2.0} and 500 <= rl.stages["decode"] < 600
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    before = metrics.get("log_dropped")
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 2 and metrics.get("log_dropped") == before + 3
+    rec = handler.queue.get_nowait()
+    assert rec.msg == "hello world" and rec.args is None
+
+
+def test_fork_hook_registered_once_across_restarts(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "aipart.log"))
+    monkeypatch.setattr(logs.os, "register_at_fork", lambda **kw: calls.append(kw))
+    monkeypatch.setattr(logs, "_fork_hook_registered", False)
+    logs.shutdown_logging()
+    try:
+        for _ in range(3):
+            logs.setup_logging()
+            logs.setup_logging()
+            logs.shutdown_logging()
+    finally:
+        logs.shutdown_logging()
+    assert len(calls) == 1
+
+
+def test_rate_limit_spares_warnings_and_sampler_keeps_errors():
+    limiter = RateLimitFilter(rate=0.001, burst=2)
+    assert [limiter.filter(_record()) for _ in range(4)] == [True, True, False, False]
+    assert limiter.filter(_record(logging.WARNING))
+
+    sampler = RequestSampler(rate=0.0, slow_ms=1000)
+    assert not sampler.keep("/v1/ai", 200, 10)
+    assert sampler.keep("/v1/ai", 503, 10) and sampler.keep("/v1/ai", 200, 1500)
+    assert not RequestSampler(rate=1.0).keep("/healthz", 200, 1)
+    assert RequestSampler(rate=1.0).keep("/ready", 503, 1)
+
+
+def test_json_formatter_includes_fields_and_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        rec = _record(logging.ERROR, "failed", (), exc_info=sys.exc_info())
+    rec.fields = {"request_id": "r1", "stages": {"decode": 1.5}}
+    out = json.loads(JsonFormatter().format(rec))
+    assert out["level"] == "error" and out["logger"] == "aipart.test" and out["msg"] == "failed"
+    assert out["request_id"] == "r1" and out["stages"] == {"decode": 1.5}
+    assert "ValueError: boom" in out["exc"]
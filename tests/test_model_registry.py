@@ -0,0 +1,58 @@
+import threading
+import time
+
+from aipart.services.model_registry import ModelKey, ModelRegistry
+
+
+def test_concurrent_loads_collapse_into_one():
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return object()
+
+    reg = ModelRegistry(loader, budget_mb=0)
+    key = ModelKey("tiny", "cpu", "int8")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reg.get(key))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+    st = reg.stats()["models"][0]
+    assert st["loads"] == 1 and st["coalesced"] + st["hits"] == 7
+
+
+def test_lru_eviction_under_budget():
+    sizes = {"tiny": 100, "base": 200, "small": 500}
+    reg = ModelRegistry(lambda key: key.name, budget_mb=650, estimator=lambda key: sizes[key.name])
+    reg.get(ModelKey("tiny"))
+    reg.get(ModelKey("base"))
+    reg.get(ModelKey("tiny"))  # tiny 变为最近使用
+    reg.get(ModelKey("small"))  # 需淘汰 base（最久未用）
+    names = [k.name for k in reg.loaded()]
+    assert names == ["tiny", "small"]
+    stats = {m["model"]: m for m in reg.stats()["models"]}
+    assert stats["base"]["evictions"] == 1 and stats["base"]["loaded"] is False
+    assert stats["tiny"]["hits"] == 1
+
+
+def test_failed_load_is_not_cached():
+    attempts = []
+
+    def loader(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    reg = ModelRegistry(loader)
+    try:
+        reg.get(ModelKey("tiny"))
+    except RuntimeError:
+        pass
+    assert reg.get(ModelKey("tiny")) == "ok"
+    assert len(attempts) == 2
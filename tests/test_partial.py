@@ -0,0 +1,54 @@
+import io
+import time
+
+from fastapi.testclient import TestClient
+
+from conftest import FakeEngine, FakeWhisperModel, tone_wav
+
+from aipart.app import app
+from aipart.services import stt
+
+
+def _tone_file(path, seconds):
+    path.write_bytes(tone_wav(seconds))
+    return str(path)
+
+
+def test_max_audio_seconds_truncates_before_decoding(tmp_path):
+    model = FakeWhisperModel()
+    engine = FakeEngine(model)
+    path = _tone_file(tmp_path / "a.wav", 3.0)
+    tr = engine.transcribe_detailed(path, max_audio_s=1.0)
+    assert tr.partial and tr.covered_range == (0.0, 1.0)
+    assert tr.text == "Part 0. Part 1." and model.decoded == 2
+    assert tr.audio_seconds == 3.0
+
+    full = engine.transcribe_detailed(path, max_audio_s=10.0)
+    assert not full.partial and full.covered_range is None and model.decoded == 8
+
+
+def test_deadline_returns_segments_decoded_so_far(tmp_path):
+    model = FakeWhisperModel(delay=0.05)
+    engine = FakeEngine(model)
+    path = _tone_file(tmp_path / "a.wav", 10.0)
+    tr = engine.transcribe_detailed(path, deadline=time.monotonic() + 0.2)
+    assert tr.partial and 0 < model.decoded < 20
+    assert tr.covered_range == (0.0, 0.5 * model.decoded)
+    assert tr.text.endswith(f"Part {model.decoded - 1}.")
+
+
+def test_ai_summarizes_partial_text(monkeypatch, tmp_path):
+    monkeypatch.setattr(stt, "_engine_singleton", FakeEngine(FakeWhisperModel(delay=0.05)))
+    with open(_tone_file(tmp_path / "a.wav", 10.0), "rb") as f:
+        data = f.read()
+    client = TestClient(app)
+    r = client.post("/v1/ai", files={"file": ("a.wav", io.BytesIO(data), "audio/wav")},
+                    data={"deadline_s": "0.3", "max_sentences": "1", "strategy": "lead"})
+    body = r.json()
+    assert r.status_code == 200 and body["partial"] is True
+    assert body["summary"] == "Part 0." and body["text"].startswith("Part 0.")
+    assert 0 < body["covered_range"][1] < 10.0
+
+    r = client.post("/v1/stt?max_audio_s=2", files={"file": ("a.wav", io.BytesIO(data), "audio/wav")})
+    assert r.json()["partial"] is True and r.json()["covered_range"] == [0.0, 2.0]
+    assert client.post("/v1/stt?deadline_s=-1", files={"file": ("a.wav", io.BytesIO(data), "audio/wav")}).status_code == 422
@@ -0,0 +1,147 @@
+import os
+import signal
+import time
+
+import pytest
+
+from aipart import prefork
+from aipart.prefork import PreforkServer, _parse_smaps_rollup, detect_worker_count, memory_report
+
+needs_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork requires os.fork")
+
+SMAPS = """\
+55d4c000000-7ffc8a5f2000 ---p 00000000 00:00 0                          [rollup]
+Rss:              204800 kB
+Pss:              102400 kB
+Shared_Clean:      92160 kB
+Shared_Dirty:      10240 kB
+Private_Clean:      2048 kB
+Private_Dirty:    100352 kB
+Swap:                  0 kB
+"""
+
+
+def test_detect_worker_count(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    monkeypatch.delenv("FAST_WHISPER_CPU_THREADS", raising=False)
+    monkeypatch.setenv("PREFORK_WORKERS", "3")
+    assert detect_worker_count() == 3
+    monkeypatch.setenv("PREFORK_WORKERS", "auto")
+    assert detect_worker_count() == 8
+    monkeypatch.setenv("OMP_NUM_THREADS", "2")
+    assert detect_worker_count() == 4
+    monkeypatch.setenv("FAST_WHISPER_CPU_THREADS", "3")  # 优先于 OMP_NUM_THREADS
+    assert detect_worker_count() == 2
+    monkeypatch.setenv("FAST_WHISPER_CPU_THREADS", "16")
+    assert detect_worker_count() == 1
+    monkeypatch.setenv("PREFORK_WORKERS", "bogus")
+    assert detect_worker_count() == 1
+
+
+def test_memory_report_parses_smaps_rollup(monkeypatch):
+    m = _parse_smaps_rollup(SMAPS)
+    assert m["Rss"] == 204800 and m["Private_Dirty"] == 100352 and "55d4c000000-7ffc8a5f2000" not in m
+    monkeypatch.setattr(prefork, "_smaps_rollup", lambda pid: m if pid == 1 else None)
+    assert memory_report([1, 2]) == [
+        {"pid": 1, "rss_mb": 200.0, "pss_mb": 100.0, "shared_mb": 100.0, "private_mb": 100.0}
+    ]
+
+
+class _FakeServer(PreforkServer):
+    """worker 不启动 uvicorn：把收到的信号写进 <dir>/<pid> 文件，模拟应用启动后安装的 SIGHUP 处理。"""
+
+    def __init__(self, out_dir, crash_once=False, **kw):
+        super().__init__(host="127.0.0.1", port=0, **kw)
+        self.out_dir = out_dir
+        self.crash_once = crash_once  # 第一个 worker 启动后立即异常退出
+
+    def _load_app(self):
+        return None
+
+    def _serve(self, limit):
+        path = os.path.join(self.out_dir, str(os.getpid()))
+
+        def record(what):
+            with open(path, "a") as f:
+                f.write(what + "\n")
+
+        signal.signal(signal.SIGHUP, lambda *a: record("hup"))
+        signal.signal(signal.SIGTERM, lambda *a: (record("term"), os._exit(0)))
+        record("ready")
+        if self.crash_once and not os.path.exists(os.path.join(self.out_dir, "crashed")):
+            open(os.path.join(self.out_dir, "crashed"), "w").close()
+            os._exit(3)
+        while True:
+            time.sleep(0.05)
+
+
+def _start_master(tmp_path, **kw):
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            prefork.preload_shared_resources = lambda preload_model: None
+            code = _FakeServer(str(tmp_path), **kw).run()
+        finally:
+            os._exit(code)
+    return pid
+
+
+def _wait_for(cond, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _records(tmp_path):
+    out = {}
+    for name in os.listdir(tmp_path):
+        if not name.isdigit():
+            continue
+        with open(os.path.join(tmp_path, name)) as f:
+            out[int(name)] = f.read().split()
+    return out
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@needs_fork
+def test_master_forwards_sighup_to_every_worker(tmp_path):
+    master = _start_master(tmp_path, workers=2)
+    try:
+        assert _wait_for(lambda: len(_records(tmp_path)) == 2)
+        os.kill(master, signal.SIGHUP)
+        assert _wait_for(lambda: all("hup" in r for r in _records(tmp_path).values()))
+        assert _alive(master) and all(_alive(p) for p in _records(tmp_path))
+    finally:
+        os.kill(master, signal.SIGTERM)
+        _, status = os.waitpid(master, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+@needs_fork
+def test_master_respawns_dead_worker_and_fans_out_term(tmp_path):
+    master = _start_master(tmp_path, workers=2, crash_once=True)
+    try:
+        # 第一个 worker 退出码 3，父进程为同一槽位补充新 worker
+        assert _wait_for(lambda: len(_records(tmp_path)) == 3)
+        time.sleep(0.3)
+        alive = [p for p in _records(tmp_path) if _alive(p)]
+        assert len(alive) == 2
+    finally:
+        os.kill(master, signal.SIGTERM)
+        _, status = os.waitpid(master, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    records = _records(tmp_path)
+    assert all(records[p] == ["ready", "term"] for p in alive)
+    assert not any(_alive(p) for p in records)
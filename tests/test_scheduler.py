@@ -0,0 +1,137 @@
+import asyncio
+import time
+import wave
+
+import pytest
+
+from aipart.services.scheduler import FairScheduler, estimate_audio_seconds, estimate_cost
+
+
+def _dispatch_order(sched, jobs):
+    """占住唯一槽位后一次性排入 jobs=[(name, client, cost)]，逐个释放，返回获得槽位的顺序。"""
+    async def run():
+        order = []
+        blocker = await sched.acquire("blocker", 1.0)
+
+        async def job(name, client, cost):
+            t = await sched.acquire(client, cost, cost)
+            order.append(name)
+            await asyncio.sleep(0)
+            sched.release(t)
+
+        tasks = [asyncio.create_task(job(*j)) for j in jobs]
+        await asyncio.sleep(0)
+        sched.release(blocker)
+        await asyncio.gather(*tasks)
+        return order
+
+    return asyncio.run(run())
+
+
+def test_short_jobs_overtake_long_and_clients_share_fairly():
+    sched = FairScheduler(slots=1, aging=0.0)
+    order = _dispatch_order(sched, [
+        ("a-long", "a", 600.0), ("a-short", "a", 5.0), ("b-short", "b", 5.0), ("b-mid", "b", 60.0),
+    ])
+    # b 的短任务先于 a 的长任务；同一客户端按提交顺序排开，a 的第二个任务排在 a 的长任务之后
+    assert order.index("b-short") < order.index("a-long")
+    assert order.index("b-mid") < order.index("a-long")
+    assert order.index("a-long") < order.index("a-short")
+
+
+def test_weights_and_aging():
+    sched = FairScheduler(slots=1, aging=0.0, weights={"vip": 10.0})
+    order = _dispatch_order(sched, [("n", "normal", 100.0), ("v", "vip", 500.0)])
+    assert order == ["v", "n"]
+
+    # 老化系数足够大时，等待最久的长任务优先于后到的短任务
+    sched = FairScheduler(slots=1, aging=1e6)
+
+    async def run():
+        blocker = await sched.acquire("x", 1.0)
+        order = []
+
+        async def job(name, client, cost):
+            t = await sched.acquire(client, cost, cost)
+            order.append(name)
+            sched.release(t)
+
+        long_task = asyncio.create_task(job("long", "a", 3600.0))
+        await asyncio.sleep(0.01)
+        short_task = asyncio.create_task(job("short", "b", 1.0))
+        await asyncio.sleep(0)
+        sched.release(blocker)
+        await asyncio.gather(long_task, short_task)
+        return order
+
+    assert asyncio.run(run()) == ["long", "short"]
+
+
+def test_cancelled_waiter_leaves_queue_and_stats():
+    sched = FairScheduler(slots=1)
+
+    async def run():
+        blocker = await sched.acquire("a", 1.0, 10.0)
+        waiter = asyncio.create_task(sched.acquire("b", 1.0, 120.0))
+        await asyncio.sleep(0)
+        assert sched.stats()["queued"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        sched.release(blocker)
+
+    asyncio.run(run())
+    st = sched.stats()
+    assert st["running"] == 0 and st["queued"] == 0
+    assert st["classes"]["short"]["dispatched"] == 1
+    assert st["classes"]["medium"]["dispatched"] == 0
+
+
+def test_cost_estimate_from_wav_header(tmp_path):
+    p = tmp_path / "a.wav"
+    with wave.open(str(p), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(b"\0\0" * 8000 * 3)
+    assert estimate_audio_seconds(str(p)) == pytest.approx(3.0)
+    _, base = estimate_cost(str(p), "base")
+    _, small = estimate_cost(str(p), "small")
+    assert small > base == pytest.approx(3.0)
+
+
+def test_capacity_reports_saturation_and_ewma():
+    sched = FairScheduler(slots=2)
+    a = sched.acquire_blocking("a", 1.0)
+    cap = sched.capacity()
+    assert cap["free_slots"] == 1 and cap["saturation"] == 0.5 and cap["ewma_latency_s"] is None
+    b = sched.acquire_blocking("b", 1.0)
+    time.sleep(0.02)
+    sched.release(a)
+    sched.release(b)
+    cap = sched.capacity()
+    assert cap["free_slots"] == 2 and cap["saturation"] == 0.0
+    assert cap["ewma_latency_s"] >= cap["ewma_service_s"] > 0.01
+
+
+def test_ready_returns_503_when_saturated(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from aipart import app as app_module
+    from aipart.services import scheduler
+
+    sched = FairScheduler(slots=1)
+    monkeypatch.setattr(scheduler, "_scheduler_singleton", sched)
+    client = TestClient(app_module.app)
+    assert client.get("/ready").status_code == 200
+
+    monkeypatch.setenv("READY_MAX_SATURATION", "1")
+    ticket = sched.acquire_blocking("a", 1.0)
+    r = client.get("/ready")
+    assert r.status_code == 503 and r.json()["saturated"] and r.json()["ready"] is False
+    cap = client.get("/capacity").json()
+    assert cap["free_slots"] == 0 and cap["saturated"] and isinstance(cap["models"], list)
+
+    monkeypatch.setenv("READY_MAX_SATURATION", "0")  # 关闭
+    assert client.get("/ready").status_code == 200
+    sched.release(ticket)
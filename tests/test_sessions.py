@@ -0,0 +1,65 @@
+import random
+import time
+
+import pytest
+
+from aipart.services.sessions import SessionLimitError, SessionStore, SummarySession
+from aipart.services.summarizer import summarize
+
+EN = (
+    "Speech models turn audio into text. The model is fast! Audio text is long. "
+    "Short one? Models and audio again. The text model wins.\nAnother line without stop"
+)
+ZH = "语音识别把音频转成文字。摘要从文字中挑选句子！模型很快。音频和文字都很重要？"
+
+
+@pytest.mark.parametrize("text", [EN * 5, EN + ZH * 3])
+def test_incremental_matches_full_summary(text):
+    rng = random.Random(0)
+    s = SummarySession("s", max_sentences=3)
+    pos = 0
+    while pos < len(text):
+        n = rng.randint(1, 40)
+        s.append(text[pos:pos + n])
+        pos += n
+    s.append("", final=True)
+    for k in (1, 3, 5):
+        assert s.top(k) == summarize(text, k, "frequency")
+    assert s.view()["pending_chars"] == 0
+
+
+def test_tail_is_held_until_sentence_ends():
+    s = SummarySession("s")
+    s.append("Hello wor")
+    assert s.sentences == [] and s.tail == "Hello wor"
+    s.append("ld. Next")
+    assert s.sentences == ["Hello world."] and s.tail == " Next"
+
+
+def test_store_expiry_caps_and_limits():
+    store = SessionStore(ttl_s=60, max_sessions=2, max_chars=20)
+    a, b = store.create(), store.create()
+    store.get(a.id)  # a 最近使用，新建第三个时淘汰 b
+    c = store.create()
+    assert store.get(b.id) is None and store.get(a.id) is a and store.get(c.id) is c
+    with pytest.raises(SessionLimitError):
+        store.append(a.id, "x" * 21)
+    assert store.delete(c.id) and not store.delete(c.id)
+    a.last_used -= 120
+    assert store.get(a.id) is None
+
+
+def test_append_cost_does_not_grow_with_transcript():
+    # 追加只处理新文本：常见词出现在每一句里时，旧实现要遍历整条倒排链，耗时随转写长度线性增长
+    def append_time(n_sentences):
+        s = SummarySession("s")
+        s.append("Speech audio model text again. " * n_sentences)
+        best = float("inf")
+        for _ in range(20):
+            t0 = time.perf_counter()
+            s.append("Speech audio model text again. ")
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    small, large = append_time(100), append_time(50_000)
+    assert large < small * 5
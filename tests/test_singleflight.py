@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+
+from conftest import FakeEngine, FakeWhisperModel
+
+from aipart.app import app
+from aipart.services import singleflight, stt
+from aipart.services.singleflight import SingleFlight, request_key
+
+
+def test_identical_calls_share_one_computation():
+    sf = SingleFlight()
+    calls = []
+
+    async def work(x):
+        calls.append(x)
+        await asyncio.sleep(0.02)
+        if x == "bad":
+            raise ValueError("boom")
+        return x.upper()
+
+    async def run():
+        ok = await asyncio.gather(*(sf.do("k1", lambda: work("a")) for _ in range(3)), sf.do("k2", lambda: work("b")))
+        bad = await asyncio.gather(*(sf.do("k3", lambda: work("bad")) for _ in range(2)), return_exceptions=True)
+        again = await sf.do("k1", lambda: work("a"))  # 已完成的计算不缓存
+        return ok, bad, again
+
+    ok, bad, again = asyncio.run(run())
+    assert ok == ["A", "A", "A", "B"] and again == "A"
+    assert all(isinstance(e, ValueError) for e in bad)
+    assert calls == ["a", "b", "bad", "a"]
+    st = sf.stats()
+    assert st["coalesced"] == 3 and st["leaders"] == 4 and st["inflight"] == 0
+
+
+def test_cancel_only_when_no_waiters_remain():
+    sf = SingleFlight()
+    state = {"cancelled": 0}
+
+    async def work():
+        try:
+            await asyncio.sleep(0.05)
+            return "done"
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+
+    async def run():
+        # 首个调用方断开：后到的等待者仍拿到结果，计算不被取消
+        leader = asyncio.create_task(sf.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(sf.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert state["cancelled"] == 0
+
+        # 全部调用方断开：计算被取消
+        tasks = [asyncio.create_task(sf.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert state["cancelled"] == 1
+    assert sf.stats()["abandoned"] == 1 and sf.stats()["inflight"] == 0
+
+
+def test_new_request_does_not_join_a_call_being_cancelled():
+    sf = SingleFlight()
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)  # 工作线程走到下一个取消检查点之前的窗口
+            raise
+
+    async def fresh():
+        return "fresh"
+
+    async def run():
+        leader = asyncio.create_task(sf.do("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        # 旧计算仍在退出途中：相同请求应另起一次计算，而不是收到 CancelledError
+        return await sf.do("k", fresh)
+
+    assert asyncio.run(run()) == "fresh"
+    assert sf.stats()["leaders"] == 2 and sf.stats()["coalesced"] == 0 and sf.stats()["inflight"] == 0
+
+
+def test_request_key_depends_on_content_and_params():
+    k = request_key("stt", b"abc", {"language": "en", "model": ("base", "cpu", "int8")})
+    assert k == request_key("stt", b"abc", {"model": ("base", "cpu", "int8"), "language": "en"})
+    assert k != request_key("stt", b"abd", {"language": "en", "model": ("base", "cpu", "int8")})
+    assert k != request_key("stt", b"abc", {"language": "zh", "model": ("base", "cpu", "int8")})
+    assert k != request_key("ai", b"abc", {"language": "en", "model": ("base", "cpu", "int8")})
+
+
+def test_stt_endpoint_coalesces_identical_uploads(monkeypatch):
+    model = FakeWhisperModel(segment_s=None, text="hello", delay=0.2)
+    monkeypatch.setattr(stt, "_engine_singleton", FakeEngine(model))
+    sf = SingleFlight()
+    monkeypatch.setattr(singleflight, "_singleflight_singleton", sf)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            def post(data):
+                return client.post("/v1/stt", files={"file": ("a.wav", data, "audio/wav")})
+            return await asyncio.gather(post(b"same-clip"), post(b"same-clip"), post(b"other-clip"))
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert all(r.json()["text"] == "hello" for r in responses)
+    assert model.calls == 2
+    assert sf.stats()["coalesced"] == 1
@@ -0,0 +1,100 @@
+import numpy as np
+
+import aipart.app as app_module
+from aipart.services import streaming
+from aipart.services.streaming import StreamConfig, StreamDecoder, StreamManager
+
+
+def _tone(seconds, sr=16000, amp=0.3):
+    t = np.arange(int(seconds * sr)) / sr
+    return (amp * np.sin(2 * np.pi * 300 * t) * 32767).astype("<i2").tobytes()
+
+
+def _silence(seconds, sr=16000):
+    return np.zeros(int(seconds * sr), dtype="<i2").tobytes()
+
+
+def _fake_decode(calls):
+    def decode(audio, prompt):
+        calls.append((len(audio) / 16000, prompt))
+        n = max(1, int(len(audio) / 16000 // 2))  # 每 2 秒一段
+        return [(2.0 * i, 2.0 * i + 2.0, f" w{i}") for i in range(n)], "en"
+    return decode
+
+
+def test_partial_then_endpoint_final():
+    calls = []
+    dec = StreamDecoder(_fake_decode(calls), StreamConfig(step_s=1.0, window_s=10, endpoint_silence_s=0.5))
+    dec.feed(_tone(1.2))
+    assert dec.ready()
+    msgs, _ = dec.step()
+    assert msgs[0]["type"] == "partial" and msgs[0]["text"] == "w0"
+    dec.feed(_silence(1.0))
+    msgs, _ = dec.step()
+    assert msgs[0]["type"] == "final" and msgs[0]["end"] == 2.0
+    assert len(dec.buf) == 0 and dec.offset_s == 2.2
+    # 纯静音窗口不调用模型
+    dec.feed(_silence(2.0))
+    assert dec.step() == ([], dec._last_arrival) and len(calls) == 2
+
+
+def test_full_window_keeps_last_segment_and_buffer_is_bounded():
+    calls = []
+    dec = StreamDecoder(_fake_decode(calls), StreamConfig(window_s=6, max_buffer_s=8))
+    dec.feed(_tone(12.0))
+    msgs, _ = dec.step()
+    # 超出 max_buffer 的最旧 4 秒被丢弃；满窗口时提交前两段，最后一段留在窗口里
+    assert dec.dropped_s == 4.0
+    assert msgs[0]["type"] == "final" and msgs[0]["text"] == "w0 w1"
+    assert len(dec.buf) == 4 * 16000
+    msgs, _ = dec.step(final=True)
+    assert msgs[0]["type"] == "final" and calls[-1][1] == "w0 w1"
+
+
+def test_resampling_across_frames_matches_whole_stream():
+    # 连接级重采样器跨帧保留状态：样本数与一次性重采样一致，帧边界处没有跳变
+    from aipart.services.audio_prep import resample_stream
+
+    for sr, frame, expected in ((8000, 160, 159999), (44100, 1024, 160000)):
+        pcm = _tone(10.0, sr=sr)
+        dec = StreamDecoder(_fake_decode([]), StreamConfig(max_buffer_s=30), sample_rate=sr)
+        for i in range(0, len(pcm), frame * 2):
+            dec.feed(pcm[i:i + frame * 2])
+        dec._take_incoming()
+        whole = resample_stream(iter([np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0]), sr)
+        assert len(dec.buf) == len(whole) == expected
+        assert np.allclose(dec.buf, whole, atol=1e-6)
+        assert np.abs(np.diff(dec.buf)).max() <= 0.3 * 2 * np.pi * 300 / 16000 * 1.01  # 不超过正弦的最大斜率
+
+
+def test_websocket_stream_end_to_end(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    class FakeEngine:
+        available = True
+        name = "fake"
+
+        def resolve_model(self, model=None, compute_type=None):
+            return None
+
+        def transcribe_window(self, audio, language=None, prompt=None, model=None, compute_type=None):
+            return [(0.0, len(audio) / 16000, " hello")], "en"
+
+    monkeypatch.setattr(app_module, "get_stt_engine", lambda: FakeEngine())
+    monkeypatch.setattr(streaming, "_manager_singleton", StreamManager(StreamConfig(step_s=0.5, max_connections=1)))
+    client = TestClient(app_module.app)
+    with client.websocket_connect("/v1/stt/stream?sample_rate=8000") as ws:
+        for _ in range(4):
+            ws.send_bytes(_tone(0.25, sr=8000))
+        ws.send_text("end")
+        msgs = []
+        while not msgs or msgs[-1]["type"] != "done":
+            msgs.append(ws.receive_json())
+    done = msgs[-1]
+    assert done["text"].startswith("hello") and done["audio_seconds"] == 1.0
+    assert all("latency_ms" in m for m in msgs[:-1]) and done["latency_ms"]["max"] is not None
+    assert streaming.get_stream_manager().stats()["active"] == 0
+
+    monkeypatch.setattr(streaming, "_manager_singleton", StreamManager(StreamConfig(max_connections=0)))
+    with client.websocket_connect("/v1/stt/stream") as ws:
+        assert ws.receive_json()["type"] == "error"
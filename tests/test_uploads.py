@@ -0,0 +1,131 @@
+import asyncio
+import gzip
+import os
+
+from fastapi.testclient import TestClient
+
+from conftest import FakeEngine, FakeWhisperModel, tone_wav
+
+from aipart.app import app
+from aipart.services import metrics, stt, uploads
+from aipart.services.uploads import UploadStore
+
+
+def _interrupted_patch(upload_id, offset, chunk):
+    """原始 ASGI 调用：只送达 chunk 后连接断开，模拟弱网下上传中途掉线。"""
+    path = f"/v1/uploads/{upload_id}"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "PATCH", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": f"offset={offset}".encode(), "root_path": "",
+        "headers": [(b"content-type", b"application/octet-stream")], "client": ("127.0.0.1", 5000),
+        "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": chunk, "more_body": True}, {"type": "http.disconnect"}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(msg):
+        pass
+
+    asyncio.run(app(scope, receive, send))
+
+
+def test_interrupted_upload_resumes_from_received_offset(monkeypatch, tmp_path):
+    store = UploadStore(str(tmp_path), gc_interval_s=0)
+    monkeypatch.setattr(uploads, "_uploads_singleton", store)
+    monkeypatch.setattr(stt, "_engine_singleton", FakeEngine(FakeWhisperModel(segment_s=None, text=" {seconds:.0f} seconds.")))
+    data = tone_wav(3.0)
+    client = TestClient(app)
+
+    r = client.post("/v1/uploads", json={"length": len(data)})
+    assert r.status_code == 201
+    upload_id = r.json()["upload_id"]
+    assert r.json()["offset"] == 0 and not r.json()["complete"]
+
+    # 第一个分块完整送达，第二个分块只到达一部分就断开
+    assert client.patch(f"/v1/uploads/{upload_id}?offset=0", content=data[:40000]).json()["offset"] == 40000
+    before = metrics.get("uploads_interrupted")
+    _interrupted_patch(upload_id, 40000, data[40000:70000])
+    assert metrics.get("uploads_interrupted") == before + 1
+    status = client.get(f"/v1/uploads/{upload_id}").json()
+    assert status["offset"] == 70000 and not status["complete"]
+
+    # 未完成不能转写；跳过未接收的区间被拒绝
+    assert client.post(f"/v1/uploads/{upload_id}/finalize").status_code == 409
+    r = client.patch(f"/v1/uploads/{upload_id}?offset=80000", content=data[80000:])
+    assert r.status_code == 409 and "70000" in r.json()["detail"]
+
+    # 从查询到的 offset 续传（与已接收部分重叠也可以），超出声明长度被拒绝
+    r = client.patch(f"/v1/uploads/{upload_id}?offset=60000", content=data[60000:])
+    assert r.json()["offset"] == len(data) and r.json()["complete"]
+    assert client.patch(f"/v1/uploads/{upload_id}?offset={len(data)}", content=b"x").status_code == 400
+    with open(store.data_path(upload_id), "rb") as f:
+        assert f.read() == data
+
+    r = client.post(f"/v1/uploads/{upload_id}/finalize")
+    assert r.status_code == 200 and r.json()["text"] == "3 seconds." and r.json()["audio_seconds"] == 3.0
+    assert client.get(f"/v1/uploads/{upload_id}").status_code == 404
+    assert os.listdir(tmp_path) == []
+
+
+def test_corrupt_compressed_chunk_is_rolled_back(monkeypatch, tmp_path):
+    store = UploadStore(str(tmp_path), gc_interval_s=0)
+    monkeypatch.setattr(uploads, "_uploads_singleton", store)
+    data = tone_wav(3.0)
+    client = TestClient(app)
+    upload_id = client.post("/v1/uploads", json={"length": len(data)}).json()["upload_id"]
+    assert client.patch(f"/v1/uploads/{upload_id}?offset=0", content=data[:10000]).json()["offset"] == 10000
+
+    # 解压出前 64KB 后才在校验和处发现数据损坏：返回 400，已写入的部分撤销，offset 不前进
+    packed = gzip.compress(data[5000:])
+    corrupt = packed[:-8] + bytes(4) + packed[-4:]
+    r = client.patch(f"/v1/uploads/{upload_id}?offset=5000", content=corrupt, headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 400
+    assert client.get(f"/v1/uploads/{upload_id}").json()["offset"] == 10000
+    with open(store.data_path(upload_id), "rb") as f:
+        assert f.read() == data[:10000]
+
+    r = client.patch(f"/v1/uploads/{upload_id}?offset=10000", content=gzip.compress(data[10000:]),
+                     headers={"Content-Encoding": "gzip"})
+    assert r.json()["complete"]
+    with open(store.data_path(upload_id), "rb") as f:
+        assert f.read() == data
+
+
+def test_stale_uploads_expire(monkeypatch, tmp_path):
+    store = UploadStore(str(tmp_path), ttl_s=60, gc_interval_s=0, max_bytes=1000, max_active=2)
+    monkeypatch.setattr(uploads, "_uploads_singleton", store)
+    client = TestClient(app)
+    assert client.post("/v1/uploads", json={"length": 1001}).status_code == 413
+    stale = client.post("/v1/uploads", json={"length": 10}).json()["upload_id"]
+    fresh = client.post("/v1/uploads", json={"length": 10}).json()["upload_id"]
+    assert client.post("/v1/uploads", json={"length": 10}).status_code == 429
+
+    old = os.path.getmtime(store.data_path(stale)) - 120
+    os.utime(store.data_path(stale), (old, old))
+    assert client.get(f"/v1/uploads/{stale}").status_code == 404
+    assert client.patch(f"/v1/uploads/{stale}?offset=0", content=b"abc").status_code == 404
+    assert store.gc_once() == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{fresh}.json", f"{fresh}.part"])
+    assert client.get(f"/v1/uploads/{fresh}").json()["expires_at"] > os.path.getmtime(store.data_path(fresh))
+    assert client.get("/v1/uploads/..%2Fetc").status_code == 404
+
+
+def test_claim_is_exclusive_across_stores(tmp_path):
+    # 两个 UploadStore 实例共用目录，相当于两个预派生 worker：占用通过数据文件上的 flock 互斥
+    a = UploadStore(str(tmp_path), ttl_s=60, gc_interval_s=0)
+    b = UploadStore(str(tmp_path), ttl_s=60, gc_interval_s=0)
+    upload_id = a.create(10)["upload_id"]
+    assert a.claim(upload_id)
+    assert not a.claim(upload_id)
+    old = os.path.getmtime(a.data_path(upload_id)) - 120
+    os.utime(a.data_path(upload_id), (old, old))
+    if uploads.fcntl is not None:
+        assert not b.claim(upload_id)
+        # 另一进程正在处理的过期上传不会被清理
+        assert b.gc_once() == 0 and os.path.exists(a.data_path(upload_id))
+    a.unclaim(upload_id)
+    assert b.claim(upload_id)
+    b.unclaim(upload_id)
+    assert a.gc_once() == 1 and os.listdir(tmp_path) == []